@@ -3,6 +3,11 @@ An example of using the VL53L0X driver with numpy.
 """
 
 import click
+import numpy as np
+import pigpio
+
+from vl53l0x_pigpio import VL53L0X
+from vl53l0x_pigpio.driver import RANGE_DTYPE, RANGE_STATUS_VALID
 
 
 @click.command()
@@ -16,4 +21,28 @@ import click
 )
 @click.option("--debug", "-d", is_flag=True, default=False, help="debug flag")
 def main(samples: int, debug: bool) -> None:
-    pass
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise click.ClickException("cannot connect to pigpiod")
+
+    # 結果を書き込む配列は一度だけ確保して使い回す
+    out = np.empty(samples, dtype=RANGE_DTYPE)
+    try:
+        with VL53L0X(pi, debug=debug) as sensor:
+            for _ in range(3):
+                ranges = sensor.get_ranges(samples, out=out)
+                valid = ranges[ranges["range_status"] == RANGE_STATUS_VALID]
+                elapsed_s = np.ptp(ranges["timestamp_ns"]) / 1e9
+                click.echo(
+                    f"valid={len(valid)}/{samples}, "
+                    f"mean={np.mean(valid['range_mm']):.1f} mm, "
+                    f"std={np.std(valid['range_mm']):.1f} mm, "
+                    f"signal={np.mean(valid['signal_rate_mcps']):.2f} MCPS, "
+                    f"elapsed={elapsed_s:.3f} s"
+                )
+    finally:
+        pi.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,76 @@
 #
 # (c) 2025 Yoichi Tanibayashi
 #
-from importlib.metadata import version
+"""
+VL53L0X distance sensor using pigpio.
 
-from .clickutils import click_common_opts
-from .driver import VL53L0X
-from .my_logger import get_logger
+起動を速くするため、公開しているクラスは最初に使われたときに
+そのモジュールを読み込みます (numpy、asyncio、click なども、
+それを使うクラスを参照するまで読み込みません)。
+"""
 
-if __package__:
-    __version__ = version(__package__)
-else:
-    __version__ = "_._._"
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
+if TYPE_CHECKING:
+    from .aio import AsyncVL53L0X
+    from .clickutils import click_common_opts
+    from .driver import VL53L0X, Measurement
+    from .multi import RangingScheduler, VL53L0XArray
+    from .my_logger import get_logger
+    from .replay import ReplayVL53L0X
+    from .sampler import BackgroundSampler
 
-__all__ = ["__version__", "click_common_opts", "get_logger", "VL53L0X"]
+    __version__: str
+
+# 公開する名前と、それを定義しているモジュール
+_LAZY_ATTRS = {
+    "AsyncVL53L0X": ".aio",
+    "BackgroundSampler": ".sampler",
+    "click_common_opts": ".clickutils",
+    "get_logger": ".my_logger",
+    "Measurement": ".driver",
+    "RangingScheduler": ".multi",
+    "ReplayVL53L0X": ".replay",
+    "VL53L0X": ".driver",
+    "VL53L0XArray": ".multi",
+}
+
+
+def _get_version() -> str:
+    if not __package__:
+        return "_._._"
+    # importlib.metadata の読み込みは遅いので、参照されたときだけ
+    from importlib.metadata import version
+
+    return version(__package__)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        value: Any = _get_version()
+    elif name in _LAZY_ATTRS:
+        module = import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+__all__ = [
+    "__version__",
+    "AsyncVL53L0X",
+    "BackgroundSampler",
+    "click_common_opts",
+    "get_logger",
+    "Measurement",
+    "RangingScheduler",
+    "ReplayVL53L0X",
+    "VL53L0X",
+    "VL53L0XArray",
+]
@@ -1,14 +1,26 @@
 #
 # (c) 2025 Yoichi Tanibayashi
 #
+import json
 import time
 from pathlib import Path
 
 import click
 import pigpio
 
-from . import VL53L0X, __version__, click_common_opts, get_logger
-from .config_manager import get_default_config_filepath, save_config
+from . import VL53L0X, click_common_opts, get_logger
+from .config_manager import (
+    get_default_config_filepath,
+    load_config,
+    save_config,
+)
+from .driver import PROFILES, range_dtype
+from .recorder import (
+    DEFAULT_FSYNC_INTERVAL_S,
+    DEFAULT_MAX_SEGMENT_BYTES,
+    DEFAULT_MAX_SEGMENT_S,
+    SessionWriter,
+)
 
 
 @click.group(
@@ -25,8 +37,27 @@ VL53L0X driver CLI
     show_default=True,
     help="Path to the configuration file",
 )
-@click_common_opts(__version__)
-def cli(ctx: click.Context, debug: bool, config_file: str) -> None:
+@click.option(
+    "--warm-start",
+    "-W",
+    is_flag=True,
+    help="restore SPAD/calibration data saved in the configuration file",
+)
+@click.option(
+    "--profile",
+    "-P",
+    type=click.Choice(list(PROFILES)),
+    default=None,
+    help="measurement profile (default: 'profile' in the configuration file)",
+)
+@click_common_opts(package_name=__package__)
+def cli(
+    ctx: click.Context,
+    debug: bool,
+    config_file: str,
+    warm_start: bool,
+    profile: str | None,
+) -> None:
     """VL53L0X距離センサーのPythonドライバー用CLIツール。"""
     cmd_name = ctx.info_name
     subcmd_name = ctx.invoked_subcommand
@@ -36,7 +67,11 @@ def cli(ctx: click.Context, debug: bool, config_file: str) -> None:
     __log.debug("cmd_name=%a, subcmd_name=%a", cmd_name, subcmd_name)
 
     # Pass config_file to the context object for subcommands
-    ctx.obj = {"config_file": Path(config_file)}
+    ctx.obj = {
+        "config_file": Path(config_file),
+        "warm_start": warm_start,
+        "profile": profile,
+    }
 
     if subcmd_name is None:
         print(f"{ctx.get_help()}")
@@ -57,11 +92,37 @@ get distance"""
     show_default=True,
     help="interval seconds",
 )
-@click_common_opts(__version__)
-def get(ctx: click.Context, count: int, interval: float, debug: bool) -> None:
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="serve Prometheus metrics on this port (/metrics)",
+)
+@click.option(
+    "--metrics-textfile",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="write Prometheus metrics to this file after each measurement",
+)
+@click_common_opts(package_name=__package__)
+def get(
+    ctx: click.Context,
+    count: int,
+    interval: float,
+    metrics_port: int | None,
+    metrics_textfile: str | None,
+    debug: bool,
+) -> None:
     """基本的な例を実行します。"""
     __log = get_logger(__name__, debug)
-    __log.debug("count=%s, interval=%s", count, interval)
+    __log.debug(
+        "count=%s, interval=%s, metrics_port=%s, metrics_textfile=%s",
+        count,
+        interval,
+        metrics_port,
+        metrics_textfile,
+    )
+    use_metrics = metrics_port is not None or metrics_textfile is not None
 
     cmd_name = ctx.command.name
     __log.debug("cmd_name=%a", cmd_name)
@@ -70,23 +131,42 @@ def get(ctx: click.Context, count: int, interval: float, debug: bool) -> None:
     if not pi.connected:
         raise click.ClickException("cannnto connect pigpiod")
 
+    exporter = None
     try:
         with VL53L0X(
-            pi, debug=debug, config_file_path=ctx.obj["config_file"]
+            pi,
+            debug=debug,
+            config_file_path=ctx.obj["config_file"],
+            warm_start=ctx.obj["warm_start"],
+            profile=ctx.obj["profile"],
+            collect_stats=use_metrics,
         ) as sensor:
+            if use_metrics:
+                from .exporter import MetricsExporter
+
+                exporter = MetricsExporter([sensor], debug=debug)
+                if metrics_port is not None:
+                    exporter.serve(metrics_port)
+
+            # 測定間隔はセンサー側(タイムドモード)で刻む
+            sensor.start_continuous(period_ms=round(interval * 1000))
             for i in range(count):
                 try:
                     distance: int = sensor.get_range()
                 except Exception as e:
                     __log.warning("%s: %s", type(e).__name__, e)
                     continue
+                finally:
+                    if exporter is not None and metrics_textfile:
+                        exporter.write_textfile(metrics_textfile)
 
                 if distance > 0:
                     click.echo(f"{i + 1}/{count}: {distance} mm")
                 else:
                     click.echo(f"{i + 1}/{count}: 無効なデータ。")
-                time.sleep(interval)
     finally:
+        if exporter is not None:
+            exporter.shutdown()
         pi.stop()
 
 
@@ -94,7 +174,7 @@ def get(ctx: click.Context, count: int, interval: float, debug: bool) -> None:
 @click.option(
     "--count", "-c", type=int, default=100, show_default=True, help="count"
 )
-@click_common_opts(__version__)
+@click_common_opts(package_name=__package__)
 def performance(ctx: click.Context, count: int, debug: bool) -> None:
     """VL53L0Xセンサーの測定パフォーマンスを評価します。"""
     __log = get_logger(__name__, debug)
@@ -109,7 +189,11 @@ def performance(ctx: click.Context, count: int, debug: bool) -> None:
 
     try:
         with VL53L0X(
-            pi, debug=debug, config_file_path=ctx.obj["config_file"]
+            pi,
+            debug=debug,
+            config_file_path=ctx.obj["config_file"],
+            warm_start=ctx.obj["warm_start"],
+            profile=ctx.obj["profile"],
         ) as sensor:
             click.echo(f"{count}回の距離測定パフォーマンスを評価します...")
             start_time = time.perf_counter()
@@ -134,6 +218,189 @@ def performance(ctx: click.Context, count: int, debug: bool) -> None:
         pi.stop()
 
 
+@cli.command()
+@click.option(
+    "--count",
+    "-c",
+    type=int,
+    default=100,
+    show_default=True,
+    help="get_range() count",
+)
+@click.option(
+    "--batch-size",
+    "-b",
+    type=int,
+    multiple=True,
+    help="get_ranges() batch size (repeatable, default: 1, 10, 100)",
+)
+@click.option(
+    "--output-file",
+    "-o",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="write the JSON result to this file instead of stdout",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="fail if I2C transaction counts exceed this JSON result",
+)
+@click_common_opts(package_name=__package__)
+def bench(
+    ctx: click.Context,
+    count: int,
+    batch_size: tuple[int, ...],
+    output_file: str | None,
+    baseline: str | None,
+    debug: bool,
+) -> None:
+    """シミュレーター上でドライバーのベンチマークを実行します。"""
+    from .bench import DEFAULT_BATCH_SIZES, compare, run_all
+
+    __log = get_logger(__name__, debug)
+    __log.debug(
+        "count=%s, batch_size=%s, output_file=%s, baseline=%s",
+        count,
+        batch_size,
+        output_file,
+        baseline,
+    )
+
+    results = run_all(count, batch_size or DEFAULT_BATCH_SIZES)
+    text = json.dumps(results, indent=2)
+    if output_file:
+        Path(output_file).write_text(text + "\n")
+    else:
+        click.echo(text)
+
+    if baseline:
+        regressions = compare(results, json.loads(Path(baseline).read_text()))
+        if regressions:
+            raise click.ClickException(
+                "I2C transaction regression: " + ", ".join(regressions)
+            )
+
+
+@cli.command()
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--count",
+    "-c",
+    type=int,
+    default=0,
+    show_default=True,
+    help="number of samples (0: until interrupted)",
+)
+@click.option(
+    "--period-ms",
+    "-p",
+    type=int,
+    default=0,
+    show_default=True,
+    help="inter-measurement period [ms] (0: back-to-back)",
+)
+@click.option(
+    "--batch-size",
+    "-b",
+    type=int,
+    default=64,
+    show_default=True,
+    help="samples written per append",
+)
+@click.option(
+    "--max-segment-mb",
+    type=float,
+    default=DEFAULT_MAX_SEGMENT_BYTES / 1024 / 1024,
+    show_default=True,
+    help="rotate segments at this size [MiB]",
+)
+@click.option(
+    "--max-segment-s",
+    type=float,
+    default=DEFAULT_MAX_SEGMENT_S,
+    show_default=True,
+    help="rotate segments after this many seconds",
+)
+@click.option(
+    "--fsync-interval",
+    type=float,
+    default=DEFAULT_FSYNC_INTERVAL_S,
+    show_default=True,
+    help="fsync interval seconds",
+)
+@click_common_opts(package_name=__package__)
+def record(
+    ctx: click.Context,
+    output_dir: str,
+    count: int,
+    period_ms: int,
+    batch_size: int,
+    max_segment_mb: float,
+    max_segment_s: float,
+    fsync_interval: float,
+    debug: bool,
+) -> None:
+    """測定結果をバイナリファイルに記録します。"""
+    import numpy as np
+
+    __log = get_logger(__name__, debug)
+    __log.debug(
+        "output_dir=%s, count=%s, period_ms=%s, batch_size=%s",
+        output_dir,
+        count,
+        period_ms,
+        batch_size,
+    )
+    if batch_size <= 0:
+        raise click.BadParameter("must be > 0", param_hint="--batch-size")
+
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise click.ClickException("cannot connect to pigpiod")
+
+    try:
+        with (
+            VL53L0X(
+                pi,
+                debug=debug,
+                config_file_path=ctx.obj["config_file"],
+                warm_start=ctx.obj["warm_start"],
+                profile=ctx.obj["profile"],
+            ) as sensor,
+            SessionWriter(
+                output_dir,
+                max_segment_bytes=round(max_segment_mb * 1024 * 1024),
+                max_segment_s=max_segment_s,
+                fsync_interval_s=fsync_interval,
+                metadata={
+                    "i2c_address": sensor.i2c_address,
+                    "offset_mm": sensor.offset_mm,
+                    "profile": sensor.profile,
+                    "period_ms": period_ms,
+                },
+                debug=debug,
+            ) as writer,
+        ):
+            click.echo(f"recording to {output_dir} (Ctrl-C to stop)")
+            out = np.empty(batch_size, dtype=range_dtype())
+            sensor.start_continuous(period_ms)
+            try:
+                while count <= 0 or writer.records < count:
+                    n = batch_size
+                    if count > 0:
+                        n = min(n, count - writer.records)
+                    writer.write(sensor.get_ranges(n, out=out))
+            except KeyboardInterrupt:
+                pass
+            finally:
+                sensor.stop_continuous()
+            click.echo(f"{writer.records} samples recorded")
+    finally:
+        pi.stop()
+
+
 @cli.command(help="""calibrate offset and save""")
 @click.option(
     "--distance",
@@ -154,7 +421,7 @@ def performance(ctx: click.Context, count: int, debug: bool) -> None:
     show_default=True,
     help="Path to save the calculated offset",
 )
-@click_common_opts(__version__)
+@click_common_opts(package_name=__package__)
 def calib(
     ctx: click.Context,
     distance: int,
@@ -176,7 +443,11 @@ def calib(
 
     try:
         with VL53L0X(
-            pi, debug=debug, config_file_path=ctx.obj["config_file"]
+            pi,
+            debug=debug,
+            config_file_path=ctx.obj["config_file"],
+            warm_start=ctx.obj["warm_start"],
+            profile=ctx.obj["profile"],
         ) as sensor:
             click.echo(f"{distance}mmの距離にターゲットを置いてください。")
             click.echo("準備ができたらEnterキーを押してください...")
@@ -187,8 +458,9 @@ def calib(
             click.echo(f"測定結果から計算されたオフセット値: {offset} mm")
             click.echo("この値を set_offset() に設定して使用してください。")
 
-            # オフセット値をファイルに保存
-            config_data = {"offset_mm": offset}
+            # オフセット値をファイルに保存 (他の設定は残す)
+            config_data = load_config(output_file_path)
+            config_data["offset_mm"] = offset
             save_config(output_file_path, config_data)
             click.echo(f"オフセット値を {output_file_path} に保存しました。")
 
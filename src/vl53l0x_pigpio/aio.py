@@ -0,0 +1,147 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""VL53L0X の asyncio 用インターフェース。"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pigpio
+
+from .driver import VL53L0X
+from .stats import TIMEOUT_MEASUREMENT
+
+
+class AsyncVL53L0X:
+    """
+    `VL53L0X` を asyncio から使うためのラッパー。
+
+    測定完了を待つ間はイベントループに制御を返します。
+    `gpio_pin` が指定されたセンサーでは GPIO1 のエッジで待機を解除し、
+    そうでない場合は `poll_interval` 間隔で割り込みステータスを確認します。
+    (各レジスタアクセス自体は短いブロッキング呼び出しです。)
+    """
+
+    def __init__(self, sensor: VL53L0X):
+        """
+        Args:
+            sensor (VL53L0X): 初期化済みのセンサー
+        """
+        self.sensor = sensor
+        self._event: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._gpio_callback = None
+
+    @classmethod
+    async def create(cls, *args: Any, **kwargs: Any) -> "AsyncVL53L0X":
+        """
+        `VL53L0X` の初期化をスレッドで行い、インスタンスを作成します。
+
+        引数は `VL53L0X()` と同じです。
+        """
+        loop = asyncio.get_running_loop()
+        sensor = await loop.run_in_executor(
+            None, lambda: VL53L0X(*args, **kwargs)
+        )
+        return cls(sensor)
+
+    async def __aenter__(self) -> "AsyncVL53L0X":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type | None,
+        exc_val: Exception | None,
+        exc_tb: type | None,
+    ) -> None:
+        await self.close()
+
+    def _setup_gpio_event(self) -> asyncio.Event:
+        """
+        GPIO1 のエッジを asyncio.Event に通知するコールバックを登録します。
+        """
+        loop = asyncio.get_running_loop()
+        if self._event is None or self._loop is not loop:
+            if self._gpio_callback is not None:
+                self._gpio_callback.cancel()
+            self._loop = loop
+            self._event = asyncio.Event()
+            event = self._event
+            assert self.sensor.pi is not None
+            self._gpio_callback = self.sensor.pi.callback(
+                self.sensor.gpio_pin,
+                pigpio.FALLING_EDGE,
+                lambda gpio, level, tick: loop.call_soon_threadsafe(
+                    event.set
+                ),
+            )
+        return self._event
+
+    async def _wait_data_ready(self) -> None:
+        """
+        イベントループを止めずにデータ準備完了を待ちます。
+        """
+        sensor = self.sensor
+        try:
+            async with asyncio.timeout(sensor._measurement_timeout_s()):
+                if sensor.gpio_pin is not None:
+                    event = self._setup_gpio_event()
+                    while not sensor.is_data_ready():
+                        await event.wait()
+                        event.clear()
+                    return
+
+                while not sensor.is_data_ready():
+                    await asyncio.sleep(sensor.poll_interval)
+        except TimeoutError:
+            sensor._record_timeout(TIMEOUT_MEASUREMENT)
+            raise Exception("Timeout waiting for measurement ready") from None
+
+    async def get_range(self) -> int:
+        """
+        単一の測距測定を実行し、結果をmm単位で返します。
+
+        連続測距中の場合は、次の測定結果を待って返します。
+        """
+        if not self.sensor.continuous:
+            self.sensor.start_ranging()
+        await self._wait_data_ready()
+        return self.sensor.read_range()
+
+    async def stream(
+        self, count: int | None = None, period_ms: int = 0
+    ) -> AsyncIterator[int]:
+        """
+        連続測距の結果を順に返す非同期ジェネレーター。
+
+        連続測距中でなければ開始し、終了時に停止します。
+
+        Args:
+            count (int | None): 測定回数。None の場合は無限に続けます。
+            period_ms (int): 測定間隔 (ms)。0 で back-to-back モード。
+
+        Yields:
+            int: オフセット適用後の距離 (mm)
+        """
+        started_here = not self.sensor.continuous
+        if started_here:
+            self.sensor.start_continuous(period_ms)
+        try:
+            i = 0
+            while count is None or i < count:
+                await self._wait_data_ready()
+                yield self.sensor.read_range()
+                i += 1
+        finally:
+            if started_here:
+                self.sensor.stop_continuous()
+
+    async def close(self) -> None:
+        """
+        コールバックを解除し、センサーを閉じます。
+        """
+        if self._gpio_callback is not None:
+            self._gpio_callback.cancel()
+            self._gpio_callback = None
+        self.sensor.close()
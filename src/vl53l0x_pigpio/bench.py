@@ -0,0 +1,267 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+シミュレーター上でドライバーのホットパスを計測するベンチマーク。
+
+I2C トランザクション数はハードウェアに依存しないので、
+`compare()` で基準値と比べると、往復回数の増加を CI で検出できます。
+
+```python
+from vl53l0x_pigpio.bench import run_all
+
+results = run_all()
+print(results["get_range"]["transactions_per_call"])
+```
+"""
+
+import time
+import timeit
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+from .driver import RANGE_DTYPE, VL53L0X
+from .sim import SimulatedPi, SimulatedVL53L0X
+from .transport import MemoryTransport
+
+DEFAULT_BATCH_SIZES = (1, 10, 100)
+POLLING_BUDGET_US = 20000
+TIMEOUT_HELPER_LOOPS = 10000
+SIM_GPIO_PIN = 17
+
+# compare() で比べる、ハードウェアに依存しない値 ("ベンチマーク.キー")
+TRANSACTION_KEYS = (
+    "get_range.transactions_per_call",
+    "initialize.transactions",
+    "get_ranges.transactions_per_sample",
+)
+
+
+def _make_pi(
+    time_scale: float = 0.0, gpio_pin: int | None = None
+) -> SimulatedPi:
+    sensor = SimulatedVL53L0X(
+        distance=500, time_scale=time_scale, gpio_pin=gpio_pin, seed=0
+    )
+    return SimulatedPi([sensor])
+
+
+def bench_get_range(count: int = 100) -> dict[str, Any]:
+    """
+    `get_range()` 1回あたりの I2C トランザクション数と処理時間。
+    (待ち時間なしのシミュレーターなので、ドライバー自身のオーバーヘッド)
+    """
+    pi = _make_pi()
+    with VL53L0X(pi) as sensor:
+        pi.reset_stats()
+        start = time.perf_counter()
+        for _ in range(count):
+            sensor.get_range()
+        elapsed_s = time.perf_counter() - start
+        stats = dict(pi.stats)
+
+    transactions = stats.pop("transactions", 0)
+    return {
+        "count": count,
+        "transactions_per_call": transactions / count,
+        "ops_per_call": {op: n / count for op, n in sorted(stats.items())},
+        "us_per_call": elapsed_s / count * 1_000_000,
+    }
+
+
+def bench_initialize(count: int = 5) -> dict[str, Any]:
+    """
+    `initialize()` の I2C トランザクション数と処理時間。
+    """
+    pi = _make_pi()
+    with VL53L0X(pi) as sensor:
+        elapsed_s = 0.0
+        for _ in range(count):
+            pi.reset_stats()
+            start = time.perf_counter()
+            sensor.initialize()
+            elapsed_s += time.perf_counter() - start
+        stats = dict(pi.stats)
+
+    transactions = stats.pop("transactions", 0)
+    return {
+        "count": count,
+        "transactions": transactions,
+        "ops": dict(sorted(stats.items())),
+        "ms_per_call": elapsed_s / count * 1000,
+    }
+
+
+def bench_get_ranges(
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    repeat: int = 3,
+) -> dict[str, Any]:
+    """
+    バッチサイズごとの `get_ranges()` のスループット (samples/s)。
+    """
+    pi = _make_pi()
+    throughput: dict[str, float] = {}
+    transactions_per_sample = 0.0
+    with VL53L0X(pi) as sensor:
+        out = np.empty(max(batch_sizes), dtype=RANGE_DTYPE)
+        for size in batch_sizes:
+            pi.reset_stats()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                sensor.get_ranges(size, out=out)
+            elapsed_s = time.perf_counter() - start
+            throughput[str(size)] = size * repeat / elapsed_s
+            transactions_per_sample = pi.transactions / (size * repeat)
+
+    return {
+        "repeat": repeat,
+        "samples_per_s": throughput,
+        "transactions_per_sample": transactions_per_sample,
+    }
+
+
+def _polling_cpu(
+    sensor: VL53L0X, pi: SimulatedPi, count: int
+) -> dict[str, float]:
+    pi.reset_stats()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(count):
+        sensor.get_range()
+    wall_s = time.perf_counter() - wall_start
+    cpu_s = time.process_time() - cpu_start
+    return {
+        "cpu_ms_per_call": cpu_s / count * 1000,
+        "wall_ms_per_call": wall_s / count * 1000,
+        "cpu_ratio": cpu_s / wall_s if wall_s > 0 else 0.0,
+        "transactions_per_call": pi.transactions / count,
+    }
+
+
+def bench_polling(
+    count: int = 5, budget_us: int = POLLING_BUDGET_US
+) -> dict[str, Any]:
+    """
+    実時間で測定を待つ間の CPU 時間。
+    RESULT_INTERRUPT_STATUS のポーリングと GPIO1 の割り込み待ちを比べます。
+    """
+    results: dict[str, Any] = {"count": count, "budget_us": budget_us}
+
+    pi = _make_pi(time_scale=1.0)
+    with VL53L0X(pi) as sensor:
+        sensor.set_measurement_timing_budget(budget_us)
+        results["poll"] = _polling_cpu(sensor, pi, count)
+    pi.stop()
+
+    pi = _make_pi(time_scale=1.0, gpio_pin=SIM_GPIO_PIN)
+    with VL53L0X(pi, gpio_pin=SIM_GPIO_PIN) as sensor:
+        sensor.set_measurement_timing_budget(budget_us)
+        results["gpio"] = _polling_cpu(sensor, pi, count)
+    pi.stop()
+
+    return results
+
+
+def bench_timeout_helpers(
+    loops: int = TIMEOUT_HELPER_LOOPS,
+) -> dict[str, float]:
+    """
+    タイムアウトのエンコード/デコード関数 1回あたりの時間 (ns)。
+    """
+    pi = _make_pi()
+    with VL53L0X(pi) as sensor:
+        encoded = sensor._encode_timeout(1234)
+        helpers: dict[str, Callable[[], Any]] = {
+            "encode_timeout": lambda: sensor._encode_timeout(1234),
+            "decode_timeout": lambda: sensor._decode_timeout(encoded),
+            "timeout_us_to_mclks": lambda: (
+                sensor._timeout_microseconds_to_mclks(30000, 14)
+            ),
+            "timeout_mclks_to_us": lambda: (
+                sensor._timeout_mclks_to_microseconds(1234, 14)
+            ),
+        }
+        return {
+            name: timeit.timeit(func, number=loops) / loops * 1e9
+            for name, func in helpers.items()
+        }
+
+
+def bench_transports(count: int = 100) -> dict[str, float]:
+    """
+    `get_range()` 1回あたりの時間 (us) をトランスポートごとに比べます。
+    `pigpio` はシミュレーターを pigpio の代わりに使った場合、
+    `memory` は `MemoryTransport` でデバイスに直接アクセスした場合。
+    """
+    results: dict[str, float] = {}
+    sensors = {
+        "pigpio": lambda: VL53L0X(_make_pi()),
+        "memory": lambda: VL53L0X(
+            None,
+            transport=MemoryTransport(
+                SimulatedVL53L0X(distance=500, time_scale=0, seed=0)
+            ),
+        ),
+    }
+    for name, make_sensor in sensors.items():
+        with make_sensor() as sensor:
+            start = time.perf_counter()
+            for _ in range(count):
+                sensor.get_range()
+            elapsed_s = time.perf_counter() - start
+        results[name] = elapsed_s / count * 1_000_000
+    return results
+
+
+def run_all(
+    count: int = 100,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    polling_count: int = 5,
+) -> dict[str, Any]:
+    """
+    すべてのベンチマークを実行します。
+
+    Returns:
+        dict[str, Any]: ベンチマーク名ごとの結果 (JSON に変換できる)
+    """
+    return {
+        "get_range": bench_get_range(count),
+        "initialize": bench_initialize(),
+        "get_ranges": bench_get_ranges(batch_sizes),
+        "polling": bench_polling(polling_count),
+        "timeout_helpers": bench_timeout_helpers(),
+        "transports": bench_transports(count),
+    }
+
+
+def _lookup(results: dict[str, Any], key: str) -> float | None:
+    value: Any = results
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return float(value)
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    keys: Sequence[str] = TRANSACTION_KEYS,
+) -> list[str]:
+    """
+    I2C トランザクション数が基準値より増えた項目を返します。
+
+    Returns:
+        list[str]: 増えた項目の説明。空なら回帰なし。
+    """
+    regressions = []
+    for key in keys:
+        current = _lookup(results, key)
+        expected = _lookup(baseline, key)
+        if current is None or expected is None:
+            continue
+        if current > expected:
+            regressions.append(f"{key}: {expected:g} -> {current:g}")
+    return regressions
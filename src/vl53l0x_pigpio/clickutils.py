@@ -9,14 +9,24 @@ def click_common_opts(
     use_h: bool = True,
     use_d: bool = True,
     use_v: bool = False,
+    package_name: str | None = None,
 ):
-    """共通オプションをまとめたメタデコレータ"""
+    """
+    共通オプションをまとめたメタデコレータ
+
+    `ver_str` を省略して `package_name` を指定すると、バージョンは
+    `--version` が指定されたときにパッケージのメタデータから調べます
+    (起動時に importlib.metadata を読み込まない)。
+    """
 
     def _decorator(func):
         decorators = []
 
+        v_str: str | None
         if len(ver_str) > 0:
             v_str = ver_str
+        elif package_name is not None:
+            v_str = None
         else:
             v_str = "_._._"
 
@@ -26,7 +36,10 @@ def click_common_opts(
             ver_opts.append("-v")
         decorators.append(
             click.version_option(
-                v_str, *ver_opts, message="%(prog)s %(version)s"
+                v_str,
+                *ver_opts,
+                package_name=package_name,
+                message="%(prog)s %(version)s",
             )
         )
 
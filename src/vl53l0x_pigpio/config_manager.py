@@ -1,4 +1,6 @@
 import json
+import os
+import tempfile
 from pathlib import Path
 from typing import Any, cast
 
@@ -27,7 +29,20 @@ def load_config(filepath: Path) -> dict[str, Any]:
 def save_config(filepath: Path, config: dict[str, Any]) -> None:
     """
     指定されたパスに設定ファイルを保存します。
+
+    同じディレクトリの一時ファイルに書いてから置き換えるので、
+    書き込みが中断しても、壊れた (途中までの) ファイルは残りません。
     """
     filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=4)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
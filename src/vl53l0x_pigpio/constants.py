@@ -157,9 +157,12 @@ REG_7B = 0x7B
 REG_80 = 0x80
 REG_81 = 0x81
 REG_8E = 0x8E
+REG_90 = 0x90
 REG_91 = 0x91
 REG_92 = 0x92
 REG_94 = 0x94
+REG_CB = 0xCB
+REG_EE = 0xEE
 REG_FF = 0xFF
 
 # その他の定数
@@ -170,7 +173,16 @@ CALIBRATION_VALUE_40 = 0x40
 TIMEOUT_LIMIT = 1  # タイムアウト時間 (秒)
 SPAD_COUNT_MASK = 0x7F
 SPAD_APERTURE_BIT = 0x80
+PHASE_CAL_READ_MASK = 0xEF  # ST API の読み出しと同じ (ビット4を除く)
+PHASE_CAL_WRITE_MASK = 0x7F  # ビット7はレジスタの値を残す
+NVM_PART_UID_UPPER = 0x7B  # NVM のパーツUID (上位32ビット)
+NVM_PART_UID_LOWER = 0x7C  # NVM のパーツUID (下位32ビット)
 INTERRUPT_STATUS_MASK = 0x07
 SPAD_START_INDEX_APERTURE = 12
 SPAD_TOTAL_COUNT = 48
 SPAD_MAP_BITS_PER_BYTE = 8
+
+# SYSRANGE_START の測距モード
+SYSRANGE_MODE_SINGLESHOT = 0x01
+SYSRANGE_MODE_BACKTOBACK = 0x02
+SYSRANGE_MODE_TIMED = 0x04
@@ -3,14 +3,40 @@
 #
 """Python driver for the VL53L0X distance sensor."""
 
+import threading
 import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar, cast
 
-import numpy as np
 import pigpio
 
-from .config_manager import load_config
+if TYPE_CHECKING:
+    import numpy as np
+
+from .config_manager import load_config, save_config
 from .my_logger import get_logger
+from .regseq import (
+    DEFAULT_TUNING_SETTINGS,
+    DYNAMIC_SPAD_CONFIG,
+    NVM_READ_OPEN,
+    REG_ACCESS_CLOSE,
+    REG_ACCESS_OPEN,
+    SPAD_INFO_CLOSE,
+    SPAD_INFO_OPEN,
+    SPAD_INFO_START,
+    START_SINGLESHOT,
+    STOP_CONTINUOUS,
+    STOP_VARIABLE_RESTORE,
+    Step,
+    compile_sequence,
+)
+from .stats import TIMEOUT_MEASUREMENT, TIMEOUT_REF_CALIBRATION, BusStats
+from .transport import I2CTransport, PigpioTransport
+
+T = TypeVar("T")
 
 # レジスタアドレス
 SYSRANGE_START = 0x00
@@ -27,6 +53,7 @@ CROSSTALK_COMPENSATION_PEAK_RATE_MCPS = 0x20
 PRE_RANGE_CONFIG_MIN_SNR = 0x27
 ALGO_PART_TO_PART_RANGE_OFFSET = 0x28
 ALGO_PHASECAL_LIM = 0x30
+ALGO_PHASECAL_CFG_TIMEOUT = 0x30
 GLOBAL_CONFIG_VCSEL_WIDTH = 0x32
 HISTOGRAM_CONFIG_INITIAL_PHASE_SELECT = 0x33
 FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT = 0x44
@@ -165,9 +192,12 @@ REG_7B = 0x7B
 REG_80 = 0x80
 REG_81 = 0x81
 REG_8E = 0x8E
+REG_90 = 0x90
 REG_91 = 0x91
 REG_92 = 0x92
 REG_94 = 0x94
+REG_CB = 0xCB
+REG_EE = 0xEE
 REG_FF = 0xFF
 
 # その他の定数
@@ -178,11 +208,219 @@ CALIBRATION_VALUE_40 = 0x40
 TIMEOUT_LIMIT = 1  # タイムアウト時間 (秒)
 SPAD_COUNT_MASK = 0x7F
 SPAD_APERTURE_BIT = 0x80
+PHASE_CAL_READ_MASK = 0xEF  # ST API の読み出しと同じ (ビット4を除く)
+PHASE_CAL_WRITE_MASK = 0x7F  # ビット7はレジスタの値を残す
+NVM_PART_UID_UPPER = 0x7B  # NVM のパーツUID (上位32ビット)
+NVM_PART_UID_LOWER = 0x7C  # NVM のパーツUID (下位32ビット)
 INTERRUPT_STATUS_MASK = 0x07
 SPAD_START_INDEX_APERTURE = 12
 SPAD_TOTAL_COUNT = 48
 SPAD_MAP_BITS_PER_BYTE = 8
 
+# 割り込みモード (SYSTEM_INTERRUPT_CONFIG_GPIO)
+INTERRUPT_DISABLED = 0x00
+INTERRUPT_LEVEL_LOW = 0x01  # 距離 < low
+INTERRUPT_LEVEL_HIGH = 0x02  # 距離 > high
+INTERRUPT_OUT_OF_WINDOW = 0x03  # 距離 < low または 距離 > high
+INTERRUPT_NEW_SAMPLE_READY = GPIO_INTERRUPT_CONFIG
+INTERRUPT_MODES = {
+    "below": INTERRUPT_LEVEL_LOW,
+    "above": INTERRUPT_LEVEL_HIGH,
+    "outside": INTERRUPT_OUT_OF_WINDOW,
+}
+# しきい値レジスタ (SYSTEM_THRESH_HIGH/LOW) は 12ビット、2mm 単位
+# (ST API の VL53L0X_SetInterruptThresholds() と同じ)
+THRESHOLD_MASK = 0x0FFF
+THRESHOLD_UNIT_MM = 2
+
+# シャドウキャッシュの対象とする設定レジスタ (ページ0)
+# センサー自身が書き換えることのない、ホストが設定するレジスタだけを対象にする
+CACHEABLE_REGISTERS = frozenset(
+    {
+        SYSTEM_SEQUENCE_CONFIG,
+        SYSTEM_INTERRUPT_CONFIG_GPIO,
+        SYSTEM_THRESH_HIGH,
+        SYSTEM_THRESH_HIGH + 1,
+        SYSTEM_THRESH_LOW,
+        SYSTEM_THRESH_LOW + 1,
+        ALGO_PHASECAL_LIM,
+        GLOBAL_CONFIG_VCSEL_WIDTH,
+        FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT,
+        FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT + 1,
+        MSRC_CONFIG_TIMEOUT_MACROP,
+        FINAL_RANGE_CONFIG_VALID_PHASE_LOW,
+        FINAL_RANGE_CONFIG_VALID_PHASE_HIGH,
+        PRE_RANGE_CONFIG_VCSEL_PERIOD,
+        PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+        PRE_RANGE_CONFIG_TIMEOUT_MACROP_LO,
+        PRE_RANGE_CONFIG_VALID_PHASE_LOW,
+        PRE_RANGE_CONFIG_VALID_PHASE_HIGH,
+        MSRC_CONFIG_CONTROL,
+        FINAL_RANGE_CONFIG_VCSEL_PERIOD,
+        FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+        FINAL_RANGE_CONFIG_TIMEOUT_MACROP_LO,
+        GPIO_HV_MUX_ACTIVE_HIGH,
+        VHV_CFG_PAD_SCL_SDA_EXTSUP_HV,
+    }
+)
+
+# 設定ファイル内のウォームスタートデータのキー
+WARM_START_CONFIG_KEY = "warm_start"
+
+# 設定ファイルの読み込み・更新を排他する
+# (`VL53L0XArray` は複数のセンサーを別スレッドで同時に初期化する)
+_CONFIG_LOCK = threading.Lock()
+
+# SYSRANGE_START の測距モード
+SYSRANGE_MODE_SINGLESHOT = 0x01
+SYSRANGE_MODE_BACKTOBACK = 0x02
+SYSRANGE_MODE_TIMED = 0x04
+
+# SYSTEM_SEQUENCE_CONFIG のシーケンスステップ
+SEQUENCE_STEP_TCC = 0x10  # Target Centre Check
+SEQUENCE_STEP_DSS = 0x08  # Dynamic SPAD Selection
+SEQUENCE_STEP_MSRC = 0x04  # Minimum Signal Rate Check
+SEQUENCE_STEP_PRE_RANGE = 0x40
+SEQUENCE_STEP_FINAL_RANGE = 0x80
+SEQUENCE_STEPS = {
+    "tcc": SEQUENCE_STEP_TCC,
+    "dss": SEQUENCE_STEP_DSS,
+    "msrc": SEQUENCE_STEP_MSRC,
+    "pre_range": SEQUENCE_STEP_PRE_RANGE,
+    "final_range": SEQUENCE_STEP_FINAL_RANGE,
+}
+SEQUENCE_STEPS_ALL = (
+    SEQUENCE_STEP_TCC
+    | SEQUENCE_STEP_DSS
+    | SEQUENCE_STEP_MSRC
+    | SEQUENCE_STEP_PRE_RANGE
+    | SEQUENCE_STEP_FINAL_RANGE
+)
+# MSRC_CONFIG_TIMEOUT_MACROP のタイムアウトを使うステップ
+SEQUENCE_STEPS_MSRC_TIMEOUT = (
+    SEQUENCE_STEP_TCC | SEQUENCE_STEP_DSS | SEQUENCE_STEP_MSRC
+)
+# 初期化後のシーケンス設定 (DSS, pre-range, final-range が有効)
+SEQUENCE_CONFIG_DEFAULT = VALUE_E8
+
+# タイミングバジェットの各ステップのオーバーヘッド (us)
+GET_START_OVERHEAD_US = 1910
+SET_START_OVERHEAD_US = 1320
+END_OVERHEAD_US = 960
+TCC_OVERHEAD_US = 590
+DSS_OVERHEAD_US = 690
+MSRC_OVERHEAD_US = 660
+PRE_RANGE_OVERHEAD_US = 660
+FINAL_RANGE_OVERHEAD_US = 550
+
+# VCSEL パルス周期の種類
+VCSEL_PERIOD_PRE_RANGE = "pre_range"
+VCSEL_PERIOD_FINAL_RANGE = "final_range"
+
+# VCSEL パルス周期 (PCLK) ごとの位相チェック設定
+# pre-range: {周期: PRE_RANGE_CONFIG_VALID_PHASE_HIGH}
+PRE_RANGE_VCSEL_PHASE = {12: 0x18, 14: 0x30, 16: 0x40, 18: 0x50}
+# final-range: {周期: (VALID_PHASE_HIGH, VCSEL_WIDTH, PHASECAL_CFG_TIMEOUT,
+#                      PHASECAL_LIM)}
+FINAL_RANGE_VCSEL_PHASE = {
+    8: (0x10, 0x02, 0x0C, 0x30),
+    10: (0x28, 0x03, 0x09, 0x20),
+    12: (0x38, 0x03, 0x08, 0x20),
+    14: (0x48, 0x03, 0x07, 0x20),
+}
+VCSEL_VALID_PHASE_LOW = 0x08
+
+# 信号レート制限 (MCPS, 9.7 固定小数点)
+SIGNAL_RATE_LIMIT_DEFAULT = 0.25
+SIGNAL_RATE_LIMIT_MAX = 511.99
+
+# 測定プロファイル
+# signal_rate_limit (MCPS), VCSEL パルス周期 (PCLK), タイミングバジェット (us)
+PROFILES: dict[str, dict[str, Any]] = {
+    "default": {
+        "signal_rate_limit": 0.25,
+        "pre_range_vcsel_period": 14,
+        "final_range_vcsel_period": 10,
+        "timing_budget_us": 33000,
+    },
+    "high_speed": {
+        "signal_rate_limit": 0.25,
+        "pre_range_vcsel_period": 14,
+        "final_range_vcsel_period": 10,
+        "timing_budget_us": 20000,
+    },
+    "high_accuracy": {
+        "signal_rate_limit": 0.25,
+        "pre_range_vcsel_period": 14,
+        "final_range_vcsel_period": 10,
+        "timing_budget_us": 200000,
+    },
+    "long_range": {
+        "signal_rate_limit": 0.1,
+        "pre_range_vcsel_period": 18,
+        "final_range_vcsel_period": 14,
+        "timing_budget_us": 33000,
+    },
+}
+PROFILE_CONFIG_KEY = "profile"
+
+# 結果ブロック
+RESULT_BLOCK_SIZE = 12
+RANGE_STATUS_MASK = 0x78
+RANGE_STATUS_SHIFT = 3
+RANGE_STATUS_VALID = 11  # Range Complete
+
+
+@cache
+def range_dtype() -> "np.dtype":
+    """
+    `get_ranges()` の結果の dtype (`RANGE_DTYPE`)。
+
+    numpy は配列を使う API だけが必要とするので、最初に使われたときに
+    読み込みます。
+    """
+    import numpy as np
+
+    return np.dtype(
+        [
+            ("range_mm", np.int32),  # オフセット適用後の距離 (mm)
+            ("timestamp_ns", np.int64),  # time.monotonic_ns()
+            ("range_status", np.uint8),  # デバイスのレンジステータス
+            ("signal_rate_mcps", np.float32),  # 信号レート (MCPS)
+        ]
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # RANGE_DTYPE は参照されたときに作る (numpy の読み込みを遅らせる)
+    if name == "RANGE_DTYPE":
+        return range_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# バッチ (i2c_zip など) にまとめる書き込み
+ZIP_MAX_SEGMENTS = 32  # 1回の i2c_zip にまとめる書き込み数の上限
+ZIP_MAX_WRITE_LEN = 32  # 連続レジスタをまとめる最大バイト数
+
+
+class Measurement(NamedTuple):
+    """
+    結果ブロック (RESULT_RANGE_STATUS から12バイト) を解釈した測距結果。
+    """
+
+    range_mm: int  # オフセット適用後の距離 (mm)
+    range_status: int  # デバイスのレンジステータス (11: 正常)
+    signal_rate_mcps: float  # 信号レート (MCPS)
+    ambient_rate_mcps: float  # 環境光レート (MCPS)
+    effective_spad_count: float  # 有効SPAD数
+
+    @property
+    def valid(self) -> bool:
+        """
+        距離が有効かどうか。
+        """
+        return self.range_status == RANGE_STATUS_VALID
+
 
 class VL53L0X:
     """
@@ -191,15 +429,46 @@ class VL53L0X:
 
     def __init__(
         self,
-        pi: pigpio.pi,
+        pi: pigpio.pi | None,
         i2c_bus: int = 1,
         i2c_address: int = 0x29,
         debug: bool = False,
         config_file_path: Path | None = None,
+        gpio_pin: int | None = None,
+        poll_interval: float = 0.001,
+        warm_start: bool = False,
+        cache_registers: bool = False,
+        profile: str | None = None,
+        collect_stats: bool = False,
+        transport: I2CTransport | None = None,
     ):
         """
         Initialize the VL53L0X sensor.
+
+        Args:
+            gpio_pin (int | None): センサーの GPIO1 (データ準備完了、
+                アクティブロー) を接続した GPIO 番号。
+                None の場合は RESULT_INTERRUPT_STATUS をポーリングします。
+            poll_interval (float): ポーリング間隔 (秒)。
+            warm_start (bool): True の場合、SPAD情報とキャリブレーション結果を
+                `config_file_path` に保存し、次回以降はそれを復元して
+                初期化を短縮します。
+            cache_registers (bool): True の場合、読み書きした設定レジスタの値を
+                シャドウキャッシュに保持し、以降の読み出しを省略します。
+            profile (str | None): 初期化後に適用する測定プロファイル
+                (`PROFILES` のキー)。None の場合は設定ファイルの
+                "profile" を使い、それもなければ変更しません。
+            collect_stats (bool): True の場合、I2C アクセスの回数・時間を
+                集計します (`stats()`)。初期化のアクセスも含みます。
+            transport (I2CTransport | None): レジスタアクセスに使う
+                トランスポート (`vl53l0x_pigpio.transport`)。None の場合は
+                `pi` 経由 (`PigpioTransport`)。指定した場合、`gpio_pin` を
+                使わなければ `pi` は None でかまいません。
         """
+        if pi is None and (transport is None or gpio_pin is not None):
+            raise ValueError(
+                "pi is required for pigpio transport or gpio_pin"
+            )
         self.pi = pi
         self.i2c_bus = i2c_bus
         self.i2c_address = i2c_address
@@ -209,9 +478,53 @@ class VL53L0X:
             self.i2c_bus,
             hex(self.i2c_address),
         )
-        self.handle = self.pi.i2c_open(self.i2c_bus, self.i2c_address)
-        self.__log.debug("handle=%s", self.handle)
+        if transport is None:
+            assert pi is not None
+            transport = PigpioTransport(pi, self.i2c_bus, self.i2c_address)
+        self.transport = transport
+        self.__log.debug("transport=%s", type(self.transport).__name__)
+        # I2C アクセスの統計 (無効時は None で、計測しない)
+        self._bus_stats: BusStats | None = (
+            BusStats() if collect_stats else None
+        )
+        # 測定の開始時刻 (統計のレイテンシ用、perf_counter_ns)
+        self._measurement_start_ns = 0
         self.offset_mm = 0
+        self.continuous = False
+        self.inter_measurement_period_ms = 0
+        # 割り込みモード (set_interrupt_thresholds() で変更)
+        self.interrupt_mode = INTERRUPT_NEW_SAMPLE_READY
+        self.poll_interval = poll_interval
+        self.config_file_path = config_file_path
+        self.warm_start = warm_start
+        # NVM のパーツUID (ウォームスタートの照合で読み取る)
+        self.part_uid: int | None = None
+        # 初期化・キャリブレーション後に設定するシーケンスステップ
+        self.sequence_config = SEQUENCE_CONFIG_DEFAULT
+
+        # バッチ処理 (batch() 内の書き込みを i2c_zip にまとめる)
+        self._batch_depth = 0
+        self._pending_writes: list[list[int]] = []
+        self.batch_stats = {"ops": 0, "transactions": 0}
+
+        # 設定レジスタのシャドウキャッシュ (cache_registers=True の場合)
+        self._shadow: dict[int, int] | None = {} if cache_registers else None
+        # 通常のレジスタにアクセスできる状態 (REG_FF=0, REG_80=0) のときだけ
+        # キャッシュを使う (None は不明)
+        self._page: int | None = 0
+        self._power_force: int | None = 0
+
+        # GPIO1 の立ち下がりエッジでデータ準備完了を通知する
+        self.gpio_pin = gpio_pin
+        self._data_ready_event = threading.Event()
+        self._gpio_callback = None
+        if self.gpio_pin is not None:
+            assert self.pi is not None
+            self.pi.set_mode(self.gpio_pin, pigpio.INPUT)
+            self.pi.set_pull_up_down(self.gpio_pin, pigpio.PUD_UP)
+            self._gpio_callback = self.pi.callback(
+                self.gpio_pin, pigpio.FALLING_EDGE, self._on_data_ready
+            )
 
         # Load offset from config file if provided
         if config_file_path:
@@ -223,9 +536,29 @@ class VL53L0X:
                     self.offset_mm,
                     config_file_path,
                 )
+            if profile is None:
+                profile = config.get(PROFILE_CONFIG_KEY)
+
+        # 初期化前に不正なプロファイル名を検出する
+        if profile is not None and profile not in PROFILES:
+            raise ValueError(f"unknown profile: {profile!r}")
+        self.profile = profile
 
         self.initialize()
 
+        if profile is not None:
+            self.apply_profile(profile)
+
+    @property
+    def handle(self) -> int | None:
+        """
+        pigpio の I2C ハンドル (`PigpioTransport` の場合)。
+        他のトランスポートでは None。
+        """
+        if isinstance(self.transport, PigpioTransport):
+            return self.transport.handle
+        return None
+
     def __enter__(self) -> "VL53L0X":
         """
         コンテキストマネージャーとして使用する際のエントリポイント。
@@ -255,26 +588,27 @@ class VL53L0X:
         self.write_byte(I2C_STANDARD_MODE, VALUE_00)
 
         # VL53L0Xデータシートに従って各種レジスタを初期化
-        self.write_byte(REG_80, VALUE_01)
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_00, VALUE_00)
+        self.write_sequence(REG_ACCESS_OPEN)
 
         # REG_91からストップ変数を読み取る
         self.stop_variable = self.read_byte(REG_91)
 
         # レジスタをデフォルトの電源投入時の値に復元
-        self.write_byte(REG_00, VALUE_01)
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_00)
+        self.write_sequence(REG_ACCESS_CLOSE)
 
         # I/O 2.8V エクスパンダ（推奨：一度だけ）
+        # バッチ中は書き込みがキューに入るだけなので、失敗をここで
+        # 捕まえられるように、この書き込みだけを先に送信する
+        self._flush_batch()
         try:
             self.write_byte(
                 VHV_CFG_PAD_SCL_SDA_EXTSUP_HV,
                 (self.read_byte(VHV_CFG_PAD_SCL_SDA_EXTSUP_HV) | 0x01),
             )
+            self._flush_batch()
         except Exception:
-            pass
+            if self._shadow is not None:
+                self._shadow.pop(VHV_CFG_PAD_SCL_SDA_EXTSUP_HV, None)
 
     def _configure_signal_rate_limit(self) -> None:
         """
@@ -287,147 +621,66 @@ class VL53L0X:
 
         # 最終レンジ信号レート制限を0.25 MCPS (百万カウント/秒) に設定する。
         # この値は0.25 * 128 = 32。
-        self.write_word(FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT, VALUE_32)
+        self.set_signal_rate_limit(SIGNAL_RATE_LIMIT_DEFAULT)
 
         # SYSTEM_SEQUENCE_CONFIGを設定して、構成のためにすべてのシーケンスを有効にする。
         self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_FF)
 
-    def _setup_spad_info(self) -> None:
+    def _setup_spad_info(self, warm: dict[str, Any] | None = None) -> None:
         """
         SPAD情報を設定します。
-        """
-        spad_count, spad_is_aperture = self._get_spad_info()
 
-        # The SPAD map (RefGoodSpadMap) is read by VL53L0X_get_info_from_device()
-        # in the API, but the same data seems to be written to
-        # GLOBAL_CONFIG_SPAD_ENABLES_REF_0 through GLOBAL_CONFIG_SPAD_ENABLES_REF_5,
-        # so read it from there.
-        ref_spad_map = self.read_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, 6)
+        Args:
+            warm (dict[str, Any] | None): ウォームスタート用の保存データ。
+                指定された場合は、SPAD情報の取得と計算を省略します。
+        """
+        if warm is not None:
+            spad_count = int(warm["spad_count"])
+            spad_is_aperture = bool(warm["spad_is_aperture"])
+            ref_spad_map = [int(b) for b in warm["ref_spad_map"]]
+        else:
+            spad_count, spad_is_aperture = self._get_spad_info()
+
+            # The SPAD map (RefGoodSpadMap) is read by
+            # VL53L0X_get_info_from_device() in the API, but the same data
+            # seems to be written to GLOBAL_CONFIG_SPAD_ENABLES_REF_0
+            # through GLOBAL_CONFIG_SPAD_ENABLES_REF_5,
+            # so read it from there.
+            ref_spad_map = self.read_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, 6)
 
         # Configure dynamic SPAD settings
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(DYN_SPAD_REF_EN_START_OFFSET, VALUE_00)
-        self.write_byte(
-            DYN_SPAD_NUM_REQUESTED_REF_SPAD, SPAD_NUM_REQUESTED_REF
-        )
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(GLOBAL_CFG_REF_EN_START_SELECT, VALUE_B4)
+        self.write_sequence(DYNAMIC_SPAD_CONFIG)
 
-        first_spad_to_enable = (
-            SPAD_START_INDEX_APERTURE if spad_is_aperture else 0
-        )
-        spads_enabled = 0
-
-        # Enable SPADs based on count and aperture information
-        for i in range(SPAD_TOTAL_COUNT):
-            if i < first_spad_to_enable or spads_enabled == spad_count:
-                # This bit is lower than the first one to enable, or
-                # (spad_count) bits have already been enabled, so zero this bit
-                ref_spad_map[i // SPAD_MAP_BITS_PER_BYTE] &= ~(
-                    1 << (i % SPAD_MAP_BITS_PER_BYTE)
-                )
-            elif (
-                ref_spad_map[i // SPAD_MAP_BITS_PER_BYTE]
-                >> (i % SPAD_MAP_BITS_PER_BYTE)
-            ) & 0x1:
-                spads_enabled += 1
+        if warm is None:
+            first_spad_to_enable = (
+                SPAD_START_INDEX_APERTURE if spad_is_aperture else 0
+            )
+            spads_enabled = 0
+
+            # Enable SPADs based on count and aperture information
+            for i in range(SPAD_TOTAL_COUNT):
+                if i < first_spad_to_enable or spads_enabled == spad_count:
+                    # This bit is lower than the first one to enable, or
+                    # (spad_count) bits have already been enabled,
+                    # so zero this bit
+                    ref_spad_map[i // SPAD_MAP_BITS_PER_BYTE] &= ~(
+                        1 << (i % SPAD_MAP_BITS_PER_BYTE)
+                    )
+                elif (
+                    ref_spad_map[i // SPAD_MAP_BITS_PER_BYTE]
+                    >> (i % SPAD_MAP_BITS_PER_BYTE)
+                ) & 0x1:
+                    spads_enabled += 1
 
         self.write_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, ref_spad_map)
 
-        # Further SPAD configuration registers
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_00, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_09, VALUE_00)
-        self.write_byte(REG_10, VALUE_00)
-        self.write_byte(REG_11, VALUE_00)
-
-        self.write_byte(REG_24, VALUE_01)
-        self.write_byte(REG_25, VALUE_FF)
-        self.write_byte(REG_75, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_4E, SPAD_NUM_REQUESTED_REF)
-        self.write_byte(REG_48, VALUE_00)
-        self.write_byte(REG_30, VALUE_20)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_30, VALUE_09)
-        self.write_byte(REG_54, VALUE_00)
-        self.write_byte(REG_31, VALUE_04)
-        self.write_byte(REG_32, VALUE_03)
-        self.write_byte(REG_40, VALUE_83)
-        self.write_byte(REG_46, VALUE_25)
-        self.write_byte(REG_60, VALUE_00)
-        self.write_byte(REG_27, VALUE_00)
-        self.write_byte(REG_50, VALUE_06)
-        self.write_byte(REG_51, VALUE_00)
-        self.write_byte(REG_52, VALUE_96)
-        self.write_byte(REG_56, VALUE_08)
-        self.write_byte(REG_57, VALUE_30)
-        self.write_byte(REG_61, VALUE_00)
-        self.write_byte(REG_62, VALUE_00)
-        self.write_byte(REG_64, VALUE_00)
-        self.write_byte(REG_65, VALUE_00)
-        self.write_byte(REG_66, VALUE_A0)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_22, VALUE_32)
-        self.write_byte(REG_47, VALUE_14)
-        self.write_byte(REG_49, VALUE_FF)
-        self.write_byte(REG_4A, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_7A, VALUE_0A)
-        self.write_byte(REG_7B, VALUE_00)
-        self.write_byte(REG_78, VALUE_21)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_23, VALUE_34)
-        self.write_byte(REG_42, VALUE_00)
-        self.write_byte(REG_44, VALUE_FF)
-        self.write_byte(REG_45, VALUE_26)
-        self.write_byte(REG_46, VALUE_05)
-        self.write_byte(REG_40, VALUE_40)
-        self.write_byte(REG_0E, VALUE_06)
-        self.write_byte(REG_20, VALUE_1A)
-        self.write_byte(REG_43, VALUE_40)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_34, VALUE_03)
-        self.write_byte(REG_35, VALUE_44)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_31, VALUE_04)
-        self.write_byte(REG_4B, VALUE_09)
-        self.write_byte(REG_4C, VALUE_05)
-        self.write_byte(REG_4D, VALUE_04)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_44, VALUE_00)
-        self.write_byte(REG_45, VALUE_20)
-        self.write_byte(REG_47, VALUE_08)
-        self.write_byte(REG_48, VALUE_28)
-        self.write_byte(REG_67, VALUE_00)
-        self.write_byte(REG_70, VALUE_04)
-        self.write_byte(REG_71, VALUE_01)
-        self.write_byte(REG_72, VALUE_FE)
-        self.write_byte(REG_76, VALUE_00)
-        self.write_byte(REG_77, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_0D, VALUE_01)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_01)
-        self.write_byte(REG_01, VALUE_F8)
+        # ウォームスタート用に保持
+        self.spad_count = spad_count
+        self.spad_is_aperture = spad_is_aperture
+        self.ref_spad_map = list(ref_spad_map)
 
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_8E, VALUE_01)
-        self.write_byte(REG_00, VALUE_01)
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_00)
+        # Further SPAD configuration registers (チューニング設定)
+        self.write_sequence(DEFAULT_TUNING_SETTINGS)
 
     def _configure_interrupt_gpio(self) -> None:
         """
@@ -435,6 +688,7 @@ class VL53L0X:
         """
         # 割り込み出力のためにGPIOを設定
         self.write_byte(SYSTEM_INTERRUPT_CONFIG_GPIO, GPIO_INTERRUPT_CONFIG)
+        self.interrupt_mode = INTERRUPT_NEW_SAMPLE_READY
 
         # GPIO_HV_MUX_ACTIVE_HIGHレジスタをアクティブローに設定
         current_gpio_hv_mux = self.read_byte(GPIO_HV_MUX_ACTIVE_HIGH)
@@ -445,9 +699,16 @@ class VL53L0X:
         # 割り込みをクリア
         self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
 
-    def _set_timing_budget_and_calibrations(self) -> None:
+    def _set_timing_budget_and_calibrations(
+        self, warm: dict[str, Any] | None = None
+    ) -> None:
         """
         タイミングバジェットを設定し、キャリブレーションを実行します。
+
+        Args:
+            warm (dict[str, Any] | None): ウォームスタート用の保存データ。
+                指定された場合は、キャリブレーションを行わず、
+                保存された VHV/フェーズの値を書き込みます。
         """
         # 測定タイミングバジェットを取得して設定
         self.measurement_timing_budget_us = (
@@ -460,79 +721,338 @@ class VL53L0X:
         self.set_measurement_timing_budget(self.measurement_timing_budget_us)
 
         # 以前のシーケンス設定を復元し、再度タイミングバジェットを設定
-        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_E8)
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, self.sequence_config)
         self.set_measurement_timing_budget(self.measurement_timing_budget_us)
 
-        # 単一のリファレンスキャリブレーションを実行
-        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_01)
-        self.perform_single_ref_calibration(CALIBRATION_VALUE_40)
+        if warm is not None:
+            # 保存されたキャリブレーション結果を復元
+            self._set_ref_calibration(
+                int(warm["vhv_settings"]), int(warm["phase_cal"])
+            )
+        else:
+            # 単一のリファレンスキャリブレーションを実行
+            self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_01)
+            self.perform_single_ref_calibration(CALIBRATION_VALUE_40)
 
-        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_02)
-        self.perform_single_ref_calibration(VALUE_00)
+            self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_02)
+            self.perform_single_ref_calibration(VALUE_00)
+
+            # ウォームスタート用に結果を保持
+            self.vhv_settings, self.phase_cal = self._get_ref_calibration()
 
         # キャリブレーション後に以前のシーケンス設定を復元
-        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_E8)
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, self.sequence_config)
 
     def initialize(self) -> None:
         """
         センサーを初期化します。
         """
-        # I2Cレジスタの初期値を設定
-        self._set_i2c_registers_initial_values()
+        self.invalidate_register_cache()
+        self.part_uid = None
 
-        # 信号レート制限を設定
-        self._configure_signal_rate_limit()
+        # 連続する書き込みを i2c_zip にまとめてラウンドトリップを減らす
+        with self.batch():
+            # I2Cレジスタの初期値を設定
+            self._set_i2c_registers_initial_values()
 
-        # SPAD情報を設定
-        self._setup_spad_info()
+            # 保存データがデバイスと一致すれば、ウォームスタートする
+            warm = self._load_warm_start_state()
 
-        # 割り込みGPIOを設定
-        self._configure_interrupt_gpio()
+            # 信号レート制限を設定
+            self._configure_signal_rate_limit()
 
-        # タイミングバジェットを設定し、キャリブレーションを実行
-        self._set_timing_budget_and_calibrations()
+            # SPAD情報を設定
+            self._setup_spad_info(warm)
 
-    def _get_spad_info(self) -> tuple[int, bool]:
+            # 割り込みGPIOを設定
+            self._configure_interrupt_gpio()
+
+            # タイミングバジェットを設定し、キャリブレーションを実行
+            self._set_timing_budget_and_calibrations(warm)
+
+        if self.warm_start:
+            if warm is None:
+                self._save_warm_start_state()
+            else:
+                self.__log.debug("warm start: restored %s", warm)
+
+        stats = self.get_batch_stats()
+        self.__log.debug(
+            "initialize: ops=%s, transactions=%s, saved=%s",
+            stats["ops"],
+            stats["transactions"],
+            stats["saved"],
+        )
+
+    def _warm_start_key(self) -> str:
         """
-        SPAD情報を取得します。
+        設定ファイル内のウォームスタートデータのキーを返します。
+        """
+        return f"{self.i2c_bus}:{self.i2c_address:#04x}"
+
+    def _read_device_identity(self) -> dict[str, int]:
+        """
+        保存データとの照合に使うデバイス情報を読み取ります。
+        """
+        if self.part_uid is None:
+            self.part_uid = self._read_part_uid()
+        return {
+            "model_id": self.read_byte(IDENTIFICATION_MODEL_ID),
+            "revision_id": self.read_byte(IDENTIFICATION_REVISION_ID),
+            "stop_variable": self.stop_variable,
+            "part_uid": self.part_uid,
+        }
+
+    def _load_warm_start_state(self) -> dict[str, Any] | None:
+        """
+        設定ファイルからウォームスタートデータを読み込みます。
+
+        パーツUID (個体ごとに異なる)、`stop_variable`、デバイスIDが
+        一致しない場合は None を返します (同じバス・アドレスのセンサーを
+        交換した場合も、保存データを使いません)。
+        """
+        if not self.warm_start or self.config_file_path is None:
+            return None
+
+        with _CONFIG_LOCK:
+            config = load_config(self.config_file_path)
+        saved = config.get(WARM_START_CONFIG_KEY, {}).get(
+            self._warm_start_key()
+        )
+        if not saved:
+            return None
+
+        identity = self._read_device_identity()
+        if any(saved.get(k) != v for k, v in identity.items()):
+            self.__log.debug(
+                "warm start data mismatch: saved=%s, device=%s",
+                saved,
+                identity,
+            )
+            return None
+        return cast(dict[str, Any], saved)
+
+    def _save_warm_start_state(self) -> None:
+        """
+        SPAD情報とキャリブレーション結果を設定ファイルに保存します。
+        """
+        if self.config_file_path is None:
+            return
+
+        state: dict[str, Any] = dict(self._read_device_identity())
+        state.update(
+            {
+                "spad_count": self.spad_count,
+                "spad_is_aperture": self.spad_is_aperture,
+                "ref_spad_map": self.ref_spad_map,
+                "vhv_settings": self.vhv_settings,
+                "phase_cal": self.phase_cal,
+            }
+        )
+
+        # 読み込みから保存までを排他し、他のセンサーの保存を上書きしない
+        with _CONFIG_LOCK:
+            config = load_config(self.config_file_path)
+            config.setdefault(WARM_START_CONFIG_KEY, {})[
+                self._warm_start_key()
+            ] = state
+            save_config(self.config_file_path, config)
+        self.__log.debug(
+            "warm start data saved to %s: %s", self.config_file_path, state
+        )
+
+    def _get_ref_calibration(self) -> tuple[int, int]:
+        """
+        リファレンスキャリブレーションの結果 (VHV, フェーズ) を読み取ります。
+        """
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_00)
+        self.write_byte(REG_FF, VALUE_00)
+        vhv_settings = self.read_byte(REG_CB)
+        phase_cal = self.read_byte(REG_EE) & PHASE_CAL_READ_MASK
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_01)
+        self.write_byte(REG_FF, VALUE_00)
+        return vhv_settings, phase_cal
+
+    def _set_ref_calibration(self, vhv_settings: int, phase_cal: int) -> None:
+        """
+        リファレンスキャリブレーションの結果 (VHV, フェーズ) を書き込みます。
         """
-        # SPAD情報取得のための初期レジスタ設定
-        self.write_byte(REG_80, VALUE_01)
         self.write_byte(REG_FF, VALUE_01)
         self.write_byte(REG_00, VALUE_00)
+        self.write_byte(REG_FF, VALUE_00)
+        self.write_byte(REG_CB, vhv_settings)
+        self.write_byte(
+            REG_EE,
+            (self.read_byte(REG_EE) & VALUE_80)
+            | (phase_cal & PHASE_CAL_WRITE_MASK),
+        )
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_01)
+        self.write_byte(REG_FF, VALUE_00)
 
-        self.write_byte(REG_FF, VALUE_06)
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        ブロック内のレジスタ書き込みをまとめて送信するコンテキストマネージャー。
+
+        書き込みはキューに溜められ、読み出し・データ準備完了待ち・
+        ブロック終了のときに、pigpio の `i2c_zip` 1回で送信されます。
+        アドレスが連続する書き込みは、1つのブロック書き込みにまとめます。
+        ネストできます。
+        ブロック内で例外が発生した場合、キューに残っている書き込みは
+        送信せずに捨てます (それまでに送信した書き込みは戻せません)。
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._discard_batch()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._flush_batch()
+
+    def get_batch_stats(self) -> dict[str, int]:
+        """
+        バッチ処理の統計を返します。
+
+        Returns:
+            dict[str, int]: `ops` (バッチ内のレジスタ操作数)、
+                `transactions` (実際のI2Cラウンドトリップ数)、
+                `saved` (削減できたラウンドトリップ数)
+        """
+        ops = self.batch_stats["ops"]
+        transactions = self.batch_stats["transactions"]
+        return {
+            "ops": ops,
+            "transactions": transactions,
+            "saved": ops - transactions,
+        }
+
+    def _queue_write(self, register: int, data: list[int]) -> None:
+        """
+        書き込みをバッチのキューに追加します。
+        """
+        self.batch_stats["ops"] += 1
+        if self._pending_writes and register != REG_FF:
+            last = self._pending_writes[-1]
+            # 直前の書き込みとアドレスが連続していれば1つにまとめる
+            if (
+                last[0] != REG_FF
+                and last[0] + len(last) - 1 == register
+                and len(last) - 1 + len(data) <= ZIP_MAX_WRITE_LEN
+            ):
+                last.extend(data)
+                return
+        self._pending_writes.append([register, *data])
+        if len(self._pending_writes) >= ZIP_MAX_SEGMENTS:
+            self._flush_batch()
+
+    def _discard_batch(self) -> None:
+        """
+        キューに溜まった書き込みを送信せずに捨てます。
+
+        シャドウキャッシュには捨てた書き込みも記録されているので、
+        キャッシュを破棄し、ページ (REG_FF) と REG_80 の状態を不明にします。
+        """
+        if not self._pending_writes:
+            return
+        self.__log.debug(
+            "discard %s pending writes", len(self._pending_writes)
+        )
+        self._pending_writes = []
+        if self._shadow is not None:
+            self._shadow = {}
+            self._page = None
+            self._power_force = None
+
+    def _flush_batch(self) -> None:
+        """
+        キューに溜まった書き込みを1回のトランザクションで送信します
+        (pigpio の場合は i2c_zip)。
+        """
+        if not self._pending_writes:
+            return
+        segments = self._pending_writes
+        self._pending_writes = []
+        self.batch_stats["transactions"] += 1
+        if self._bus_stats is None:
+            self.transport.write_batch(segments)
+        else:
+            self._timed_call(
+                "zip",
+                None,
+                sum(len(segment) for segment in segments),
+                self.transport.write_batch,
+                segments,
+            )
+
+    def _open_nvm(self) -> None:
+        """
+        NVM (ページ 0x06/0x07) を読み出すためのレジスタを設定します。
+        """
+        self.write_sequence(SPAD_INFO_OPEN)
         self.write_byte(VALUE_83, (self.read_byte(VALUE_83) | VALUE_04))
-        self.write_byte(REG_FF, VALUE_07)
-        self.write_byte(REG_81, VALUE_01)
 
-        self.write_byte(REG_80, VALUE_01)
+    def _close_nvm(self) -> None:
+        """
+        `_open_nvm()` で変更したレジスタをデフォルト値に復元します。
+        """
+        self.write_byte(REG_81, VALUE_00)
+        self.write_byte(REG_FF, VALUE_06)
+        self.write_byte(VALUE_83, (self.read_byte(VALUE_83) & ~VALUE_04))
+        self.write_sequence(SPAD_INFO_CLOSE)
 
-        # SPADキャリブレーションをトリガーし、完了を待つ
-        self.write_byte(REG_94, VALUE_6B)
-        self.write_byte(VALUE_83, VALUE_00)
+    def _wait_nvm_read(self) -> None:
+        """
+        NVM の読み出し (VALUE_83 に 0 を書いて開始) の完了を待ちます。
+        """
         start = time.time()
         while self.read_byte(VALUE_83) == VALUE_00:
             if time.time() - start > TIMEOUT_LIMIT:
                 raise Exception("Timeout")
         self.write_byte(VALUE_83, VALUE_01)
 
+    def _get_spad_info(self) -> tuple[int, bool]:
+        """
+        SPAD情報を取得します。
+        """
+        self._open_nvm()
+
+        # SPADキャリブレーションをトリガーし、完了を待つ
+        self.write_sequence(SPAD_INFO_START)
+        self._wait_nvm_read()
+
         # SPADカウントとアパーチャ情報を読み取る
         tmp = self.read_byte(REG_92)
         count = tmp & SPAD_COUNT_MASK
         is_aperture = (tmp & SPAD_APERTURE_BIT) != 0
 
-        # レジスタをデフォルト値に復元
-        self.write_byte(REG_81, VALUE_00)
-        self.write_byte(REG_FF, VALUE_06)
-        self.write_byte(VALUE_83, (self.read_byte(VALUE_83) & ~VALUE_04))
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_00, VALUE_01)
+        self._close_nvm()
+        return count, is_aperture
 
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_00)
+    def _read_part_uid(self) -> int:
+        """
+        NVM からパーツUID (64ビット、個体ごとに異なる) を読み取ります。
 
-        return count, is_aperture
+        API の VL53L0X_get_info_from_device() と同じく、上位・下位の
+        32ビットを順に読み出します。
+        """
+        self._open_nvm()
+        self.write_sequence(NVM_READ_OPEN)
+        part_uid = 0
+        for command in (NVM_PART_UID_UPPER, NVM_PART_UID_LOWER):
+            self.write_byte(REG_94, command)
+            self.write_byte(VALUE_83, VALUE_00)
+            self._wait_nvm_read()
+            data = self.read_block(REG_90, 4)
+            part_uid = (part_uid << 32) | int.from_bytes(bytes(data), "big")
+        self._close_nvm()
+        return part_uid
 
     # 内部ヘルパー関数 (C++版 calcMacroPeriod の移植)
     def _calc_macro_period(self, vcsel_period_pclks: int) -> int:
@@ -552,6 +1072,14 @@ class VL53L0X:
         macro_period_ns = self._calc_macro_period(vcsel_period_pclks)
         return ((timeout_mclks * macro_period_ns) + 500) // 1000
 
+    def _decode_vcsel_period(self, reg_val: int) -> int:
+        # C++: decodeVcselPeriod() (レジスタ値 -> PCLK)
+        return (reg_val + 1) << 1
+
+    def _encode_vcsel_period(self, period_pclks: int) -> int:
+        # C++: encodeVcselPeriod() (PCLK -> レジスタ値)
+        return (period_pclks >> 1) - 1
+
     def _decode_timeout(self, reg_val: int) -> int:
         # C++: VL53L0X_decode_timeout()
         ls_byte = reg_val & 0xFF
@@ -571,145 +1099,842 @@ class VL53L0X:
             return (ms_byte << 8) | ls_byte
         return 0
 
+    def _sequence_steps_budget_us(
+        self, enables: int, timeouts: dict[str, int]
+    ) -> int:
+        """
+        final-range 以外の有効なシーケンスステップにかかる時間 (us)。
+        """
+        budget_us = 0
+        msrc_dss_tcc_us = timeouts["msrc_dss_tcc_us"]
+        if enables & SEQUENCE_STEP_TCC:
+            budget_us += msrc_dss_tcc_us + TCC_OVERHEAD_US
+        # DSS は MSRC のタイムアウトを2回分使う
+        if enables & SEQUENCE_STEP_DSS:
+            budget_us += 2 * (msrc_dss_tcc_us + DSS_OVERHEAD_US)
+        elif enables & SEQUENCE_STEP_MSRC:
+            budget_us += msrc_dss_tcc_us + MSRC_OVERHEAD_US
+        if enables & SEQUENCE_STEP_PRE_RANGE:
+            budget_us += timeouts["pre_range_us"] + PRE_RANGE_OVERHEAD_US
+        return budget_us
+
     def get_measurement_timing_budget(self) -> int:
         """
         現在の測定タイミングバジェットをマイクロ秒単位で返す
         """
-        budget_us = 1910  # Start overhead
         enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        timeouts = self._get_sequence_step_timeouts(enables)
 
-        pre_range_us: int = 0
-        pre_range_mclks: int | None = None
-
-        # pre-range
-        if (enables >> 6) & 0x01:
-            pre_range_vcsel_period_pclks = self.read_byte(
-                PRE_RANGE_CONFIG_VCSEL_PERIOD
-            )
-            pre_range_mclks = self._decode_timeout(
-                self.read_word(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
-            )
-            pre_range_us = self._timeout_mclks_to_microseconds(
-                pre_range_mclks, pre_range_vcsel_period_pclks
-            )
-            budget_us += pre_range_us + 660  # overhead
-
-        # final-range
-        if (enables >> 7) & 0x01:
-            final_range_vcsel_period_pclks = self.read_byte(
-                FINAL_RANGE_CONFIG_VCSEL_PERIOD
-            )
-            final_range_mclks = self._decode_timeout(
-                self.read_word(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI)
-            )
-
-            if (enables >> 6) & 0x01:  # if pre-range enabled, subtract it
-                if pre_range_mclks is not None:
-                    final_range_mclks -= pre_range_mclks
-
-            final_range_us = self._timeout_mclks_to_microseconds(
-                final_range_mclks, final_range_vcsel_period_pclks
-            )
-            budget_us += final_range_us + 550  # overhead
+        budget_us = GET_START_OVERHEAD_US + END_OVERHEAD_US
+        budget_us += self._sequence_steps_budget_us(enables, timeouts)
+        if enables & SEQUENCE_STEP_FINAL_RANGE:
+            budget_us += timeouts["final_range_us"] + FINAL_RANGE_OVERHEAD_US
 
         return budget_us
 
     def set_measurement_timing_budget(self, budget_us: int) -> bool:
         """
         測定タイミングバジェットを設定する
+
+        有効なシーケンスステップ (TCC, DSS, MSRC, pre-range) の時間を
+        差し引いた残りを final-range に割り当てます。
         """
-        used_budget_us = 1320  # Start overhead
         enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        # final-range のタイムアウトはここで書き直すので読まない
+        timeouts = self._get_sequence_step_timeouts(
+            enables, enables & ~SEQUENCE_STEP_FINAL_RANGE
+        )
 
-        pre_range_us = 0
-        pre_range_mclks = 0
-        if (enables >> 6) & 0x01:
-            pre_range_vcsel_period_pclks = self.read_byte(
-                PRE_RANGE_CONFIG_VCSEL_PERIOD
-            )
-            pre_range_mclks = self._decode_timeout(
-                self.read_word(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
-            )
-            pre_range_us = self._timeout_mclks_to_microseconds(
-                pre_range_mclks, pre_range_vcsel_period_pclks
-            )
-            used_budget_us += pre_range_us + 660
+        used_budget_us = SET_START_OVERHEAD_US + END_OVERHEAD_US
+        used_budget_us += self._sequence_steps_budget_us(enables, timeouts)
 
-        if (enables >> 7) & 0x01:
-            final_range_us = budget_us - used_budget_us - 550
+        if enables & SEQUENCE_STEP_FINAL_RANGE:
+            final_range_us = (
+                budget_us - used_budget_us - FINAL_RANGE_OVERHEAD_US
+            )
             if final_range_us <= 0:
                 raise ValueError("Requested timing budget too small")
 
-            final_range_vcsel_period_pclks = self.read_byte(
-                FINAL_RANGE_CONFIG_VCSEL_PERIOD
+            final_range_vcsel_period_pclks = self.get_vcsel_pulse_period(
+                VCSEL_PERIOD_FINAL_RANGE
             )
-            # ★ ここを μs→mclks に修正
             final_range_mclks = self._timeout_microseconds_to_mclks(
                 final_range_us, final_range_vcsel_period_pclks
             )
 
-            if (enables >> 6) & 0x01:
-                final_range_mclks += pre_range_mclks
+            if enables & SEQUENCE_STEP_PRE_RANGE:
+                final_range_mclks += timeouts["pre_range_mclks"]
 
             self.write_word(
                 FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
                 self._encode_timeout(final_range_mclks),
             )
+            self.measurement_timing_budget_us = budget_us
             return True
         return False
 
+    def get_sequence_step_enables(self) -> dict[str, bool]:
+        """
+        各シーケンスステップが有効かどうかを返します。
+
+        Returns:
+            dict[str, bool]: `SEQUENCE_STEPS` のキーごとの有効/無効
+        """
+        enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        return {
+            name: bool(enables & bit) for name, bit in SEQUENCE_STEPS.items()
+        }
+
+    def set_sequence_step_enables(
+        self,
+        tcc: bool | None = None,
+        dss: bool | None = None,
+        msrc: bool | None = None,
+        pre_range: bool | None = None,
+        final_range: bool | None = None,
+    ) -> None:
+        """
+        シーケンスステップを個別に有効/無効にします。
+
+        None のステップは変更しません。変更後、現在のタイミングバジェットを
+        設定し直すので、空いた (または不足した) 時間は final-range で
+        調整されます。近距離では TCC/MSRC を無効にして、
+        タイミングバジェットを短くすると測定レートを上げられます。
+
+        Args:
+            tcc (bool | None): Target Centre Check
+            dss (bool | None): Dynamic SPAD Selection
+            msrc (bool | None): Minimum Signal Rate Check
+            pre_range (bool | None): pre-range
+            final_range (bool | None): final-range
+
+        Raises:
+            ValueError: final-range を無効にした場合、または有効にした
+                ステップが現在のタイミングバジェットに収まらない場合
+                (ステップの設定は変更しません)
+        """
+        previous = self.sequence_config
+        enables = previous
+        for name, enable in (
+            ("tcc", tcc),
+            ("dss", dss),
+            ("msrc", msrc),
+            ("pre_range", pre_range),
+            ("final_range", final_range),
+        ):
+            if enable is None:
+                continue
+            if enable:
+                enables |= SEQUENCE_STEPS[name]
+            else:
+                enables &= ~SEQUENCE_STEPS[name]
+
+        # final-range がないと、タイミングバジェットを設定できない
+        if not enables & SEQUENCE_STEPS["final_range"]:
+            raise ValueError("final_range cannot be disabled")
+
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, enables)
+        self.sequence_config = enables
+        try:
+            self.set_measurement_timing_budget(
+                self.measurement_timing_budget_us
+            )
+        except ValueError:
+            # 元のステップに戻す
+            self.write_byte(SYSTEM_SEQUENCE_CONFIG, previous)
+            self.sequence_config = previous
+            raise
+        self.__log.debug(
+            "sequence_config=%s: %s",
+            hex(enables),
+            self.get_sequence_step_enables(),
+        )
+
+    def get_vcsel_pulse_period(self, period_type: str) -> int:
+        """
+        VCSEL パルス周期を PCLK 単位で返します。
+
+        Args:
+            period_type (str): `VCSEL_PERIOD_PRE_RANGE` または
+                `VCSEL_PERIOD_FINAL_RANGE`
+        """
+        if period_type == VCSEL_PERIOD_PRE_RANGE:
+            reg_val = self.read_byte(PRE_RANGE_CONFIG_VCSEL_PERIOD)
+        elif period_type == VCSEL_PERIOD_FINAL_RANGE:
+            reg_val = self.read_byte(FINAL_RANGE_CONFIG_VCSEL_PERIOD)
+        else:
+            raise ValueError(f"invalid period_type: {period_type!r}")
+        return self._decode_vcsel_period(reg_val)
+
+    def set_vcsel_pulse_period(
+        self, period_type: str, period_pclks: int
+    ) -> None:
+        """
+        VCSEL パルス周期を設定します (C++版 setVcselPulsePeriod の移植)。
+
+        位相チェックの範囲を合わせて設定し、各ステップのタイムアウトを
+        新しい周期で計算し直してから、タイミングバジェットを再設定し、
+        フェーズキャリブレーションを行います。
+
+        Args:
+            period_type (str): `VCSEL_PERIOD_PRE_RANGE` (12, 14, 16, 18) または
+                `VCSEL_PERIOD_FINAL_RANGE` (8, 10, 12, 14)
+            period_pclks (int): パルス周期 (PCLK)
+        """
+        valid_periods: Mapping[int, object]
+        if period_type == VCSEL_PERIOD_PRE_RANGE:
+            valid_periods = PRE_RANGE_VCSEL_PHASE
+        elif period_type == VCSEL_PERIOD_FINAL_RANGE:
+            valid_periods = FINAL_RANGE_VCSEL_PHASE
+        else:
+            raise ValueError(f"invalid period_type: {period_type!r}")
+        if period_pclks not in valid_periods:
+            raise ValueError(
+                f"invalid {period_type} VCSEL period: {period_pclks} "
+                f"(valid: {sorted(valid_periods)})"
+            )
+
+        enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        timeouts = self._get_sequence_step_timeouts(
+            enables, SEQUENCE_STEPS_ALL
+        )
+        vcsel_period_reg = self._encode_vcsel_period(period_pclks)
+
+        with self.batch():
+            if period_type == VCSEL_PERIOD_PRE_RANGE:
+                self.write_byte(
+                    PRE_RANGE_CONFIG_VALID_PHASE_HIGH,
+                    PRE_RANGE_VCSEL_PHASE[period_pclks],
+                )
+                self.write_byte(
+                    PRE_RANGE_CONFIG_VALID_PHASE_LOW, VCSEL_VALID_PHASE_LOW
+                )
+                self.write_byte(
+                    PRE_RANGE_CONFIG_VCSEL_PERIOD, vcsel_period_reg
+                )
+
+                # pre-range と MSRC のタイムアウトを新しい周期で計算し直す
+                pre_range_mclks = self._timeout_microseconds_to_mclks(
+                    timeouts["pre_range_us"], period_pclks
+                )
+                self.write_word(
+                    PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+                    self._encode_timeout(pre_range_mclks),
+                )
+                msrc_mclks = self._timeout_microseconds_to_mclks(
+                    timeouts["msrc_dss_tcc_us"], period_pclks
+                )
+                self.write_byte(
+                    MSRC_CONFIG_TIMEOUT_MACROP,
+                    255 if msrc_mclks > 256 else msrc_mclks - 1,
+                )
+            else:
+                phase_high, vcsel_width, phasecal_timeout, phasecal_lim = (
+                    FINAL_RANGE_VCSEL_PHASE[period_pclks]
+                )
+                self.write_byte(
+                    FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, phase_high
+                )
+                self.write_byte(
+                    FINAL_RANGE_CONFIG_VALID_PHASE_LOW, VCSEL_VALID_PHASE_LOW
+                )
+                self.write_byte(GLOBAL_CONFIG_VCSEL_WIDTH, vcsel_width)
+                self.write_byte(ALGO_PHASECAL_CFG_TIMEOUT, phasecal_timeout)
+                self.write_byte(REG_FF, VALUE_01)
+                self.write_byte(ALGO_PHASECAL_LIM, phasecal_lim)
+                self.write_byte(REG_FF, VALUE_00)
+                self.write_byte(
+                    FINAL_RANGE_CONFIG_VCSEL_PERIOD, vcsel_period_reg
+                )
+
+                # final-range のタイムアウトを新しい周期で計算し直す
+                # (pre-range が有効なら、その分を足した値を書く)
+                final_range_mclks = self._timeout_microseconds_to_mclks(
+                    timeouts["final_range_us"], period_pclks
+                )
+                if enables & SEQUENCE_STEP_PRE_RANGE:
+                    final_range_mclks += timeouts["pre_range_mclks"]
+                self.write_word(
+                    FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+                    self._encode_timeout(final_range_mclks),
+                )
+
+        # 周期が変わると各ステップの時間が変わるので、バジェットを再設定
+        self.set_measurement_timing_budget(self.measurement_timing_budget_us)
+
+        # フェーズキャリブレーション
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_02)
+        self.perform_single_ref_calibration(VALUE_00)
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, enables)
+
+        self.__log.debug("%s VCSEL period=%s", period_type, period_pclks)
+
+    def _get_sequence_step_timeouts(
+        self, enables: int, steps: int | None = None
+    ) -> dict[str, int]:
+        """
+        各シーケンスステップのタイムアウトを読み出します
+        (C++版 getSequenceStepTimeouts の移植)。
+
+        I2Cアクセスを減らすため、`steps` に含まれるステップのレジスタだけを
+        読みます (含まれないステップは 0)。
+
+        Args:
+            enables (int): SYSTEM_SEQUENCE_CONFIG の値
+            steps (int | None): 読み出すステップ (SEQUENCE_STEP_* の OR)。
+                None の場合は `enables` と同じ。
+        """
+        if steps is None:
+            steps = enables
+        timeouts = {
+            "msrc_dss_tcc_us": 0,
+            "pre_range_mclks": 0,
+            "pre_range_us": 0,
+            "final_range_us": 0,
+        }
+        # final-range のタイムアウトは pre-range の分を含む
+        need_pre_range = bool(
+            steps & SEQUENCE_STEP_PRE_RANGE
+            or (
+                steps & SEQUENCE_STEP_FINAL_RANGE
+                and enables & SEQUENCE_STEP_PRE_RANGE
+            )
+        )
+
+        if steps & SEQUENCE_STEPS_MSRC_TIMEOUT or need_pre_range:
+            pre_range_vcsel = self.get_vcsel_pulse_period(
+                VCSEL_PERIOD_PRE_RANGE
+            )
+            if steps & SEQUENCE_STEPS_MSRC_TIMEOUT:
+                msrc_dss_tcc_mclks = (
+                    self.read_byte(MSRC_CONFIG_TIMEOUT_MACROP) + 1
+                )
+                timeouts["msrc_dss_tcc_us"] = (
+                    self._timeout_mclks_to_microseconds(
+                        msrc_dss_tcc_mclks, pre_range_vcsel
+                    )
+                )
+            if need_pre_range:
+                pre_range_mclks = self._decode_timeout(
+                    self.read_word(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
+                )
+                timeouts["pre_range_mclks"] = pre_range_mclks
+                timeouts["pre_range_us"] = (
+                    self._timeout_mclks_to_microseconds(
+                        pre_range_mclks, pre_range_vcsel
+                    )
+                )
+
+        if steps & SEQUENCE_STEP_FINAL_RANGE:
+            final_range_vcsel = self.get_vcsel_pulse_period(
+                VCSEL_PERIOD_FINAL_RANGE
+            )
+            final_range_mclks = self._decode_timeout(
+                self.read_word(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI)
+            )
+            if enables & SEQUENCE_STEP_PRE_RANGE:
+                final_range_mclks -= timeouts["pre_range_mclks"]
+            timeouts["final_range_us"] = self._timeout_mclks_to_microseconds(
+                final_range_mclks, final_range_vcsel
+            )
+
+        return timeouts
+
+    def get_signal_rate_limit(self) -> float:
+        """
+        最終レンジの信号レート制限 (MCPS) を返します。
+        """
+        return self.read_word(FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT) / 128
+
+    def set_signal_rate_limit(self, limit_mcps: float) -> None:
+        """
+        最終レンジの信号レート制限 (MCPS) を設定します。
+
+        値を小さくすると、反射の弱い遠くのターゲットも測れるようになりますが、
+        誤測定が増えます。
+
+        Args:
+            limit_mcps (float): 信号レート制限 (0 - 511.99 MCPS)
+        """
+        if not 0 <= limit_mcps <= SIGNAL_RATE_LIMIT_MAX:
+            raise ValueError(f"invalid signal rate limit: {limit_mcps}")
+        # 9.7 固定小数点
+        self.write_word(
+            FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT, int(limit_mcps * 128)
+        )
+
+    def apply_profile(self, name: str) -> None:
+        """
+        測定プロファイルを適用します。
+
+        Args:
+            name (str): `PROFILES` のキー
+                ("default", "high_speed", "high_accuracy", "long_range")
+
+        Raises:
+            ValueError: 不明なプロファイルの場合、またはタイミングバジェットを
+                設定できない (final-range のステップが無効) 場合
+        """
+        if name not in PROFILES:
+            raise ValueError(f"unknown profile: {name!r}")
+        profile = PROFILES[name]
+        # 途中まで適用しないように、先に確かめる
+        if (
+            not self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+            & SEQUENCE_STEP_FINAL_RANGE
+        ):
+            raise ValueError(
+                f"cannot apply profile {name!r}: final_range step is disabled"
+            )
+
+        self.set_signal_rate_limit(profile["signal_rate_limit"])
+        for period_type, key in (
+            (VCSEL_PERIOD_PRE_RANGE, "pre_range_vcsel_period"),
+            (VCSEL_PERIOD_FINAL_RANGE, "final_range_vcsel_period"),
+        ):
+            # 周期の変更はキャリブレーションを伴うので、同じなら省略する
+            if self.get_vcsel_pulse_period(period_type) != profile[key]:
+                self.set_vcsel_pulse_period(period_type, profile[key])
+        if not self.set_measurement_timing_budget(
+            profile["timing_budget_us"]
+        ):
+            raise ValueError(
+                f"cannot apply profile {name!r}: timing budget not applied"
+            )
+
+        self.profile = name
+        self.__log.debug("profile=%s: %s", name, profile)
+
     def perform_single_ref_calibration(self, vhv_init_byte: int) -> None:
         self.write_byte(SYSRANGE_START, VALUE_01 | vhv_init_byte)
-        start = time.time()
         # 2秒上限で待つ（環境により1秒だと落ちる場合がある）
-        while (
-            self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK
-        ) == VALUE_00:
-            if time.time() - start > 2.0:
-                raise Exception("Timeout during ref calibration")
+        self._wait_data_ready(
+            2.0, "Timeout during ref calibration", TIMEOUT_REF_CALIBRATION
+        )
         self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
         self.write_byte(SYSRANGE_START, VALUE_00)
 
-    def get_range(self) -> int:
+    def _restore_stop_variable(self) -> None:
         """
-        単一の測距測定を実行し、結果をmm単位で返します。
+        測距開始前に stop_variable を復元します。
         """
-        # stop_variable の復元シーケンス
-        self.write_byte(REG_80, VALUE_01)
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_00, VALUE_00)
-        self.write_byte(REG_91, self.stop_variable)
-        self.write_byte(REG_00, VALUE_01)
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_00)
-
-        # 測定開始（シングルショット）
-        self.write_byte(SYSRANGE_START, VALUE_01)
+        self.write_sequence(
+            STOP_VARIABLE_RESTORE, stop_variable=self.stop_variable
+        )
 
+    def _measurement_timeout_s(self) -> float:
+        """
+        測定完了待ちのタイムアウト時間(秒)を返します。
+        """
         # 予算に応じた実時間で待つ（最低1.0s）
         budget_s = (
             getattr(self, "measurement_timing_budget_us", 33000) / 1_000_000.0
         )
-        timeout_s = max(1.0, budget_s + 0.1)
+        # タイムドモードでは測定間隔も考慮する
+        if self.continuous:
+            budget_s = max(budget_s, self.inter_measurement_period_ms / 1000)
+        return max(1.0, budget_s + 0.1)
+
+    def _on_data_ready(self, gpio: int, level: int, tick: int) -> None:
+        """
+        GPIO1 の立ち下がりエッジのコールバック (pigpio のスレッドで実行)。
+        """
+        self._data_ready_event.set()
+
+    def _wait_data_ready(
+        self,
+        timeout_s: float | None = None,
+        message: str = "Timeout waiting for measurement ready",
+        kind: str = TIMEOUT_MEASUREMENT,
+    ) -> None:
+        """
+        データ準備完了を待ちます。
+
+        `gpio_pin` が指定されている場合は GPIO1 のエッジを待ち、
+        そうでない場合は `poll_interval` 間隔で割り込みステータスを
+        ポーリングします。
+
+        Args:
+            timeout_s (float | None): タイムアウト時間 (秒)。
+                None の場合は測定タイミングバジェットから決めます。
+            message (str): タイムアウト時の例外メッセージ。
+            kind (str): 統計に記録するタイムアウトの種類。
+        """
+        if timeout_s is None:
+            timeout_s = self._measurement_timeout_s()
+
+        # 測定開始の書き込みがキューに残らないようにする
+        self._flush_batch()
+
+        if self.gpio_pin is not None:
+            assert self.pi is not None
+            # クリアしてからレベルを確認することで、エッジを取りこぼさない
+            self._data_ready_event.clear()
+            if self.pi.read(self.gpio_pin) == 0:
+                return
+            if not self._data_ready_event.wait(timeout_s):
+                self._record_timeout(kind)
+                raise Exception(message)
+            return
 
-        # 割り込みステータス待ち（データ準備完了）
         start = time.time()
         while (
             self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK
         ) == VALUE_00:
             if time.time() - start > timeout_s:
-                raise Exception("Timeout waiting for measurement ready")
+                self._record_timeout(kind)
+                raise Exception(message)
+            time.sleep(self.poll_interval)
+
+    def start_ranging(self) -> None:
+        """
+        シングルショット測距を開始します。結果は待ちません。
+
+        複数のセンサーで測定を重ねる場合に使います。
+        完了は `is_data_ready()` で確認し、`read_range()` で読み出します。
+        """
+        self._data_ready_event.clear()
+        if self._bus_stats is not None:
+            self._measurement_start_ns = time.perf_counter_ns()
+        # stop_variable の復元と測定開始（シングルショット）を1回で送信
+        self.write_sequence(
+            START_SINGLESHOT, stop_variable=self.stop_variable
+        )
+
+    def is_data_ready(self) -> bool:
+        """
+        測定結果が準備できているかを返します。
 
+        `gpio_pin` が指定されている場合は、GPIO1 のエッジの有無を返すので
+        I2C アクセスは発生しません。
+        """
+        if self.gpio_pin is not None:
+            return self._data_ready_event.is_set()
+        return (
+            self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK
+        ) != VALUE_00
+
+    def read_range(self) -> int:
+        """
+        測距結果を読み出し、割り込みをクリアします。
+
+        Returns:
+            int: オフセット適用後の距離 (mm)
+        """
         # 結果読み出し
         range_mm = self.read_word(
             RESULT_RANGE_STATUS + VALUE_0A
         )  # 0x14 + 0x0A
 
-        # 割り込みクリア
+        # 割り込みクリア (次のエッジを待てるよう、先にイベントもクリア)
+        self._data_ready_event.clear()
         self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
 
+        if self._bus_stats is not None:
+            self._record_measurement(range_mm - self.offset_mm)
         return range_mm - self.offset_mm
 
+    def _read_result_block(self) -> list[int]:
+        """
+        結果ブロックを1回のブロック読み出しで読み、割り込みをクリアします。
+        """
+        block = self.read_block(RESULT_RANGE_STATUS, RESULT_BLOCK_SIZE)
+
+        # 割り込みクリア (次のエッジを待てるよう、先にイベントもクリア)
+        self._data_ready_event.clear()
+        self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
+
+        if self._bus_stats is not None:
+            self._record_measurement(
+                ((block[10] << 8) | block[11]) - self.offset_mm
+            )
+        return block
+
+    def _record_measurement(self, range_mm: int) -> None:
+        """
+        測定結果の読み出しを統計に記録します。
+
+        連続測距では、前回の結果からの時間をレイテンシとします。
+        """
+        assert self._bus_stats is not None
+        now_ns = time.perf_counter_ns()
+        self._bus_stats.record_measurement(
+            range_mm, now_ns - self._measurement_start_ns
+        )
+        self._measurement_start_ns = now_ns
+
+    def _record_timeout(self, kind: str) -> None:
+        """
+        データ準備完了待ちのタイムアウトを統計に記録します。
+        """
+        if self._bus_stats is not None:
+            self._bus_stats.record_timeout(kind)
+
+    def read_measurement(self) -> Measurement:
+        """
+        結果ブロックを1回のブロック読み出しで読み、割り込みをクリアします。
+
+        Returns:
+            Measurement: 測距結果 (距離にはオフセットを適用)
+        """
+        block = self._read_result_block()
+        return Measurement(
+            range_mm=((block[10] << 8) | block[11]) - self.offset_mm,
+            range_status=(block[0] & RANGE_STATUS_MASK) >> RANGE_STATUS_SHIFT,
+            # 信号レート・環境光レートは 9.7 固定小数点
+            signal_rate_mcps=((block[6] << 8) | block[7]) / 128,
+            ambient_rate_mcps=((block[8] << 8) | block[9]) / 128,
+            # 有効SPAD数は 8.8 固定小数点
+            effective_spad_count=((block[2] << 8) | block[3]) / 256,
+        )
+
+    def get_measurement(self) -> Measurement:
+        """
+        単一の測距測定を実行し、レンジステータス・信号レート・環境光レートを
+        含む結果を返します。
+
+        連続測距中の場合は、次の測定結果を待って返します。
+        """
+        if not self.continuous:
+            self.start_ranging()
+
+        self._wait_data_ready()
+        return self.read_measurement()
+
+    def get_range(self) -> int:
+        """
+        単一の測距測定を実行し、結果をmm単位で返します。
+
+        連続測距中の場合は、次の測定結果を待って返します。
+        """
+        if not self.continuous:
+            self.start_ranging()
+
+        self._wait_data_ready()
+        return self.read_range()
+
+    def start_continuous(self, period_ms: int = 0) -> None:
+        """
+        連続測距を開始します。
+
+        `period_ms` が 0 の場合は back-to-back モードで、前の測定が終わると
+        すぐに次の測定が始まります。0 より大きい場合はタイムドモードで、
+        センサー自身が `period_ms` 間隔で測定します。
+        結果は `get_range()` または `iter_ranges()` で取得します。
+
+        Args:
+            period_ms (int): 測定間隔 (ms)。0 で back-to-back モード。
+        """
+        if period_ms < 0:
+            raise ValueError(f"period_ms must be >= 0: {period_ms}")
+
+        self._data_ready_event.clear()
+        self._restore_stop_variable()
+        if self._bus_stats is not None:
+            self._measurement_start_ns = time.perf_counter_ns()
+
+        if period_ms > 0:
+            # 内部発振器の補正値で測定間隔をスケーリングする
+            period = period_ms
+            osc_calibrate_val = self.read_word(OSC_CALIBRATE_VAL)
+            if osc_calibrate_val != 0:
+                period *= osc_calibrate_val
+            self.write_dword(SYS_INTERMEASUREMENT_PERIOD, period)
+            self.write_byte(SYSRANGE_START, SYSRANGE_MODE_TIMED)
+        else:
+            self.write_byte(SYSRANGE_START, SYSRANGE_MODE_BACKTOBACK)
+
+        self.inter_measurement_period_ms = period_ms
+        self.continuous = True
+
+    def stop_continuous(self) -> None:
+        """
+        連続測距を停止します。
+        """
+        # 1回のトランザクションで送信
+        self.write_sequence(STOP_CONTINUOUS)
+        self.continuous = False
+        self.inter_measurement_period_ms = 0
+
+    def iter_ranges(
+        self, count: int | None = None, period_ms: int = 0
+    ) -> Iterator[int]:
+        """
+        連続測距の結果を順に返すジェネレーター。
+
+        連続測距中でなければ開始し、終了時に停止します。
+        各測定では、割り込み待ち・結果読み出し・割り込みクリアだけを行います。
+
+        Args:
+            count (int | None): 測定回数。None の場合は無限に続けます。
+            period_ms (int): ここで連続測距を開始する場合の測定間隔 (ms)。
+                0 で back-to-back モード。
+
+        Yields:
+            int: オフセット適用後の距離 (mm)
+        """
+        return self._iter_continuous(self.read_range, count, period_ms)
+
+    def iter_measurements(
+        self, count: int | None = None, period_ms: int = 0
+    ) -> Iterator[Measurement]:
+        """
+        連続測距の結果を `Measurement` で順に返すジェネレーター。
+
+        引数は `iter_ranges()` と同じです。
+        """
+        return self._iter_continuous(self.read_measurement, count, period_ms)
+
+    def _iter_continuous(
+        self, read: Callable[[], T], count: int | None, period_ms: int
+    ) -> Iterator[T]:
+        """
+        連続測距を行い、`read()` の結果を順に返すジェネレーター。
+        """
+        started_here = not self.continuous
+        if started_here:
+            self.start_continuous(period_ms)
+        try:
+            i = 0
+            while count is None or i < count:
+                self._wait_data_ready()
+                yield read()
+                i += 1
+        finally:
+            if started_here:
+                self.stop_continuous()
+
+    def set_interrupt_thresholds(
+        self,
+        low_mm: int,
+        high_mm: int,
+        mode: int = INTERRUPT_OUT_OF_WINDOW,
+    ) -> None:
+        """
+        しきい値割り込みを設定します。
+
+        連続測距と組み合わせると、条件を満たした測定のときだけ割り込み
+        (GPIO1 と `RESULT_INTERRUPT_STATUS`) が発生するので、センサーは
+        最大レートで測定しながら、ホストはまれなイベントだけを処理できます。
+        結果は `wait_event()` または `iter_events()` で取得します。
+
+        しきい値はオフセット適用後の距離で指定し、設定時のオフセットで
+        センサーの距離に変換します。分解能は 2mm です。
+
+        Args:
+            low_mm (int): 下限 (mm)
+            high_mm (int): 上限 (mm)
+            mode (int): `INTERRUPT_LEVEL_LOW` (距離 < low)、
+                `INTERRUPT_LEVEL_HIGH` (距離 > high)、
+                `INTERRUPT_OUT_OF_WINDOW` (low..high の範囲外)
+        """
+        if mode not in INTERRUPT_MODES.values():
+            raise ValueError(f"invalid interrupt mode: {mode}")
+        if low_mm > high_mm:
+            raise ValueError(f"low_mm > high_mm: {low_mm} > {high_mm}")
+
+        with self.batch():
+            self.write_word(SYSTEM_THRESH_LOW, self._threshold_value(low_mm))
+            self.write_word(
+                SYSTEM_THRESH_HIGH, self._threshold_value(high_mm)
+            )
+            self.write_byte(SYSTEM_INTERRUPT_CONFIG_GPIO, mode)
+            self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
+        self._data_ready_event.clear()
+        self.interrupt_mode = mode
+        self.__log.debug(
+            "interrupt mode=%s, low=%smm, high=%smm", mode, low_mm, high_mm
+        )
+
+    def _threshold_value(self, distance_mm: int) -> int:
+        """
+        オフセット適用後の距離を、しきい値レジスタの値に変換します。
+        """
+        value = round((distance_mm + self.offset_mm) / THRESHOLD_UNIT_MM)
+        return min(max(value, 0), THRESHOLD_MASK)
+
+    def clear_interrupt_thresholds(self) -> None:
+        """
+        しきい値割り込みを解除し、新しいサンプルごとの割り込みに戻します。
+        """
+        with self.batch():
+            self.write_byte(
+                SYSTEM_INTERRUPT_CONFIG_GPIO, INTERRUPT_NEW_SAMPLE_READY
+            )
+            self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
+        self._data_ready_event.clear()
+        self.interrupt_mode = INTERRUPT_NEW_SAMPLE_READY
+
+    def wait_event(
+        self, timeout_s: float | None = None
+    ) -> Measurement | None:
+        """
+        連続測距中に割り込み (しきい値割り込みの場合はしきい値の通過) を
+        待ち、その測定結果を返します。
+
+        Args:
+            timeout_s (float | None): タイムアウト時間 (秒)。
+                None の場合は無期限に待ちます。
+
+        Returns:
+            Measurement | None: 測距結果。タイムアウトした場合は None。
+        """
+        if not self.continuous:
+            raise RuntimeError("continuous ranging is not running")
+
+        self._flush_batch()
+        if self.gpio_pin is not None:
+            assert self.pi is not None
+            # クリアしてからレベルを確認することで、エッジを取りこぼさない
+            self._data_ready_event.clear()
+            if self.pi.read(
+                self.gpio_pin
+            ) != 0 and not self._data_ready_event.wait(timeout_s):
+                return None
+            return self.read_measurement()
+
+        deadline = None if timeout_s is None else time.time() + timeout_s
+        while (
+            self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK
+        ) == VALUE_00:
+            if deadline is not None and time.time() > deadline:
+                return None
+            time.sleep(self.poll_interval)
+        return self.read_measurement()
+
+    def iter_events(
+        self,
+        count: int | None = None,
+        period_ms: int = 0,
+        timeout_s: float | None = None,
+    ) -> Iterator[Measurement]:
+        """
+        `wait_event()` の結果を順に返すジェネレーター。
+
+        連続測距中でなければ開始し、終了時に停止します。
+        事前に `set_interrupt_thresholds()` で条件を設定してください。
+
+        Args:
+            count (int | None): イベントの数。None の場合は無限に続けます。
+            period_ms (int): ここで連続測距を開始する場合の測定間隔 (ms)。
+            timeout_s (float | None): 1イベントを待つ時間 (秒)。
+                タイムアウトすると終了します。None の場合は無期限。
+        """
+        started_here = not self.continuous
+        if started_here:
+            self.start_continuous(period_ms)
+        try:
+            i = 0
+            while count is None or i < count:
+                event = self.wait_event(timeout_s)
+                if event is None:
+                    return
+                yield event
+                i += 1
+        finally:
+            if started_here:
+                self.stop_continuous()
+
     def set_offset(self, offset_mm: int) -> None:
         """
         測定値のオフセット(mm)を設定します。
@@ -719,14 +1944,53 @@ class VL53L0X:
         """
         self.offset_mm = offset_mm
 
-    def get_ranges(self, num_samples: int) -> np.ndarray:
+    def get_ranges(
+        self, num_samples: int, out: "np.ndarray | None" = None
+    ) -> "np.ndarray":
         """
         指定されたサンプル数の連続測距を実行し、結果をNumPy配列で返します。
+
+        オフセットは、全サンプルの取得後にまとめて適用します。
+
+        Args:
+            num_samples (int): 測定回数
+            out (np.ndarray | None): 結果を書き込む `RANGE_DTYPE` の配列。
+                繰り返し呼ぶ場合に渡すと、配列を確保し直しません。
+
+        Returns:
+            np.ndarray: `RANGE_DTYPE` の配列 (`out` の先頭 `num_samples` 件)
         """
-        samples = np.empty(num_samples, dtype=np.uint16)
+        import numpy as np
+
+        dtype = range_dtype()
+        if out is None:
+            out = np.empty(num_samples, dtype=dtype)
+        elif out.dtype != dtype or len(out) < num_samples:
+            raise ValueError(
+                f"out must be a RANGE_DTYPE array of length >= {num_samples}"
+            )
+        out = out[:num_samples]
+
+        range_mm = out["range_mm"]
+        timestamp_ns = out["timestamp_ns"]
+        range_status = out["range_status"]
+        signal_rate = out["signal_rate_mcps"]
         for i in range(num_samples):
-            samples[i] = self.get_range()
-        return samples
+            if not self.continuous:
+                self.start_ranging()
+            self._wait_data_ready()
+            block = self._read_result_block()
+            timestamp_ns[i] = time.monotonic_ns()
+            range_mm[i] = (block[10] << 8) | block[11]
+            range_status[i] = (
+                block[0] & RANGE_STATUS_MASK
+            ) >> RANGE_STATUS_SHIFT
+            signal_rate[i] = (block[6] << 8) | block[7]
+
+        # 固定小数点の変換とオフセットは、まとめて適用する
+        signal_rate /= 128
+        range_mm -= self.offset_mm
+        return out
 
     def calibrate(self, target_distance_mm: int, num_samples: int) -> int:
         """
@@ -750,7 +2014,7 @@ class VL53L0X:
         self.set_offset(0)
 
         samples = self.get_ranges(num_samples)
-        measured_distance = int(np.mean(samples))
+        measured_distance = int(samples["range_mm"].mean())
 
         # オフセットを元に戻す
         self.set_offset(current_offset)
@@ -766,14 +2030,157 @@ class VL53L0X:
         """
         I2C接続を閉じます。
         """
-        self.pi.i2c_close(self.handle)
+        if self.continuous:
+            self.stop_continuous()
+        if self._gpio_callback is not None:
+            self._gpio_callback.cancel()
+            self._gpio_callback = None
+        self.transport.close()
+
+    def soft_reset(self) -> None:
+        """
+        ソフトリセットを行い、センサーを再初期化します。
+        """
+        if self.continuous:
+            self.stop_continuous()
+
+        self.write_byte(SOFT_RESET_GO2_SOFT_RESET_N, VALUE_00)
+        self.invalidate_register_cache()
+        self._wait_model_id(lambda model_id: model_id == VALUE_00)
+
+        self.write_byte(SOFT_RESET_GO2_SOFT_RESET_N, VALUE_01)
+        self._wait_model_id(lambda model_id: model_id != VALUE_00)
+
+        self.initialize()
+
+    def _wait_model_id(self, done: Callable[[int], bool]) -> None:
+        """
+        モデルIDレジスタが条件を満たすまで待ちます (ソフトリセット用)。
+        """
+        start = time.time()
+        while not done(self.read_byte(IDENTIFICATION_MODEL_ID)):
+            if time.time() - start > TIMEOUT_LIMIT:
+                raise Exception("Timeout during soft reset")
+            time.sleep(self.poll_interval)
+
+    def invalidate_register_cache(self) -> None:
+        """
+        レジスタのシャドウキャッシュを破棄します。
+        """
+        if self._shadow is not None:
+            self._shadow = {}
+        self._page = 0
+        self._power_force = 0
+
+    def _shadow_store(self, register: int, data: list[int]) -> None:
+        """
+        読み書きした値をシャドウキャッシュに記録します。
+        """
+        if register == REG_FF:
+            self._page = data[0]
+            return
+        if register == REG_80:
+            self._power_force = data[0]
+            return
+        if self._page != 0 or self._power_force != 0:
+            return
+        assert self._shadow is not None
+        for i, value in enumerate(data):
+            if register + i in CACHEABLE_REGISTERS:
+                self._shadow[register + i] = value
+
+    def _shadow_load(self, register: int, count: int) -> list[int] | None:
+        """
+        シャドウキャッシュから値を取り出します。ない場合は None。
+        """
+        if self._page != 0 or self._power_force != 0:
+            return None
+        assert self._shadow is not None
+        try:
+            return [self._shadow[register + i] for i in range(count)]
+        except KeyError:
+            return None
+
+    def enable_stats(self, enabled: bool = True) -> None:
+        """
+        I2C アクセスの統計の集計を開始/停止します。
+
+        停止すると、それまでの統計は破棄されます。
+        """
+        if not enabled:
+            self._bus_stats = None
+        elif self._bus_stats is None:
+            self._bus_stats = BusStats()
+
+    def reset_stats(self) -> None:
+        """
+        I2C アクセスの統計を消去します。
+        """
+        if self._bus_stats is not None:
+            self._bus_stats.reset()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        I2C アクセスの統計を返します。
+
+        Returns:
+            dict[str, Any]: `BusStats.snapshot()` の結果。
+                集計していない場合は空の辞書。
+        """
+        if self._bus_stats is None:
+            return {}
+        return self._bus_stats.snapshot()
+
+    def _timed_call(
+        self,
+        op: str,
+        register: int | None,
+        nbytes: int,
+        func: Callable[..., T],
+        *args: Any,
+    ) -> T:
+        """
+        トランスポートの関数を呼び出し、所要時間を統計に記録します。
+        """
+        assert self._bus_stats is not None
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args)
+        except (pigpio.error, OSError):
+            self._bus_stats.record_error(op, register)
+            raise
+        self._bus_stats.record(
+            op, register, nbytes, time.perf_counter_ns() - start
+        )
+        return result
+
+    def _count_batch_read(self) -> None:
+        """
+        バッチ内の読み出し(1ラウンドトリップ)を統計に加えます。
+        """
+        self.batch_stats["ops"] += 1
+        self.batch_stats["transactions"] += 1
 
     def read_byte(self, register: int) -> int:
         """
         レジスタから1バイト読み取ります。
         """
-        value = self.pi.i2c_read_byte_data(self.handle, register)
+        if self._shadow is not None:
+            cached = self._shadow_load(register, 1)
+            if cached is not None:
+                return cached[0]
+        if self._batch_depth:
+            self._flush_batch()
+            self._count_batch_read()
+        if self._bus_stats is None:
+            value = self.transport.read_byte(register)
+        else:
+            value = self._timed_call(
+                "read_byte", register, 1, self.transport.read_byte, register
+            )
         # self.__log.debug("レジスタ %s からバイトを読み取り: %s", hex(register), hex(value))
+        if self._shadow is not None:
+            self._shadow_store(register, [int(value)])
         return int(value)
 
     def write_byte(self, register: int, value: int) -> None:
@@ -781,39 +2188,141 @@ class VL53L0X:
         レジスタに1バイト書き込みます。
         """
         # self.__log.debug("レジスタ %s にバイトを書き込み: %s", hex(register), hex(value))
-        self.pi.i2c_write_byte_data(self.handle, register, value)
+        if self._shadow is not None:
+            self._shadow_store(register, [value])
+        if self._batch_depth:
+            self._queue_write(register, [value])
+            return
+        if self._bus_stats is None:
+            self.transport.write_byte(register, value)
+            return
+        self._timed_call(
+            "write_byte",
+            register,
+            1,
+            self.transport.write_byte,
+            register,
+            value,
+        )
 
     def read_word(self, register: int) -> int:
         """
         レジスタから1ワード読み取ります。
         """
-        val = self.pi.i2c_read_word_data(self.handle, register)
-        # pigpioはリトルエンディアンで読み取りますが、VL53L0Xはビッグエンディアンです。
-        value = ((val & 0xFF) << 8) | (val >> 8)
+        if self._shadow is not None:
+            cached = self._shadow_load(register, 2)
+            if cached is not None:
+                return (cached[0] << 8) | cached[1]
+        if self._batch_depth:
+            self._flush_batch()
+            self._count_batch_read()
+        if self._bus_stats is None:
+            value = self.transport.read_word(register)
+        else:
+            value = self._timed_call(
+                "read_word", register, 2, self.transport.read_word, register
+            )
         # self.__log.debug("レジスタ %s からワードを読み取り: %s", hex(register), hex(value))
+        if self._shadow is not None:
+            self._shadow_store(register, [value >> 8, value & 0xFF])
         return int(value)
 
     def write_word(self, register: int, value: int) -> None:
         """
         レジスタに1ワード書き込みます。
         """
-        # pigpioはリトルエンディアンで書き込みますが、VL53L0Xはビッグエンディアンです。
-        value = ((value & 0xFF) << 8) | (value >> 8)
-        self.pi.i2c_write_word_data(self.handle, register, value)
+        if self._shadow is not None:
+            self._shadow_store(register, [(value >> 8) & 0xFF, value & 0xFF])
+        if self._batch_depth:
+            self._queue_write(register, [(value >> 8) & 0xFF, value & 0xFF])
+            return
+        if self._bus_stats is None:
+            self.transport.write_word(register, value)
+            return
+        self._timed_call(
+            "write_word",
+            register,
+            2,
+            self.transport.write_word,
+            register,
+            value,
+        )
+
+    def write_dword(self, register: int, value: int) -> None:
+        """
+        レジスタに4バイト(ビッグエンディアン)書き込みます。
+        """
+        self.write_block(
+            register,
+            [
+                (value >> 24) & 0xFF,
+                (value >> 16) & 0xFF,
+                (value >> 8) & 0xFF,
+                value & 0xFF,
+            ],
+        )
 
     def read_block(self, register: int, count: int) -> list[int]:
         """
         レジスタからデータのブロックを読み取ります。
         """
-        _, data = self.pi.i2c_read_i2c_block_data(
-            self.handle, register, count
+        if self._batch_depth:
+            self._flush_batch()
+            self._count_batch_read()
+        if self._bus_stats is None:
+            return self.transport.read_block(register, count)
+        return self._timed_call(
+            "read_block",
+            register,
+            count,
+            self.transport.read_block,
+            register,
+            count,
         )
-        if isinstance(data, bytearray):
-            return list(data)
-        return []
 
     def write_block(self, register: int, data: list[int]) -> None:
         """
         レジスタにデータのブロックを書き込みます。
         """
-        self.pi.i2c_write_i2c_block_data(self.handle, register, data)
+        if self._shadow is not None:
+            self._shadow_store(register, list(data))
+        if self._batch_depth:
+            self._queue_write(register, list(data))
+            return
+        if self._bus_stats is None:
+            self.transport.write_block(register, data)
+            return
+        self._timed_call(
+            "write_block",
+            register,
+            len(data),
+            self.transport.write_block,
+            register,
+            data,
+        )
+
+    def write_sequence(self, sequence: Sequence[Step], **params: int) -> None:
+        """
+        レジスタ書き込みのテーブル (`vl53l0x_pigpio.regseq`) を書き込みます。
+
+        連続するレジスタをまとめてから、1回のトランザクションで送信します
+        (バッチ内ならキューに追加)。シャドウキャッシュが有効な場合は
+        今のページを渡すので、今と同じページへの切り替えも省きます。
+
+        Args:
+            sequence (Sequence[Step]): `(register, value)` のシーケンス
+            **params (int): テーブル中の名前の値 (`stop_variable` など)
+        """
+        # シャドウキャッシュが有効な場合だけ、今のページ (REG_FF) がわかる
+        page = self._page if self._shadow is not None else None
+        compiled = compile_sequence(
+            sequence, params, page=page, max_len=ZIP_MAX_WRITE_LEN
+        )
+        with self.batch():
+            # 統計は元の書き込み数で数える
+            self.batch_stats["ops"] += compiled.steps - len(compiled.segments)
+            for segment in compiled.segments:
+                data = list(segment[1:])
+                if self._shadow is not None:
+                    self._shadow_store(segment[0], data)
+                self._queue_write(segment[0], data)
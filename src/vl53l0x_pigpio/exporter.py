@@ -0,0 +1,244 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+センサーの統計を Prometheus のテキスト形式で公開するモジュール。
+
+HTTP エンドポイント (`serve()`) と、node_exporter の textfile collector 用の
+ファイル書き出し (`write_textfile()`) に対応します。
+外部ライブラリは使いません。
+
+```python
+with VL53L0X(pi, collect_stats=True) as sensor:
+    exporter = MetricsExporter([sensor])
+    exporter.serve(9101)
+    for distance in sensor.iter_ranges():
+        ...
+```
+"""
+
+import os
+import threading
+from collections.abc import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from .driver import VL53L0X
+from .my_logger import get_logger
+from .stats import (
+    MEASUREMENT_BUCKETS_S,
+    TIMEOUT_MEASUREMENT,
+    TIMEOUT_REF_CALIBRATION,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_PATH = "/metrics"
+
+
+def _sensor_label(sensor: VL53L0X) -> str:
+    return f'sensor="0x{sensor.i2c_address:02x}"'
+
+
+class MetricsExporter:
+    """
+    `VL53L0X` の統計 (`stats()`) を Prometheus のメトリクスにします。
+
+    統計を集計していないセンサーは、ここで集計を開始します
+    (初期化中のリファレンスキャリブレーションのタイムアウトも数える場合は、
+    コンストラクタで `collect_stats=True` を指定してください)。
+    """
+
+    def __init__(self, sensors: Iterable[VL53L0X], debug: bool = False):
+        """
+        Args:
+            sensors (Iterable[VL53L0X]): 対象のセンサー
+            debug (bool): デバッグフラグ
+        """
+        self.__log = get_logger(self.__class__.__name__, debug)
+        self.sensors = list(sensors)
+        for sensor in self.sensors:
+            sensor.enable_stats()
+
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def render(self) -> str:
+        """
+        全センサーのメトリクスを Prometheus のテキスト形式で返します。
+        """
+        stats = [sensor.stats() for sensor in self.sensors]
+        labels = [_sensor_label(sensor) for sensor in self.sensors]
+        lines: list[str] = []
+
+        def metric(
+            name: str, kind: str, help_text: str, values: list[str]
+        ) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(values)
+
+        def per_sensor(name: str, key: Any) -> list[str]:
+            return [
+                f"{name}{{{label}}} {key(s)}"
+                for label, s in zip(labels, stats, strict=True)
+            ]
+
+        metric(
+            "vl53l0x_measurements_total",
+            "counter",
+            "Number of measurement results read.",
+            per_sensor(
+                "vl53l0x_measurements_total",
+                lambda s: s["measurements"]["count"],
+            ),
+        )
+        histogram: list[str] = []
+        name = "vl53l0x_measurement_latency_seconds"
+        for label, s in zip(labels, stats, strict=True):
+            cumulative = 0
+            buckets = [str(b) for b in MEASUREMENT_BUCKETS_S] + ["+Inf"]
+            counts = s["measurements"]["histogram"].values()
+            for le, n in zip(buckets, counts, strict=True):
+                cumulative += n
+                histogram.append(
+                    f'{name}_bucket{{{label},le="{le}"}} {cumulative}'
+                )
+            histogram.append(
+                f"{name}_sum{{{label}}} {s['measurements']['time_s']}"
+            )
+            histogram.append(f"{name}_count{{{label}}} {cumulative}")
+        metric(
+            name,
+            "histogram",
+            "Time from measurement start to result readout.",
+            histogram,
+        )
+
+        metric(
+            "vl53l0x_timeouts_total",
+            "counter",
+            "Timeouts while waiting for data ready.",
+            [
+                f'vl53l0x_timeouts_total{{{label},kind="{kind}"}} '
+                f"{s['timeouts'].get(kind, 0)}"
+                for label, s in zip(labels, stats, strict=True)
+                for kind in (TIMEOUT_MEASUREMENT, TIMEOUT_REF_CALIBRATION)
+            ],
+        )
+        metric(
+            "vl53l0x_i2c_errors_total",
+            "counter",
+            "Failed I2C transactions.",
+            per_sensor("vl53l0x_i2c_errors_total", lambda s: s["errors"]),
+        )
+        metric(
+            "vl53l0x_i2c_transactions_total",
+            "counter",
+            "Successful I2C transactions.",
+            per_sensor(
+                "vl53l0x_i2c_transactions_total",
+                lambda s: s["transactions"],
+            ),
+        )
+        metric(
+            "vl53l0x_i2c_bus_seconds_total",
+            "counter",
+            "Cumulative time spent in I2C transactions.",
+            per_sensor(
+                "vl53l0x_i2c_bus_seconds_total", lambda s: s["bus_time_s"]
+            ),
+        )
+
+        # まだ測定していないセンサーは出力しない
+        measured = [
+            (label, s)
+            for label, s in zip(labels, stats, strict=True)
+            if s["measurements"]["last_range_mm"] is not None
+        ]
+        metric(
+            "vl53l0x_last_range_mm",
+            "gauge",
+            "Last measured distance in millimeters.",
+            [
+                f"vl53l0x_last_range_mm{{{label}}} "
+                f"{s['measurements']['last_range_mm']}"
+                for label, s in measured
+            ],
+        )
+        metric(
+            "vl53l0x_last_measurement_timestamp_seconds",
+            "gauge",
+            "Unix time of the last measurement.",
+            [
+                f"vl53l0x_last_measurement_timestamp_seconds{{{label}}} "
+                f"{s['measurements']['last_time']:.3f}"
+                for label, s in measured
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path | str) -> None:
+        """
+        メトリクスを node_exporter の textfile collector 用のファイルに
+        書き出します。読み出し途中のファイルが見えないよう、
+        一時ファイルに書いてから置き換えます。
+        """
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, addr: str = "") -> None:
+        """
+        `METRICS_PATH` でメトリクスを返す HTTP サーバーを、
+        バックグラウンドのスレッドで開始します。
+        """
+        if self._server is not None:
+            raise RuntimeError("already serving")
+        exporter = self
+        log = self.__log
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                log.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((addr, port), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        self.__log.debug("serving metrics on port %s", self.port)
+
+    @property
+    def port(self) -> int | None:
+        """
+        HTTP サーバーのポート番号。動いていない場合は None。
+        """
+        if self._server is None:
+            return None
+        return int(self._server.server_address[1])
+
+    def shutdown(self) -> None:
+        """
+        HTTP サーバーを停止します。
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._server = None
+        self._thread = None
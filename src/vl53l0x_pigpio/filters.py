@@ -0,0 +1,389 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+測距結果のストリームに掛けるフィルター。
+
+`FilterPipeline` にフィルターを並べ、`get_ranges()` の配列、
+`iter_ranges()` などのイテレーター、`BackgroundSampler.snapshot()` の
+どれにでも掛けられます。状態はバッチをまたいで引き継ぎます。
+
+```python
+from vl53l0x_pigpio.filters import FilterPipeline, MedianFilter, StatusGate
+
+pipeline = FilterPipeline(StatusGate(), MedianFilter(5))
+while True:
+    smoothed = pipeline.process(sensor.get_ranges(32, out=out))
+```
+"""
+
+import math
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from .driver import RANGE_STATUS_VALID, Measurement
+
+
+class RangeFilter:
+    """
+    フィルターの基底クラス。
+
+    最初の有限値 (`StatusGate` の前の NaN 以外) で状態を初期化し、
+    それより前は NaN を出力します。
+    """
+
+    def __init__(self) -> None:
+        self._started = False
+
+    def reset(self) -> None:
+        """
+        状態を初期化します。
+        """
+        self._started = False
+
+    def process(
+        self,
+        values: np.ndarray,
+        status: np.ndarray | None = None,
+        timestamp_ns: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        値の配列にフィルターを掛けます。
+
+        Args:
+            values (np.ndarray): 距離 (mm)
+            status (np.ndarray | None): レンジステータス
+            timestamp_ns (np.ndarray | None): タイムスタンプ (ns)
+
+        Returns:
+            np.ndarray: フィルター後の値 (float64、`values` と同じ長さ)
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if self._started or len(x) == 0:
+            return self._process(x, status, timestamp_ns)
+
+        finite = np.flatnonzero(np.isfinite(x))
+        if len(finite) == 0:
+            return np.full(len(x), np.nan)
+        first = int(finite[0])
+        self._start(x[first])
+        self._started = True
+        if first == 0:
+            return self._process(x, status, timestamp_ns)
+
+        out = np.full(len(x), np.nan)
+        out[first:] = self._process(
+            x[first:],
+            None if status is None else status[first:],
+            None if timestamp_ns is None else timestamp_ns[first:],
+        )
+        return out
+
+    def _start(self, x0: float) -> None:
+        pass
+
+    def _process(
+        self,
+        x: np.ndarray,
+        status: np.ndarray | None,
+        timestamp_ns: np.ndarray | None,
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+
+class StatusGate(RangeFilter):
+    """
+    レンジステータスが有効でないサンプルを、直前の有効な値で置き換えます。
+    最初の有効なサンプルより前は NaN になります。
+    """
+
+    def __init__(self, valid_statuses: Iterable[int] = (RANGE_STATUS_VALID,)):
+        """
+        Args:
+            valid_statuses (Iterable[int]): 有効とするレンジステータス
+        """
+        super().__init__()
+        self.valid_statuses = np.array(sorted(valid_statuses))
+        self._last = math.nan
+
+    def reset(self) -> None:
+        super().reset()
+        self._last = math.nan
+
+    def process(
+        self,
+        values: np.ndarray,
+        status: np.ndarray | None = None,
+        timestamp_ns: np.ndarray | None = None,
+    ) -> np.ndarray:
+        x = np.asarray(values, dtype=np.float64)
+        if status is None or len(x) == 0:
+            return x.copy()
+
+        valid = np.isin(status, self.valid_statuses)
+        # 各位置で直前の有効なサンプルの位置 (なければ -1) を求めて前方埋め
+        index = np.where(valid, np.arange(len(x)), -1)
+        np.maximum.accumulate(index, out=index)
+        out = np.where(index >= 0, x[index], self._last)
+        self._last = float(out[-1])
+        return out
+
+
+class MedianFilter(RangeFilter):
+    """
+    直近 `window` 件の移動中央値。
+
+    前回のバッチの末尾 `window - 1` 件を、事前に確保したバッファに
+    保持します。最初は最初の値で埋めた状態から始めます。
+    """
+
+    def __init__(self, window: int = 5):
+        """
+        Args:
+            window (int): 窓の大きさ
+        """
+        if window <= 0:
+            raise ValueError(f"window must be > 0: {window}")
+        super().__init__()
+        self.window = window
+        self._buffer = np.empty(window - 1 + 64, dtype=np.float64)
+
+    def _start(self, x0: float) -> None:
+        self._buffer[: self.window - 1] = x0
+
+    def _process(
+        self,
+        x: np.ndarray,
+        status: np.ndarray | None,
+        timestamp_ns: np.ndarray | None,
+    ) -> np.ndarray:
+        history = self.window - 1
+        size = history + len(x)
+        if size > len(self._buffer):
+            buffer = np.empty(size, dtype=np.float64)
+            buffer[:history] = self._buffer[:history]
+            self._buffer = buffer
+
+        work = self._buffer[:size]
+        work[history:] = x
+        windows = np.lib.stride_tricks.sliding_window_view(work, self.window)
+        out = np.median(windows, axis=1)
+        # 次のバッチのために末尾を先頭に移す
+        work[:history] = work[size - history :].copy()
+        return out
+
+
+class EMAFilter(RangeFilter):
+    """
+    指数移動平均 y[n] = alpha * x[n] + (1 - alpha) * y[n - 1]。
+
+    漸化式を閉じた形 (累積和) で計算し、ループを使いません。
+    桁あふれしないよう、長いバッチは分割して計算します。
+    """
+
+    # 分割する長さの目安: (1 - alpha) ** -L がこの値を超えないようにする
+    MAX_GROWTH_LOG = 30.0
+
+    def __init__(self, alpha: float = 0.2):
+        """
+        Args:
+            alpha (float): 平滑化係数 (0 < alpha <= 1)。
+                大きいほど新しい値を重視します。
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError(f"alpha must be in (0, 1]: {alpha}")
+        super().__init__()
+        self.alpha = alpha
+        self._y = 0.0
+
+        if alpha == 1:
+            # 入力をそのまま出力する (累積和の式は 0 で割るので使わない)
+            chunk = 1
+        else:
+            chunk = max(1, int(self.MAX_GROWTH_LOG / -math.log(1 - alpha)))
+        # (1 - alpha) ** k (k = 1..chunk)
+        self._powers = (1 - alpha) ** np.arange(1, chunk + 1)
+
+    def _start(self, x0: float) -> None:
+        self._y = x0
+
+    def _process(
+        self,
+        x: np.ndarray,
+        status: np.ndarray | None,
+        timestamp_ns: np.ndarray | None,
+    ) -> np.ndarray:
+        if self.alpha == 1:
+            if len(x):
+                self._y = float(x[-1])
+            return x.copy()
+
+        out = np.empty(len(x), dtype=np.float64)
+        chunk = len(self._powers)
+        for start in range(0, len(x), chunk):
+            xs = x[start : start + chunk]
+            p = self._powers[: len(xs)]
+            # y[n] = p[n] * (y0 + alpha * sum(x[k] / p[k], k <= n))
+            ys = out[start : start + len(xs)]
+            np.divide(xs, p, out=ys)
+            np.cumsum(ys, out=ys)
+            ys *= self.alpha
+            ys += self._y
+            ys *= p
+            self._y = float(ys[-1])
+        return out
+
+
+class KalmanFilter(RangeFilter):
+    """
+    1次元の等速度モデルのカルマンフィルター (状態: 距離と速度)。
+
+    サンプル間隔はタイムスタンプから求め、ない場合は `dt` を使います。
+    逐次処理なのでサンプルごとのループですが、状態はスカラーで持ち、
+    配列の確保は出力の1回だけです。
+    """
+
+    def __init__(
+        self,
+        process_noise: float = 1000.0,
+        measurement_noise: float = 25.0,
+        dt: float = 0.033,
+    ):
+        """
+        Args:
+            process_noise (float): 加速度の分散 ((mm/s^2)^2)
+            measurement_noise (float): 測定値の分散 (mm^2)
+            dt (float): タイムスタンプがない場合のサンプル間隔 (秒)
+        """
+        super().__init__()
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.dt = dt
+        self._start(0.0)
+
+    def _start(self, x0: float) -> None:
+        self.position = x0
+        self.velocity = 0.0
+        # 共分散行列 [[p00, p01], [p01, p11]]
+        self._p = (self.measurement_noise, 0.0, 1e6)
+        self._last_ns: int | None = None
+
+    def _process(
+        self,
+        x: np.ndarray,
+        status: np.ndarray | None,
+        timestamp_ns: np.ndarray | None,
+    ) -> np.ndarray:
+        out = np.empty(len(x), dtype=np.float64)
+        pos, vel = self.position, self.velocity
+        p00, p01, p11 = self._p
+        q, r = self.process_noise, self.measurement_noise
+        last_ns = self._last_ns
+
+        for i in range(len(x)):
+            dt = self.dt
+            if timestamp_ns is not None:
+                ts = int(timestamp_ns[i])
+                if last_ns is not None and ts > last_ns:
+                    dt = (ts - last_ns) / 1e9
+                last_ns = ts
+
+            # 予測
+            pos += vel * dt
+            dt2 = dt * dt
+            p00 += dt * (2 * p01 + dt * p11) + q * dt2 * dt2 / 4
+            p01 += dt * p11 + q * dt2 * dt / 2
+            p11 += q * dt2
+
+            # 更新 (NaN の測定値は予測のみ)
+            z = x[i]
+            if not math.isnan(z):
+                s = p00 + r
+                k0 = p00 / s
+                k1 = p01 / s
+                innovation = z - pos
+                pos += k0 * innovation
+                vel += k1 * innovation
+                p11 -= k1 * p01
+                p01 -= k0 * p01
+                p00 -= k0 * p00
+            out[i] = pos
+
+        self.position, self.velocity = pos, vel
+        self._p = (p00, p01, p11)
+        self._last_ns = last_ns
+        return out
+
+
+class FilterPipeline:
+    """
+    フィルターを順に掛けるパイプライン。
+    """
+
+    def __init__(self, *stages: RangeFilter):
+        """
+        Args:
+            *stages (RangeFilter): 掛ける順のフィルター
+        """
+        self.stages = list(stages)
+
+    def reset(self) -> None:
+        """
+        すべてのフィルターの状態を初期化します。
+        """
+        for stage in self.stages:
+            stage.reset()
+
+    def process(
+        self,
+        data: np.ndarray,
+        status: np.ndarray | None = None,
+        timestamp_ns: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        バッチにフィルターを掛けます。
+
+        Args:
+            data (np.ndarray): 距離の配列、または `RANGE_DTYPE`・
+                `SAMPLE_DTYPE` の構造化配列 (ステータスとタイムスタンプも
+                そこから取ります)
+            status (np.ndarray | None): レンジステータス
+            timestamp_ns (np.ndarray | None): タイムスタンプ (ns)
+
+        Returns:
+            np.ndarray: フィルター後の距離 (float64)
+        """
+        names = data.dtype.names
+        if names is not None:
+            for name in ("range_status", "status"):
+                if status is None and name in names:
+                    status = data[name]
+            if timestamp_ns is None and "timestamp_ns" in names:
+                timestamp_ns = data["timestamp_ns"]
+            data = data["range_mm"]
+
+        values = np.asarray(data, dtype=np.float64)
+        for stage in self.stages:
+            values = stage.process(values, status, timestamp_ns)
+        return values
+
+    def filter_iter(
+        self, samples: Iterable[int | Measurement]
+    ) -> Iterator[float]:
+        """
+        `iter_ranges()` や `iter_measurements()` の結果に1件ずつ
+        フィルターを掛けるジェネレーター。
+
+        `Measurement` の場合はレンジステータスも使います。
+        """
+        values = np.empty(1, dtype=np.float64)
+        status = np.empty(1, dtype=np.uint8)
+        for sample in samples:
+            if isinstance(sample, Measurement):
+                values[0] = sample.range_mm
+                status[0] = sample.range_status
+                yield float(self.process(values, status)[0])
+            else:
+                values[0] = sample
+                yield float(self.process(values)[0])
@@ -0,0 +1,265 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""複数のVL53L0Xを1つのI2Cバスで使うためのモジュール。"""
+
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pigpio
+
+from .driver import I2C_SLAVE_DEVICE_ADDRESS, VL53L0X
+from .my_logger import get_logger
+from .stats import TIMEOUT_MEASUREMENT
+
+DEFAULT_I2C_ADDRESS = 0x29
+FIRST_ASSIGNED_ADDRESS = 0x30
+BOOT_TIME_S = 0.002  # XSHUT 解除後の起動時間 (データシート: 最大1.2ms)
+
+
+class VL53L0XArray:
+    """
+    XSHUT ピンで複数の VL53L0X を順に起動し、
+    I2Cアドレスを割り当ててから並行して初期化します。
+    """
+
+    def __init__(
+        self,
+        pi: pigpio.pi,
+        xshut_pins: list[int],
+        addresses: list[int] | None = None,
+        i2c_bus: int = 1,
+        debug: bool = False,
+        config_file_path: Path | None = None,
+        gpio_pins: list[int | None] | None = None,
+        poll_interval: float = 0.001,
+        warm_start: bool = False,
+        max_workers: int | None = None,
+        profile: str | None = None,
+    ):
+        """
+        Args:
+            pi (pigpio.pi): pigpio の接続インスタンス
+            xshut_pins (list[int]): 各センサーの XSHUT を接続した GPIO 番号
+            addresses (list[int] | None): 割り当てる I2C アドレス。
+                None の場合は 0x30 から順に割り当てます。
+            i2c_bus (int): I2C バス番号
+            debug (bool): デバッグフラグ
+            config_file_path (Path | None): 各センサーに渡す設定ファイル
+            gpio_pins (list[int | None] | None): 各センサーの GPIO1 の
+                GPIO 番号
+            poll_interval (float): ポーリング間隔 (秒)
+            warm_start (bool): ウォームスタートを有効にするか
+            max_workers (int | None): 初期化を並行して行うスレッド数。
+                None の場合はセンサー数。
+            profile (str | None): 各センサーに適用する測定プロファイル
+        """
+        self.__log = get_logger(self.__class__.__name__, debug)
+
+        if addresses is None:
+            addresses = [
+                FIRST_ASSIGNED_ADDRESS + i for i in range(len(xshut_pins))
+            ]
+        if gpio_pins is None:
+            gpio_pins = [None] * len(xshut_pins)
+        if not (len(xshut_pins) == len(addresses) == len(gpio_pins)):
+            raise ValueError(
+                "xshut_pins, addresses and gpio_pins "
+                "must have the same length"
+            )
+        if len(set(addresses)) != len(addresses):
+            raise ValueError(f"duplicate addresses: {addresses}")
+
+        self.pi = pi
+        self.i2c_bus = i2c_bus
+        self.xshut_pins = list(xshut_pins)
+        self.addresses = list(addresses)
+        self.sensors: list[VL53L0X] = []
+
+        # 全センサーをシャットダウンしてから、1台ずつ起動してアドレスを変更
+        self._shutdown_all()
+        for pin, address in zip(self.xshut_pins, self.addresses):
+            self._release_and_set_address(pin, address)
+
+        # 初期化は待ち時間が長いので、スレッドで並行して行う
+        workers = max_workers or len(self.addresses) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    VL53L0X,
+                    pi,
+                    i2c_bus=i2c_bus,
+                    i2c_address=address,
+                    debug=debug,
+                    config_file_path=config_file_path,
+                    gpio_pin=gpio_pin,
+                    poll_interval=poll_interval,
+                    warm_start=warm_start,
+                    profile=profile,
+                )
+                for address, gpio_pin in zip(self.addresses, gpio_pins)
+            ]
+
+        errors: list[BaseException] = []
+        for future in futures:
+            exc = future.exception()
+            if exc is not None:
+                errors.append(exc)
+            else:
+                self.sensors.append(future.result())
+        if errors:
+            self.close()
+            raise errors[0]
+
+        self.__log.debug(
+            "%s sensors ready: %s",
+            len(self.sensors),
+            [hex(a) for a in self.addresses],
+        )
+
+    def _shutdown_all(self) -> None:
+        """
+        全センサーの XSHUT を L にしてシャットダウンします。
+        """
+        for pin in self.xshut_pins:
+            self.pi.set_mode(pin, pigpio.OUTPUT)
+            self.pi.write(pin, 0)
+        time.sleep(BOOT_TIME_S)
+
+    def _release_and_set_address(self, pin: int, address: int) -> None:
+        """
+        XSHUT を解除し、デフォルトアドレスで起動したセンサーの
+        I2C アドレスを変更します。
+        """
+        self.pi.write(pin, 1)
+        time.sleep(BOOT_TIME_S)
+        if address == DEFAULT_I2C_ADDRESS:
+            return
+
+        handle = self.pi.i2c_open(self.i2c_bus, DEFAULT_I2C_ADDRESS)
+        try:
+            self.pi.i2c_write_byte_data(
+                handle, I2C_SLAVE_DEVICE_ADDRESS, address & 0x7F
+            )
+        finally:
+            self.pi.i2c_close(handle)
+        self.__log.debug("xshut_pin=%s: address=%s", pin, hex(address))
+
+    def __enter__(self) -> "VL53L0XArray":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type | None,
+        exc_val: Exception | None,
+        exc_tb: type | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.sensors)
+
+    def __getitem__(self, index: int) -> VL53L0X:
+        return self.sensors[index]
+
+    def __iter__(self) -> Iterator[VL53L0X]:
+        return iter(self.sensors)
+
+    def close(self) -> None:
+        """
+        全センサーの I2C 接続を閉じます。
+        """
+        for sensor in self.sensors:
+            sensor.close()
+        self.sensors = []
+
+
+class RangingScheduler:
+    """
+    同じバス上の複数の VL53L0X で測定を重ねて行うスケジューラー。
+
+    全センサーの測定を先に開始し、完了したセンサーから順に結果を読み出します。
+    1サイクルの時間は、ほぼ「タイミングバジェット1回分 + 読み出しN回分」に
+    なります。
+    """
+
+    def __init__(
+        self,
+        sensors: Iterable[VL53L0X],
+        poll_interval: float = 0.001,
+        timeout_s: float | None = None,
+    ):
+        """
+        Args:
+            sensors (Iterable[VL53L0X]): 対象のセンサー (`VL53L0XArray` も可)
+            poll_interval (float): 完了確認の間隔 (秒)
+            timeout_s (float | None): 1サイクルのタイムアウト時間 (秒)。
+                None の場合は各センサーのタイミングバジェットから決めます。
+        """
+        self.sensors = list(sensors)
+        self.poll_interval = poll_interval
+        self.timeout_s = timeout_s
+
+    def cycle(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        全センサーで1回ずつ測定し、結果を返します。
+
+        Args:
+            out (np.ndarray | None): 結果を書き込む `(n_sensors,)` の配列。
+
+        Returns:
+            np.ndarray: 各センサーの距離 (mm) の `(n_sensors,)` 配列
+        """
+        if out is None:
+            out = np.empty(len(self.sensors), dtype=np.int32)
+
+        timeout_s = self.timeout_s
+        if timeout_s is None:
+            timeout_s = max(
+                (s._measurement_timeout_s() for s in self.sensors),
+                default=1.0,
+            )
+
+        # 全センサーの測定を先に開始する
+        for sensor in self.sensors:
+            sensor.start_ranging()
+
+        # 完了したセンサーから順に読み出す
+        pending = list(range(len(self.sensors)))
+        start = time.time()
+        while pending:
+            for i in list(pending):
+                sensor = self.sensors[i]
+                if sensor.is_data_ready():
+                    out[i] = sensor.read_range()
+                    pending.remove(i)
+            if not pending:
+                break
+            if time.time() - start > timeout_s:
+                for i in pending:
+                    self.sensors[i]._record_timeout(TIMEOUT_MEASUREMENT)
+                raise Exception(
+                    "Timeout waiting for measurement ready: "
+                    f"{[hex(self.sensors[i].i2c_address) for i in pending]}"
+                )
+            time.sleep(self.poll_interval)
+
+        return out
+
+    def iter_cycles(self, count: int | None = None) -> Iterator[np.ndarray]:
+        """
+        `cycle()` を繰り返し、各サイクルの結果を返すジェネレーター。
+
+        Args:
+            count (int | None): サイクル数。None の場合は無限に続けます。
+
+        Yields:
+            np.ndarray: 各センサーの距離 (mm) の `(n_sensors,)` 配列
+        """
+        i = 0
+        while count is None or i < count:
+            yield self.cycle()
+            i += 1
@@ -0,0 +1,279 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+測定結果を追記専用のバイナリファイルに記録するモジュール。
+
+セッションはディレクトリで、`RANGE_DTYPE` の固定長レコードを並べた
+セグメントファイル (`seg-000000.rec`, ...) と、セグメントの一覧・時刻範囲を
+書いたインデックス (`index.json`) からなります。
+セグメントはヘッダーを持たないので、`np.memmap` でそのまま読めます。
+
+```python
+import numpy as np
+from vl53l0x_pigpio.driver import RANGE_DTYPE
+
+data = np.memmap("session/seg-000000.rec", dtype=RANGE_DTYPE, mode="r")
+```
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from .driver import range_dtype
+from .my_logger import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+INDEX_FILE_NAME = "index.json"
+SEGMENT_SUFFIX = ".rec"
+INDEX_VERSION = 1
+
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SEGMENT_S = 3600.0
+DEFAULT_FSYNC_INTERVAL_S = 1.0
+
+
+def segment_name(seq: int) -> str:
+    return f"seg-{seq:06d}{SEGMENT_SUFFIX}"
+
+
+def index_dtype(index: dict[str, Any]) -> "np.dtype":
+    """
+    インデックスに保存したレコードの dtype。
+    """
+    import numpy as np
+
+    return np.dtype([tuple(field) for field in index["dtype"]])
+
+
+def load_index(directory: Path | str) -> dict[str, Any]:
+    """
+    セッションのインデックスを読み込みます。
+
+    最後のセグメントは記録中 (または異常終了) で、インデックスの件数が
+    古い場合があるので、ファイルサイズから件数を数え直します。
+    """
+    import numpy as np
+
+    directory = Path(directory)
+    with open(directory / INDEX_FILE_NAME, "r", encoding="utf-8") as f:
+        index: dict[str, Any] = json.load(f)
+
+    dtype = index_dtype(index)
+    for segment in index["segments"]:
+        path = directory / segment["name"]
+        count = path.stat().st_size // dtype.itemsize if path.exists() else 0
+        if count != segment["count"]:
+            segment["count"] = count
+            if count > 0:
+                data = np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+                segment["first_ns"] = int(data["timestamp_ns"][0])
+                segment["last_ns"] = int(data["timestamp_ns"][-1])
+    return index
+
+
+def segment_metadata(
+    index: dict[str, Any], segment: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    セグメントを記録したときの情報 (`offset_mm` など)。
+
+    セグメントごとの情報がないセッションでは、インデックスの `metadata`。
+    """
+    if "metadata" in segment:
+        return dict(segment["metadata"])
+    return dict(index.get("metadata", {}))
+
+
+def open_segments(directory: Path | str) -> "list[np.memmap]":
+    """
+    セッションのセグメントを `np.memmap` で開きます (空のセグメントは除く)。
+    """
+    import numpy as np
+
+    directory = Path(directory)
+    index = load_index(directory)
+    dtype = index_dtype(index)
+    return [
+        np.memmap(
+            directory / segment["name"],
+            dtype=dtype,
+            mode="r",
+            shape=(segment["count"],),
+        )
+        for segment in index["segments"]
+        if segment["count"] > 0
+    ]
+
+
+class SessionWriter:
+    """
+    `RANGE_DTYPE` の配列をセッションディレクトリに追記します。
+
+    セグメントはサイズまたは経過時間でローテーションし、
+    `fsync()` は `fsync_interval_s` ごとにまとめて行います。
+    インデックスはセグメントの開始・終了時に書き直します
+    (一時ファイルに書いてから置き換え)。
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        max_segment_s: float = DEFAULT_MAX_SEGMENT_S,
+        fsync_interval_s: float = DEFAULT_FSYNC_INTERVAL_S,
+        metadata: dict[str, Any] | None = None,
+        debug: bool = False,
+    ):
+        """
+        Args:
+            directory (Path | str): セッションディレクトリ。
+                既存のセッションの場合は、新しいセグメントから追記します。
+            max_segment_bytes (int): 1セグメントの最大サイズ (バイト)
+            max_segment_s (float): 1セグメントの最大記録時間 (秒)
+            fsync_interval_s (float): fsync の間隔 (秒)。0 で毎回。
+            metadata (dict[str, Any] | None): インデックスに保存する情報。
+                セグメントごとにも保存するので、既存のセッションに追記した
+                セグメントは、この記録の値を持ちます
+                (インデックスの `metadata` は最初の記録の値のまま)。
+            debug (bool): デバッグフラグ
+        """
+        self.dtype = range_dtype()
+        if max_segment_bytes < self.dtype.itemsize:
+            raise ValueError(
+                f"max_segment_bytes too small: {max_segment_bytes}"
+            )
+
+        self.__log = get_logger(self.__class__.__name__, debug)
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_s = max_segment_s
+        self.fsync_interval_s = fsync_interval_s
+        self.metadata = dict(metadata or {})
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if (self.directory / INDEX_FILE_NAME).exists():
+            self.index = load_index(self.directory)
+            if index_dtype(self.index) != self.dtype:
+                raise ValueError(f"dtype mismatch: {self.directory}")
+        else:
+            self.index = {
+                "version": INDEX_VERSION,
+                "dtype": self.dtype.descr,
+                "metadata": self.metadata,
+                "segments": [],
+            }
+
+        self.records = 0
+        self._file: BinaryIO | None = None
+        self._segment: dict[str, Any] | None = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+        self._last_fsync = 0.0
+
+    def __enter__(self) -> "SessionWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type | None,
+        exc_val: Exception | None,
+        exc_tb: type | None,
+    ) -> None:
+        self.close()
+
+    def _write_index(self) -> None:
+        path = self.directory / INDEX_FILE_NAME
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _open_segment(self) -> None:
+        seq = len(self.index["segments"])
+        self._segment = {
+            "name": segment_name(seq),
+            "count": 0,
+            "first_ns": None,
+            "last_ns": None,
+            # timestamp_ns (time.monotonic_ns()) を時刻に変換するための組
+            # (再起動で monotonic の基準が変わるので、セグメントごとに持つ)
+            "time_ns": time.time_ns(),
+            "monotonic_ns": time.monotonic_ns(),
+            # 追記ごとにオフセットなどが変わることがあるので、セグメントごとに持つ
+            "metadata": self.metadata,
+        }
+        self.index["segments"].append(self._segment)
+        self._file = open(self.directory / self._segment["name"], "ab")
+        self._segment_bytes = 0
+        self._segment_started = time.monotonic()
+        self._last_fsync = self._segment_started
+        self._write_index()
+        self.__log.debug("open segment: %s", self._segment["name"])
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._write_index()
+        self._segment = None
+
+    def _needs_rotation(self, nbytes: int) -> bool:
+        if self._segment_bytes == 0:
+            return False
+        if self._segment_bytes + nbytes > self.max_segment_bytes:
+            return True
+        elapsed_s = time.monotonic() - self._segment_started
+        return elapsed_s >= self.max_segment_s
+
+    def write(self, records: "np.ndarray") -> None:
+        """
+        `RANGE_DTYPE` の配列を追記します。
+        """
+        if records.dtype != self.dtype:
+            raise ValueError(f"records must be RANGE_DTYPE: {records.dtype}")
+        if len(records) == 0:
+            return
+
+        # セグメントの最大サイズに収まるように分割する
+        per_segment = self.max_segment_bytes // self.dtype.itemsize
+        for start in range(0, len(records), per_segment):
+            self._write_chunk(records[start : start + per_segment])
+
+    def _write_chunk(self, records: "np.ndarray") -> None:
+        data = records.tobytes()
+        if self._file is not None and self._needs_rotation(len(data)):
+            self._close_segment()
+        if self._file is None:
+            self._open_segment()
+        assert self._file is not None and self._segment is not None
+
+        self._file.write(data)
+        self._segment_bytes += len(data)
+        self._segment["count"] += len(records)
+        if self._segment["first_ns"] is None:
+            self._segment["first_ns"] = int(records["timestamp_ns"][0])
+        self._segment["last_ns"] = int(records["timestamp_ns"][-1])
+        self.records += len(records)
+
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval_s:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self) -> None:
+        """
+        記録中のセグメントを閉じ、インデックスを更新します。
+        """
+        self._close_segment()
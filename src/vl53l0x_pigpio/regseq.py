@@ -0,0 +1,389 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+レジスタ書き込みシーケンスのテーブルと、その小さなコンパイラ。
+
+決まった書き込み手順 (チューニング設定、REG_80/REG_FF/REG_00 の
+開閉など) を `(register, value)` のタプルで表します。値に文字列を
+書くと、コンパイル時に `params` から取り出します
+(`stop_variable` など、実行時に決まる値)。
+
+`compile_sequence()` は
+
+- ページ選択レジスタ (REG_FF) の値を追跡し、今と同じページへの
+  切り替えを削除 (開始時のページは `page` で渡します。不明な場合は
+  最初の切り替えを残します。組み込みのテーブルは、開始時のページが
+  わかっていても削除できる切り替えを含みません)
+- 同じページでアドレスが連続する書き込みを、1つのブロック書き込みに
+  まとめる
+
+を行い、`[register, *data]` のセグメントを作ります。
+`dry_run()` で送信内容を確認し、`diff_trace()` で書き込み後の
+レジスタの状態を参照トレースと比べられます。
+
+```python
+from vl53l0x_pigpio.regseq import DEFAULT_TUNING_SETTINGS, dry_run
+
+print("\\n".join(dry_run(DEFAULT_TUNING_SETTINGS)))
+```
+"""
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+# 値が `int` ならその値、`str` なら `params` の値を書き込む
+Step = tuple[int, int | str]
+
+PAGE_SELECT = 0xFF  # REG_FF
+MAX_WRITE_LEN = 32  # 1つのブロック書き込みにまとめる最大バイト数
+
+# 内部レジスタを開く / 閉じる (stop_variable の読み書きなど)
+REG_ACCESS_OPEN: tuple[Step, ...] = (
+    (0x80, 0x01),
+    (0xFF, 0x01),
+    (0x00, 0x00),
+)
+REG_ACCESS_CLOSE: tuple[Step, ...] = (
+    (0x00, 0x01),
+    (0xFF, 0x00),
+    (0x80, 0x00),
+)
+
+# 測距開始前に stop_variable を復元
+STOP_VARIABLE_RESTORE: tuple[Step, ...] = (
+    *REG_ACCESS_OPEN,
+    (0x91, "stop_variable"),
+    *REG_ACCESS_CLOSE,
+)
+
+# シングルショット測距の開始 (stop_variable の復元を含む)
+START_SINGLESHOT: tuple[Step, ...] = (
+    *STOP_VARIABLE_RESTORE,
+    (0x00, 0x01),  # SYSRANGE_START: シングルショット
+)
+
+# 連続測距の停止
+STOP_CONTINUOUS: tuple[Step, ...] = (
+    (0x00, 0x01),  # SYSRANGE_START: シングルショット
+    (0xFF, 0x01),
+    (0x00, 0x00),
+    (0x91, 0x00),
+    (0x00, 0x01),
+    (0xFF, 0x00),
+)
+
+# SPAD情報の取得 (`_get_spad_info()`)
+SPAD_INFO_OPEN: tuple[Step, ...] = (
+    *REG_ACCESS_OPEN,
+    (0xFF, 0x06),
+)
+# NVM の読み出しを開始できる状態にする (ページ 0x07)
+NVM_READ_OPEN: tuple[Step, ...] = (
+    (0xFF, 0x07),
+    (0x81, 0x01),
+    (0x80, 0x01),
+)
+SPAD_INFO_START: tuple[Step, ...] = (
+    *NVM_READ_OPEN,
+    (0x94, 0x6B),  # SPADキャリブレーションをトリガー
+    (0x83, 0x00),
+)
+SPAD_INFO_CLOSE: tuple[Step, ...] = (
+    (0xFF, 0x01),
+    *REG_ACCESS_CLOSE,
+)
+
+# ダイナミックSPADの設定
+DYNAMIC_SPAD_CONFIG: tuple[Step, ...] = (
+    (0xFF, 0x01),
+    (0x4F, 0x00),  # DYN_SPAD_REF_EN_START_OFFSET
+    (0x4E, 0x2C),  # DYN_SPAD_NUM_REQUESTED_REF_SPAD
+    (0xFF, 0x00),
+    (0xB6, 0xB4),  # GLOBAL_CFG_REF_EN_START_SELECT
+)
+
+# チューニング設定 (API の DefaultTuningSettings)
+DEFAULT_TUNING_SETTINGS: tuple[Step, ...] = (
+    (0xFF, 0x01),
+    (0x00, 0x00),
+    (0xFF, 0x00),
+    (0x09, 0x00),
+    (0x10, 0x00),
+    (0x11, 0x00),
+    (0x24, 0x01),
+    (0x25, 0xFF),
+    (0x75, 0x00),
+    (0xFF, 0x01),
+    (0x4E, 0x2C),
+    (0x48, 0x00),
+    (0x30, 0x20),
+    (0xFF, 0x00),
+    (0x30, 0x09),
+    (0x54, 0x00),
+    (0x31, 0x04),
+    (0x32, 0x03),
+    (0x40, 0x83),
+    (0x46, 0x25),
+    (0x60, 0x00),
+    (0x27, 0x00),
+    (0x50, 0x06),
+    (0x51, 0x00),
+    (0x52, 0x96),
+    (0x56, 0x08),
+    (0x57, 0x30),
+    (0x61, 0x00),
+    (0x62, 0x00),
+    (0x64, 0x00),
+    (0x65, 0x00),
+    (0x66, 0xA0),
+    (0xFF, 0x01),
+    (0x22, 0x32),
+    (0x47, 0x14),
+    (0x49, 0xFF),
+    (0x4A, 0x00),
+    (0xFF, 0x00),
+    (0x7A, 0x0A),
+    (0x7B, 0x00),
+    (0x78, 0x21),
+    (0xFF, 0x01),
+    (0x23, 0x34),
+    (0x42, 0x00),
+    (0x44, 0xFF),
+    (0x45, 0x26),
+    (0x46, 0x05),
+    (0x40, 0x40),
+    (0x0E, 0x06),
+    (0x20, 0x1A),
+    (0x43, 0x40),
+    (0xFF, 0x00),
+    (0x34, 0x03),
+    (0x35, 0x44),
+    (0xFF, 0x01),
+    (0x31, 0x04),
+    (0x4B, 0x09),
+    (0x4C, 0x05),
+    (0x4D, 0x04),
+    (0xFF, 0x00),
+    (0x44, 0x00),
+    (0x45, 0x20),
+    (0x47, 0x08),
+    (0x48, 0x28),
+    (0x67, 0x00),
+    (0x70, 0x04),
+    (0x71, 0x01),
+    (0x72, 0xFE),
+    (0x76, 0x00),
+    (0x77, 0x00),
+    (0xFF, 0x01),
+    (0x0D, 0x01),
+    (0xFF, 0x00),
+    (0x80, 0x01),
+    (0x01, 0xF8),
+    (0xFF, 0x01),
+    (0x8E, 0x01),
+    *REG_ACCESS_CLOSE,
+)
+
+
+@dataclass(frozen=True)
+class CompiledSequence:
+    """
+    `compile_sequence()` の結果。
+    """
+
+    segments: tuple[tuple[int, ...], ...]  # `(register, *data)`
+    steps: int  # 元の書き込み数
+    dropped: int  # 削除したページ切り替えの数
+    page: int | None  # 終了時のページ (不明なら None)
+
+    def writes(self) -> list[tuple[int, int]]:
+        """
+        バス上の1バイトごとの書き込み `(register, value)` に展開します。
+        """
+        return [
+            (segment[0] + i, value)
+            for segment in self.segments
+            for i, value in enumerate(segment[1:])
+        ]
+
+
+def compile_sequence(
+    steps: Iterable[Step],
+    params: Mapping[str, int] | None = None,
+    *,
+    page: int | None = None,
+    max_len: int = MAX_WRITE_LEN,
+) -> CompiledSequence:
+    """
+    シーケンスをコンパイルします。結果はキャッシュします。
+
+    Args:
+        steps (Iterable[Step]): `(register, value)` のシーケンス
+        params (Mapping[str, int] | None): テーブル中の名前の値
+        page (int | None): 開始時のページ (不明なら None)
+        max_len (int): 1つのブロック書き込みにまとめる最大バイト数
+
+    Returns:
+        CompiledSequence: コンパイル結果
+    """
+    if max_len <= 0:
+        raise ValueError(f"max_len must be > 0: {max_len}")
+    if not isinstance(steps, tuple):
+        steps = tuple((register, value) for register, value in steps)
+    return _compile(
+        steps,
+        tuple(sorted((params or {}).items())),
+        page,
+        max_len,
+    )
+
+
+def _resolve(value: int | str, params: dict[str, int]) -> int:
+    if isinstance(value, str):
+        if value not in params:
+            raise ValueError(f"missing parameter: {value!r}")
+        value = params[value]
+    if not 0 <= value <= 0xFF:
+        raise ValueError(f"value out of range: {value}")
+    return value
+
+
+@lru_cache(maxsize=64)
+def _compile(
+    steps: tuple[Step, ...],
+    params: tuple[tuple[str, int], ...],
+    page: int | None,
+    max_len: int,
+) -> CompiledSequence:
+    values = dict(params)
+    segments: list[list[int]] = []
+    dropped = 0
+    for register, raw in steps:
+        value = _resolve(raw, values)
+        if register == PAGE_SELECT:
+            if value == page:
+                dropped += 1
+                continue
+            page = value
+            segments.append([register, value])
+            continue
+
+        # ページ切り替えをはさまず、アドレスが連続していれば1つにまとめる
+        if segments:
+            last = segments[-1]
+            if (
+                last[0] != PAGE_SELECT
+                and last[0] + len(last) - 1 == register
+                and len(last) - 1 < max_len
+            ):
+                last.append(value)
+                continue
+        segments.append([register, value])
+
+    return CompiledSequence(
+        tuple(tuple(segment) for segment in segments),
+        len(steps),
+        dropped,
+        page,
+    )
+
+
+def dry_run(
+    steps: Iterable[Step] | CompiledSequence,
+    params: Mapping[str, int] | None = None,
+    *,
+    page: int | None = None,
+) -> list[str]:
+    """
+    送信せずに、コンパイル後の書き込みを1行ずつ文字列にします。
+
+    Returns:
+        list[str]: `"[page 1] 0x4E <- 2C 00"` の形式の行
+    """
+    compiled = _ensure_compiled(steps, params, page)
+    lines = []
+    for segment in compiled.segments:
+        data = " ".join(f"{value:02X}" for value in segment[1:])
+        label = "?" if page is None else str(page)
+        lines.append(f"[page {label}] 0x{segment[0]:02X} <- {data}")
+        if segment[0] == PAGE_SELECT:
+            page = segment[1]
+    return lines
+
+
+def register_state(
+    writes: Iterable[tuple[int, int]], page: int | None = None
+) -> dict[tuple[int | None, int], int]:
+    """
+    書き込みを順に適用した後のレジスタの値を返します。
+
+    Args:
+        writes (Iterable[tuple[int, int]]): `(register, value)` の書き込み
+        page (int | None): 開始時のページ (不明なら None)
+
+    Returns:
+        dict[tuple[int | None, int], int]: `(page, register)` ごとの値。
+            ページ選択レジスタは `(None, PAGE_SELECT)`
+    """
+    state: dict[tuple[int | None, int], int] = {}
+    for register, value in writes:
+        if register == PAGE_SELECT:
+            page = value
+            state[(None, PAGE_SELECT)] = value
+        else:
+            state[(page, register)] = value
+    return state
+
+
+def diff_trace(
+    steps: Iterable[Step] | CompiledSequence,
+    reference: Iterable[tuple[int, int]],
+    params: Mapping[str, int] | None = None,
+    *,
+    page: int | None = None,
+) -> list[tuple[int | None, int, int | None, int | None]]:
+    """
+    コンパイル後のシーケンスと参照トレース (記録したバス上の書き込み
+    など) を、書き込み後のレジスタの状態で比べます。
+
+    Returns:
+        list[tuple[int | None, int, int | None, int | None]]:
+            違いのある `(page, register, actual, expected)` のリスト
+            (書き込まれていない場合は None)。同じなら空です。
+    """
+    compiled = _ensure_compiled(steps, params, page)
+    actual = register_state(compiled.writes(), page)
+    expected = register_state(reference, page)
+    return [
+        (key[0], key[1], actual.get(key), expected.get(key))
+        for key in sorted(
+            actual.keys() | expected.keys(),
+            key=lambda key: (-1 if key[0] is None else key[0], key[1]),
+        )
+        if actual.get(key) != expected.get(key)
+    ]
+
+
+def _ensure_compiled(
+    steps: Iterable[Step] | CompiledSequence,
+    params: Mapping[str, int] | None,
+    page: int | None,
+) -> CompiledSequence:
+    if isinstance(steps, CompiledSequence):
+        return steps
+    return compile_sequence(steps, params, page=page)
+
+
+# 名前で参照できるテーブル
+SEQUENCES: dict[str, Sequence[Step]] = {
+    "stop_variable_restore": STOP_VARIABLE_RESTORE,
+    "start_singleshot": START_SINGLESHOT,
+    "stop_continuous": STOP_CONTINUOUS,
+    "spad_info_open": SPAD_INFO_OPEN,
+    "spad_info_start": SPAD_INFO_START,
+    "spad_info_close": SPAD_INFO_CLOSE,
+    "dynamic_spad_config": DYNAMIC_SPAD_CONFIG,
+    "default_tuning_settings": DEFAULT_TUNING_SETTINGS,
+}
@@ -0,0 +1,382 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+`record` サブコマンドで記録したセッションを再生するモジュール。
+
+`ReplayVL53L0X` は `VL53L0X` と同じ測距メソッド (`get_range()`,
+`get_ranges()`, `iter_ranges()`, `calibrate()` など) を持つので、
+フィルターや解析のコードを、センサーなしで実時間より速く動かせます。
+`BackgroundSampler` にも渡せます。
+
+```python
+from vl53l0x_pigpio.replay import ReplayVL53L0X
+
+with ReplayVL53L0X("session") as sensor:
+    sensor.seek(start_ns)
+    for distance in sensor.iter_ranges(1000):
+        ...
+```
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, TypeVar
+
+import numpy as np
+
+from .driver import RANGE_DTYPE, Measurement
+from .my_logger import get_logger
+from .recorder import load_index, open_segments, segment_metadata
+
+T = TypeVar("T")
+
+
+class SessionReader:
+    """
+    セッションのセグメントを `np.memmap` で開き、通し番号で読み出します。
+
+    インデックスのセグメントごとの時刻範囲を使って、`search()` で
+    タイムスタンプから位置を求めます (全体を読み込みません)。
+    再起動をまたいで追記したセッションでは、`timestamp_ns`
+    (`time.monotonic_ns()`) がセグメントの境目で戻ることがあるので、
+    二分探索はセグメントの中だけで行います。
+    """
+
+    def __init__(self, directory: Path | str):
+        """
+        Args:
+            directory (Path | str): セッションディレクトリ
+        """
+        self.directory = Path(directory)
+        self.index = load_index(self.directory)
+        self.segments = open_segments(self.directory)
+        if any(seg.dtype != RANGE_DTYPE for seg in self.segments):
+            raise ValueError(f"unsupported record dtype: {self.directory}")
+
+        # 各セグメントの先頭の通し番号 (最後は全体の件数)
+        self._starts = np.cumsum([0] + [len(seg) for seg in self.segments])
+        self._last_ns = np.array(
+            [int(seg["timestamp_ns"][-1]) for seg in self.segments],
+            dtype=np.int64,
+        )
+        # timestamp_ns を時刻 (time.time_ns()) に変換するための差
+        # (セグメントごと。`open_segments()` と同じく空のセグメントは除く)
+        self._time_shift_ns = np.array(
+            [
+                int(segment["time_ns"]) - int(segment["monotonic_ns"])
+                for segment in self.index["segments"]
+                if segment["count"] > 0
+            ],
+            dtype=np.int64,
+        )
+        # 記録時のオフセット (追記ごとに変わることがあるので、セグメントごと)
+        self._offsets_mm = [
+            int(segment_metadata(self.index, segment).get("offset_mm", 0))
+            for segment in self.index["segments"]
+            if segment["count"] > 0
+        ]
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """
+        記録時に保存した情報 (`i2c_address`, `offset_mm` など)。
+        """
+        return dict(self.index.get("metadata", {}))
+
+    def read(
+        self,
+        start: int,
+        count: int,
+        out: np.ndarray | None = None,
+        offset_mm: int | None = None,
+    ) -> np.ndarray:
+        """
+        通し番号 `start` から最大 `count` 件を読み出します。
+
+        Args:
+            offset_mm (int | None): 指定した場合、距離から記録時の
+                オフセット (セグメントごと) を外し、このオフセットを
+                適用します。None の場合は記録した値のままです。
+
+        Returns:
+            np.ndarray: `RANGE_DTYPE` の配列 (コピー)。
+                終わりに達した場合は `count` 件より少なくなります。
+        """
+        count = max(0, min(count, len(self) - start))
+        if out is None:
+            out = np.empty(count, dtype=RANGE_DTYPE)
+        out = out[:count]
+
+        done = 0
+        seg_index = int(np.searchsorted(self._starts, start, "right")) - 1
+        while done < count:
+            segment = self.segments[seg_index]
+            offset = start + done - int(self._starts[seg_index])
+            n = min(count - done, len(segment) - offset)
+            out[done : done + n] = segment[offset : offset + n]
+            if offset_mm is not None:
+                delta = self._offsets_mm[seg_index] - offset_mm
+                if delta:
+                    out["range_mm"][done : done + n] += delta
+            done += n
+            seg_index += 1
+        return out
+
+    def _search(self, targets: np.ndarray) -> int:
+        """
+        セグメントごとの探索値 `targets` 以降のレコードを含む、記録順で
+        最初のセグメントを選び、その中を二分探索します。
+        """
+        found = np.flatnonzero(self._last_ns >= targets)
+        if len(found) == 0:
+            return len(self)
+        seg_index = int(found[0])
+        segment = self.segments[seg_index]
+        offset = int(
+            np.searchsorted(segment["timestamp_ns"], targets[seg_index])
+        )
+        return int(self._starts[seg_index]) + offset
+
+    def search(self, timestamp_ns: int) -> int:
+        """
+        `timestamp_ns` 以降の最初のレコードの通し番号を返します。
+
+        `timestamp_ns` は記録時の `time.monotonic_ns()` の値です。
+        再起動をまたいだセッションでは、記録順で最初に見つかった位置を
+        返します (時刻で探す場合は `search_time()`)。
+        """
+        return self._search(np.full_like(self._last_ns, timestamp_ns))
+
+    def search_time(self, time_ns: int) -> int:
+        """
+        時刻 `time_ns` (`time.time_ns()`) 以降の最初のレコードの
+        通し番号を返します。
+
+        セグメントごとに記録した時刻の組で `timestamp_ns` を変換するので、
+        再起動をまたいで追記したセッションでも使えます。
+        """
+        return self._search(time_ns - self._time_shift_ns)
+
+
+class ReplayVL53L0X:
+    """
+    記録したセッションを、`VL53L0X` と同じインターフェースで再生します。
+
+    距離は記録した値のままです。`set_offset()` を呼ぶと、記録時の
+    オフセット (セグメントごと) をいったん外してから `offset_mm` を
+    適用します (`set_offset(0)` で生の距離)。
+    `timestamp_ns` は記録時の値のままです。
+    最後まで再生すると、`loop=False` の場合は `EOFError` になります
+    (`iter_ranges()` などは、そこで終わります)。
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        speed: float = 0.0,
+        loop: bool = False,
+        debug: bool = False,
+    ):
+        """
+        Args:
+            directory (Path | str): セッションディレクトリ
+            speed (float): 再生速度 (記録時の間隔に対する倍率)。
+                0 の場合は待たずに再生します。
+            loop (bool): True の場合、最後まで再生したら先頭に戻ります。
+            debug (bool): デバッグフラグ
+        """
+        self.__log = get_logger(self.__class__.__name__, debug)
+        self.reader = SessionReader(directory)
+        self.speed = speed
+        self.loop = loop
+
+        metadata = self.reader.metadata
+        self.i2c_address = int(metadata.get("i2c_address", 0x29))
+        self.profile = metadata.get("profile")
+        self.recorded_offset_mm = int(metadata.get("offset_mm", 0))
+        self.offset_mm = self.recorded_offset_mm
+        # set_offset() を呼ぶまでは、記録した距離のまま
+        self._offset_set = False
+        self.continuous = False
+        self.inter_measurement_period_ms = 0
+
+        self.position = 0
+        # 再生のペース配分: (開始時の monotonic_ns, その位置の timestamp_ns)
+        self._pace_origin: tuple[int, int] | None = None
+        self._one = np.empty(1, dtype=RANGE_DTYPE)
+        self.__log.debug(
+            "replay %s: %s samples", self.reader.directory, len(self.reader)
+        )
+
+    def __enter__(self) -> "ReplayVL53L0X":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type | None,
+        exc_val: Exception | None,
+        exc_tb: type | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    # --- 位置 ---
+
+    def seek(self, timestamp_ns: int) -> int:
+        """
+        `timestamp_ns` 以降の最初のサンプルに移動します。
+
+        Returns:
+            int: 移動後の位置 (通し番号)
+        """
+        self.position = self.reader.search(timestamp_ns)
+        self._pace_origin = None
+        return self.position
+
+    def seek_time(self, time_ns: int) -> int:
+        """
+        時刻 `time_ns` (`time.time_ns()`) 以降の最初のサンプルに移動します。
+
+        Returns:
+            int: 移動後の位置 (通し番号)
+        """
+        self.position = self.reader.search_time(time_ns)
+        self._pace_origin = None
+        return self.position
+
+    def rewind(self) -> None:
+        """
+        先頭に戻ります。
+        """
+        self.position = 0
+        self._pace_origin = None
+
+    def _read(self, count: int, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        現在位置から最大 count 件を読み出して位置を進めます。
+        """
+        if self.position >= len(self.reader):
+            if not self.loop or len(self.reader) == 0:
+                raise EOFError("end of recorded session")
+            self.rewind()
+
+        offset_mm = self.offset_mm if self._offset_set else None
+        data = self.reader.read(self.position, count, out, offset_mm)
+        if len(data) == 0:
+            return data
+        self.position += len(data)
+        self._pace(int(data["timestamp_ns"][-1]))
+        return data
+
+    def _pace(self, timestamp_ns: int) -> None:
+        """
+        `speed` に合わせて、サンプルの時刻まで待ちます。
+        """
+        if self.speed <= 0:
+            return
+        now_ns = time.monotonic_ns()
+        if self._pace_origin is None:
+            self._pace_origin = (now_ns, timestamp_ns)
+            return
+        origin_ns, origin_ts = self._pace_origin
+        due_ns = origin_ns + (timestamp_ns - origin_ts) / self.speed
+        if due_ns > now_ns:
+            time.sleep((due_ns - now_ns) / 1e9)
+
+    # --- VL53L0X と同じインターフェース ---
+
+    def set_offset(self, offset_mm: int) -> None:
+        self.offset_mm = offset_mm
+        self._offset_set = True
+
+    def start_continuous(self, period_ms: int = 0) -> None:
+        self.inter_measurement_period_ms = period_ms
+        self.continuous = True
+
+    def stop_continuous(self) -> None:
+        self.continuous = False
+        self.inter_measurement_period_ms = 0
+
+    def start_ranging(self) -> None:
+        pass
+
+    def is_data_ready(self) -> bool:
+        return self.loop or self.position < len(self.reader)
+
+    def read_measurement(self) -> Measurement:
+        record = self._read(1, self._one)[0]
+        return Measurement(
+            range_mm=int(record["range_mm"]),
+            range_status=int(record["range_status"]),
+            signal_rate_mcps=float(record["signal_rate_mcps"]),
+            # 記録していない値
+            ambient_rate_mcps=0.0,
+            effective_spad_count=0.0,
+        )
+
+    def read_range(self) -> int:
+        return int(self._read(1, self._one)["range_mm"][0])
+
+    def get_measurement(self) -> Measurement:
+        return self.read_measurement()
+
+    def get_range(self) -> int:
+        return self.read_range()
+
+    def get_ranges(
+        self, num_samples: int, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        `num_samples` 件をまとめて読み出します。
+        最後に達した場合は、残りの件数だけを返します。
+        """
+        if out is not None and (
+            out.dtype != RANGE_DTYPE or len(out) < num_samples
+        ):
+            raise ValueError(
+                f"out must be a RANGE_DTYPE array of length >= {num_samples}"
+            )
+        return self._read(num_samples, out)
+
+    def _iter(self, read: Callable[[], T], count: int | None) -> Iterator[T]:
+        i = 0
+        while count is None or i < count:
+            try:
+                value = read()
+            except EOFError:
+                return
+            yield value
+            i += 1
+
+    def iter_ranges(
+        self, count: int | None = None, period_ms: int = 0
+    ) -> Iterator[int]:
+        return self._iter(self.read_range, count)
+
+    def iter_measurements(
+        self, count: int | None = None, period_ms: int = 0
+    ) -> Iterator[Measurement]:
+        return self._iter(self.read_measurement, count)
+
+    def calibrate(self, target_distance_mm: int, num_samples: int) -> int:
+        """
+        `VL53L0X.calibrate()` と同じく、記録した距離の平均から
+        オフセット値を計算します。
+        """
+        current = (self.offset_mm, self._offset_set)
+        self.set_offset(0)
+        try:
+            samples = self.get_ranges(num_samples)
+        finally:
+            self.offset_mm, self._offset_set = current
+        return int(np.mean(samples["range_mm"])) - target_distance_mm
+
+    def close(self) -> None:
+        self.continuous = False
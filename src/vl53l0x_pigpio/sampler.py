@@ -0,0 +1,270 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""バックグラウンドで測距を続け、リングバッファに記録するモジュール。"""
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .driver import VL53L0X
+from .my_logger import get_logger
+
+if TYPE_CHECKING:
+    from .replay import ReplayVL53L0X
+
+# リングバッファの1サンプル
+SAMPLE_DTYPE = np.dtype(
+    [
+        ("range_mm", np.int32),
+        ("timestamp_ns", np.int64),  # time.monotonic_ns()
+        ("status", np.uint8),  # デバイスのレンジステータス (11: 正常)
+    ]
+)
+
+STATUS_ERROR = 0xFF  # 測定失敗 (タイムアウト、I2Cエラーなど)
+
+SNAPSHOT_RETRY = 3
+
+# 測定に失敗し続ける場合 (センサーが外れたなど) の再試行間隔 (秒)。
+# 失敗のたびに倍にし、測定間隔 (back-to-back モードでは
+# ERROR_BACKOFF_MAX_S) まで延ばします。
+ERROR_BACKOFF_MIN_S = 0.001
+ERROR_BACKOFF_MAX_S = 0.1
+# 失敗が続く間、警告を出す間隔 (秒)
+ERROR_LOG_INTERVAL_S = 10.0
+
+
+class BackgroundSampler:
+    """
+    専用スレッドで連続測距を行い、事前に確保した NumPy のリングバッファに
+    距離・タイムスタンプ・ステータスを書き込みます。
+
+    書き込みはこのスレッドだけが行い、読み出し側 (`latest()`,
+    `snapshot()`) はロックを取らずにバッファを参照するので、
+    I2C の完了を待つことはありません。
+    """
+
+    def __init__(
+        self,
+        sensor: "VL53L0X | ReplayVL53L0X",
+        capacity: int = 1024,
+        period_ms: int = 0,
+        debug: bool = False,
+    ):
+        """
+        Args:
+            sensor (VL53L0X | ReplayVL53L0X): 初期化済みのセンサー、
+                または記録したセッションの再生
+            capacity (int): リングバッファのサンプル数
+            period_ms (int): 測定間隔 (ms)。0 で back-to-back モード。
+            debug (bool): デバッグフラグ
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be > 0: {capacity}")
+
+        self.__log = get_logger(self.__class__.__name__, debug)
+        self.sensor = sensor
+        self.capacity = capacity
+        self.period_ms = period_ms
+
+        self.buffer = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        # これまでに書き込んだサンプル数 (書き込み完了後に更新する)
+        self._count = 0
+
+        self._new_sample = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        # 測距を開始できなかった場合の例外 (stop() で送出する)
+        self.error: Exception | None = None
+
+    def __enter__(self) -> "BackgroundSampler":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type | None,
+        exc_val: Exception | None,
+        exc_tb: type | None,
+    ) -> None:
+        try:
+            self.stop()
+        except Exception:
+            # ブロック内の例外を置き換えない (測距スレッドでログ済み)
+            if exc_type is None:
+                raise
+
+    @property
+    def count(self) -> int:
+        """
+        これまでに取得したサンプル数。
+        """
+        return self._count
+
+    def start(self) -> None:
+        """
+        バックグラウンドでの測距を開始します。
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.error = None
+        self._thread = threading.Thread(
+            target=self._run, name="vl53l0x-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        バックグラウンドでの測距を停止します。
+
+        Raises:
+            Exception: 測距を開始できなかった場合
+                (`start_continuous()` の例外。`error` にも記録します)
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        """
+        測距スレッドの本体。
+        """
+        sensor = self.sensor
+        max_backoff_s = (
+            self.period_ms / 1000
+            if self.period_ms > 0
+            else ERROR_BACKOFF_MAX_S
+        )
+        backoff_s = 0.0
+        errors = 0  # 連続した失敗の数
+        suppressed = 0  # 警告を出さなかった失敗の数
+        last_log = 0.0
+
+        try:
+            sensor.start_continuous(self.period_ms)
+        except Exception as e:
+            self.__log.error(
+                "start_continuous failed: %s: %s", type(e).__name__, e
+            )
+            self.error = e
+            return
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    measurement = sensor.get_measurement()
+                except EOFError:
+                    # 記録したセッションの再生 (ReplayVL53L0X) が終わった
+                    break
+                except Exception as e:
+                    self._push(0, time.monotonic_ns(), STATUS_ERROR)
+                    errors += 1
+                    now = time.monotonic()
+                    if errors == 1 or now - last_log >= ERROR_LOG_INTERVAL_S:
+                        self.__log.warning(
+                            "%s: %s (%s errors suppressed)",
+                            type(e).__name__,
+                            e,
+                            suppressed,
+                        )
+                        last_log = now
+                        suppressed = 0
+                    else:
+                        suppressed += 1
+
+                    # 失敗が続く間は、間隔を延ばしながら再試行する
+                    backoff_s = min(
+                        max(backoff_s * 2, ERROR_BACKOFF_MIN_S), max_backoff_s
+                    )
+                    self._stop_event.wait(backoff_s)
+                    continue
+
+                if errors:
+                    self.__log.info("recovered after %s errors", errors)
+                    errors = 0
+                    suppressed = 0
+                    backoff_s = 0.0
+                self._push(
+                    measurement.range_mm,
+                    time.monotonic_ns(),
+                    measurement.range_status,
+                )
+        finally:
+            sensor.stop_continuous()
+
+    def _push(self, range_mm: int, timestamp_ns: int, status: int) -> None:
+        """
+        サンプルをリングバッファに書き込み、待っている読み出し側に通知します。
+        """
+        self.buffer[self._count % self.capacity] = (
+            range_mm,
+            timestamp_ns,
+            status,
+        )
+        # スロットの書き込みが終わってから公開する
+        self._count += 1
+        with self._new_sample:
+            self._new_sample.notify_all()
+
+    def latest(self) -> np.void | None:
+        """
+        最新のサンプルを返します。まだサンプルがない場合は None。
+
+        Returns:
+            np.void | None: `range_mm`, `timestamp_ns`, `status` を持つ
+                レコード (コピー)
+        """
+        count = self._count
+        if count == 0:
+            return None
+        return self.buffer[(count - 1) % self.capacity].copy()
+
+    def snapshot(self, n: int | None = None) -> np.ndarray:
+        """
+        直近 n 件のサンプルを古い順に返します。
+
+        Args:
+            n (int | None): サンプル数。None の場合はバッファ内のすべて。
+
+        Returns:
+            np.ndarray: `SAMPLE_DTYPE` の配列 (コピー)
+        """
+        for _ in range(SNAPSHOT_RETRY):
+            count = self._count
+            size = min(count, self.capacity)
+            if n is not None:
+                size = min(size, n)
+            indices = np.arange(count - size, count) % self.capacity
+            data = self.buffer[indices]
+            # コピー中に上書きされたサンプルがなければ完了
+            if self._count - (count - size) <= self.capacity:
+                return data
+        # 書き込みが速すぎる場合は、上書きされていない分だけ返す
+        overwritten = self._count - (count - size) - self.capacity
+        return data[max(0, overwritten) :]
+
+    def wait_new(self, timeout: float | None = None) -> np.void | None:
+        """
+        新しいサンプルが書き込まれるまで待ち、最新のサンプルを返します。
+
+        Args:
+            timeout (float | None): タイムアウト時間 (秒)
+
+        Returns:
+            np.void | None: 最新のサンプル。タイムアウトした場合は None。
+        """
+        start_count = self._count
+        with self._new_sample:
+            if not self._new_sample.wait_for(
+                lambda: self._count > start_count, timeout
+            ):
+                return None
+        return self.latest()
@@ -0,0 +1,859 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+ハードウェアなしでドライバーを動かすための VL53L0X シミュレーター。
+
+`SimulatedPi` は `pigpio.pi` の代わりに使えるオブジェクトで、
+I2C アクセスを `SimulatedVL53L0X` のレジスタファイルに振り分けます。
+
+```python
+from vl53l0x_pigpio import VL53L0X
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X, sine
+
+pi = SimulatedPi([SimulatedVL53L0X(distance=sine(500, 100, 2.0))])
+with VL53L0X(pi) as sensor:
+    print(sensor.get_range())
+```
+"""
+
+import math
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+
+import pigpio
+
+from .driver import (
+    DSS_OVERHEAD_US,
+    END_OVERHEAD_US,
+    FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT,
+    FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+    FINAL_RANGE_CONFIG_VCSEL_PERIOD,
+    FINAL_RANGE_OVERHEAD_US,
+    GLOBAL_CFG_SPAD_ENABLES_REF_0,
+    GPIO_HV_MUX_ACTIVE_HIGH,
+    I2C_SLAVE_DEVICE_ADDRESS,
+    IDENTIFICATION_MODEL_ID,
+    IDENTIFICATION_REVISION_ID,
+    INTERRUPT_LEVEL_HIGH,
+    INTERRUPT_LEVEL_LOW,
+    INTERRUPT_OUT_OF_WINDOW,
+    MSRC_CONFIG_TIMEOUT_MACROP,
+    MSRC_OVERHEAD_US,
+    NVM_PART_UID_LOWER,
+    NVM_PART_UID_UPPER,
+    OSC_CALIBRATE_VAL,
+    PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+    PRE_RANGE_CONFIG_VCSEL_PERIOD,
+    PRE_RANGE_OVERHEAD_US,
+    RANGE_STATUS_SHIFT,
+    RANGE_STATUS_VALID,
+    REG_90,
+    REG_91,
+    REG_92,
+    REG_94,
+    REG_CB,
+    REG_EE,
+    REG_FF,
+    RESULT_BLOCK_SIZE,
+    RESULT_INTERRUPT_STATUS,
+    RESULT_RANGE_STATUS,
+    SEQUENCE_STEP_DSS,
+    SEQUENCE_STEP_FINAL_RANGE,
+    SEQUENCE_STEP_MSRC,
+    SEQUENCE_STEP_PRE_RANGE,
+    SEQUENCE_STEP_TCC,
+    SET_START_OVERHEAD_US,
+    SOFT_RESET_GO2_SOFT_RESET_N,
+    SYS_INTERMEASUREMENT_PERIOD,
+    SYSRANGE_MODE_BACKTOBACK,
+    SYSRANGE_MODE_TIMED,
+    SYSRANGE_START,
+    SYSTEM_INTERRUPT_CLEAR,
+    SYSTEM_INTERRUPT_CONFIG_GPIO,
+    SYSTEM_SEQUENCE_CONFIG,
+    SYSTEM_THRESH_HIGH,
+    SYSTEM_THRESH_LOW,
+    TCC_OVERHEAD_US,
+    THRESHOLD_MASK,
+    THRESHOLD_UNIT_MM,
+    VALUE_10,
+    VALUE_83,
+)
+from .transport import ZIP_END, ZIP_WRITE
+
+# 時刻 t (秒) における距離 (mm) を返す関数
+DistanceProfile = Callable[[float], float]
+
+DEFAULT_I2C_ADDRESS = 0x29
+
+# シミュレーターが返すデバイス情報
+SIM_MODEL_ID = 0xEE
+SIM_REVISION_ID = 0x10
+SIM_STOP_VARIABLE = 0x3C
+SIM_SPAD_COUNT = 5
+SIM_SPAD_IS_APERTURE = True
+SIM_VHV_SETTINGS = 0x2A
+SIM_PHASE_CAL = 0x05
+SIM_PART_UID = 0x0123456789ABCDEF
+SIM_OSC_CALIBRATE_VAL = 0  # 0 の場合、測定間隔レジスタは ms 単位
+
+# 電源投入時のレジスタ値 {(ページ, レジスタ): 値}
+# (タイミングバジェットは初期化後におよそ 33ms になる)
+DEFAULT_REGISTERS: dict[tuple[int, int], int] = {
+    (0, SYSTEM_SEQUENCE_CONFIG): 0xFF,
+    (0, SYSTEM_INTERRUPT_CONFIG_GPIO): 0x00,
+    (0, MSRC_CONFIG_TIMEOUT_MACROP): 0x0C,
+    (0, PRE_RANGE_CONFIG_VCSEL_PERIOD): 0x06,  # 14 PCLK
+    (0, PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI): 0x00,
+    (0, PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI + 1): 0x45,
+    (0, FINAL_RANGE_CONFIG_VCSEL_PERIOD): 0x04,  # 10 PCLK
+    (0, FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI): 0x02,
+    (0, FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI + 1): 0x7B,
+    (0, GPIO_HV_MUX_ACTIVE_HIGH): 0x11,
+    (0, IDENTIFICATION_MODEL_ID): SIM_MODEL_ID,
+    (0, IDENTIFICATION_REVISION_ID): SIM_REVISION_ID,
+    (0, OSC_CALIBRATE_VAL): SIM_OSC_CALIBRATE_VAL >> 8,
+    (0, OSC_CALIBRATE_VAL + 1): SIM_OSC_CALIBRATE_VAL & 0xFF,
+    (0, SOFT_RESET_GO2_SOFT_RESET_N): 0x01,
+    (1, REG_91): SIM_STOP_VARIABLE,
+    (1, REG_CB): SIM_VHV_SETTINGS,
+    (1, REG_EE): SIM_PHASE_CAL,
+    (7, REG_92): SIM_SPAD_COUNT | (0x80 if SIM_SPAD_IS_APERTURE else 0),
+    **{(0, GLOBAL_CFG_SPAD_ENABLES_REF_0 + i): 0xFF for i in range(6)},
+}
+
+# 測定結果のモデル
+RANGE_STATUS_NO_TARGET = 4  # 信号が弱く、ターゲットを検出できない
+OUT_OF_RANGE_MM = 8190
+# 信号レート [MCPS] = 反射率 * SIGNAL_RATE_K / 距離 [mm] ^ 2
+SIGNAL_RATE_K = 2.0e6
+# noise_mm はこのタイミングバジェットでの標準偏差 (sqrt で比例させる)
+NOISE_REFERENCE_BUDGET_US = 33000
+
+# SYSRANGE_START のうち、測定を開始するビット
+# (シングルショット 0x01, back-to-back 0x02, タイムド 0x04)
+SYSRANGE_START_MASK = 0x07
+
+# i2c_zip のコマンド (ZIP_END, ZIP_WRITE は transport と共通)
+ZIP_ADDR = 4
+ZIP_READ = 6
+
+
+def constant(distance_mm: float) -> DistanceProfile:
+    """
+    一定の距離。
+    """
+    return lambda t: distance_mm
+
+
+def ramp(
+    start_mm: float, end_mm: float, duration_s: float
+) -> DistanceProfile:
+    """
+    `duration_s` 秒かけて `start_mm` から `end_mm` まで直線的に変わる距離。
+    その後は `end_mm` のまま。
+    """
+
+    def profile(t: float) -> float:
+        if t >= duration_s:
+            return end_mm
+        return start_mm + (end_mm - start_mm) * t / duration_s
+
+    return profile
+
+
+def sine(
+    center_mm: float, amplitude_mm: float, period_s: float
+) -> DistanceProfile:
+    """
+    `center_mm` を中心に正弦波で変わる距離。
+    """
+    return lambda t: (
+        center_mm + amplitude_mm * math.sin(2 * math.pi * t / period_s)
+    )
+
+
+def steps(values_mm: Sequence[float], interval_s: float) -> DistanceProfile:
+    """
+    `interval_s` 秒ごとに `values_mm` の値を順に繰り返す距離。
+    """
+    values = list(values_mm)
+    return lambda t: values[int(t // interval_s) % len(values)]
+
+
+def _decode_vcsel_period(reg_val: int) -> int:
+    return (reg_val + 1) << 1
+
+
+def _decode_timeout(reg_val: int) -> int:
+    return ((reg_val & 0xFF) << ((reg_val >> 8) & 0xFF)) + 1
+
+
+def _mclks_to_us(timeout_mclks: int, vcsel_period_pclks: int) -> int:
+    macro_period_ns = ((2304 * vcsel_period_pclks * 1655) + 500) // 1000
+    return ((timeout_mclks * macro_period_ns) + 500) // 1000
+
+
+class SimulatedVL53L0X:
+    """
+    レジスタファイルと測距ステートマシンを持つ、1台分の VL53L0X のモデル。
+
+    測定時間は、書き込まれたシーケンス設定・VCSEL 周期・タイムアウトから
+    計算したタイミングバジェットになります。距離プロファイルの時刻 t は
+    センサー上の経過時間 (測定時間と測定間隔の累計) なので、
+    `time_scale` に関係なく同じ結果になります。
+    """
+
+    def __init__(
+        self,
+        distance: float | DistanceProfile = 500.0,
+        noise_mm: float = 0.0,
+        reflectance: float = 1.0,
+        ambient_mcps: float = 0.05,
+        i2c_address: int = DEFAULT_I2C_ADDRESS,
+        xshut_pin: int | None = None,
+        gpio_pin: int | None = None,
+        time_scale: float = 1.0,
+        seed: int | None = None,
+        part_uid: int = SIM_PART_UID,
+    ):
+        """
+        Args:
+            distance (float | DistanceProfile): ターゲットまでの距離 (mm)、
+                または時刻 t (秒) から距離を返す関数
+            noise_mm (float): 距離のノイズの標準偏差 (33ms バジェット時)
+            reflectance (float): ターゲットの反射率 (信号レートに比例)
+            ambient_mcps (float): 環境光レート (MCPS)
+            i2c_address (int): 起動時の I2C アドレス
+            xshut_pin (int | None): XSHUT を接続した GPIO 番号
+            gpio_pin (int | None): GPIO1 (割り込み) を接続した GPIO 番号
+            time_scale (float): 測定時間の倍率。0 で待ち時間なし。
+            seed (int | None): ノイズの乱数シード
+            part_uid (int): NVM のパーツUID (64ビット)
+        """
+        self.distance = distance
+        self.noise_mm = noise_mm
+        self.reflectance = reflectance
+        self.ambient_mcps = ambient_mcps
+        self.default_address = i2c_address
+        self.xshut_pin = xshut_pin
+        self.gpio_pin = gpio_pin
+        self.time_scale = time_scale
+        self.part_uid = part_uid
+        self._random = random.Random(seed)
+
+        self._lock = threading.RLock()
+        self._timer: threading.Timer | None = None
+        # GPIO1 のレベルが変わったときに呼ぶ (SimulatedPi が設定する)
+        self.gpio_listener: Callable[[int], None] | None = None
+
+        self.powered = True
+        self.sample_count = 0
+        self.sim_time_s = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        電源投入時の状態に戻します。
+        """
+        with self._lock:
+            self._cancel_timer()
+            self.address = self.default_address
+            self._pages: dict[int, bytearray] = {}
+            for (page, register), value in DEFAULT_REGISTERS.items():
+                self._page_data(page)[register] = value
+            self._page = 0
+            self._in_reset = False
+            self._mode: int | None = None  # None: 停止中
+            self._ready_at = 0.0
+            self._interrupt = False
+
+    # --- レジスタファイル ---
+
+    def _page_data(self, page: int) -> bytearray:
+        if page not in self._pages:
+            self._pages[page] = bytearray(256)
+        return self._pages[page]
+
+    def _reg(self, register: int) -> int:
+        return self._page_data(0)[register & 0xFF]
+
+    def _reg16(self, register: int) -> int:
+        return (self._reg(register) << 8) | self._reg(register + 1)
+
+    def _set_reg(self, register: int, value: int) -> None:
+        self._page_data(0)[register & 0xFF] = value & 0xFF
+
+    def read(self, register: int, count: int) -> bytearray:
+        """
+        レジスタから `count` バイト読み出します。
+        """
+        self.update()
+        with self._lock:
+            # リセット中はモデルIDが 0 に見える
+            if (
+                self._in_reset
+                and self._page == 0
+                and register == IDENTIFICATION_MODEL_ID
+            ):
+                return bytearray(count)
+            data = self._page_data(self._page)
+            return bytearray(
+                data[(register + i) & 0xFF] for i in range(count)
+            )
+
+    def write(self, register: int, data: Sequence[int]) -> None:
+        """
+        レジスタに書き込みます (連続するレジスタへのブロック書き込み)。
+        """
+        self.update()
+        notify: list[int] = []
+        with self._lock:
+            for i, value in enumerate(data):
+                self._write_byte((register + i) & 0xFF, value & 0xFF, notify)
+        self._notify(notify)
+
+    def _write_byte(
+        self, register: int, value: int, notify: list[int]
+    ) -> None:
+        if register == REG_FF:
+            self._page = value
+            self._page_data(0)[REG_FF] = value
+            return
+
+        page = self._page
+        self._page_data(page)[register] = value
+        if page == 7 and register == VALUE_83 and value == 0:
+            # NVM の読み出し (SPAD 情報など) はすぐに完了したことにする
+            data = self._page_data(page)
+            data[register] = 0x10
+            if data[REG_94] == NVM_PART_UID_UPPER:
+                data[REG_90 : REG_90 + 4] = (self.part_uid >> 32).to_bytes(
+                    4, "big"
+                )
+            elif data[REG_94] == NVM_PART_UID_LOWER:
+                data[REG_90 : REG_90 + 4] = (
+                    self.part_uid & 0xFFFFFFFF
+                ).to_bytes(4, "big")
+            return
+        if page != 0:
+            return
+
+        if register == SYSRANGE_START:
+            # 開始ビットは測定が始まるとすぐに落ちる
+            self._page_data(0)[register] = value & ~0x01
+            if value & SYSRANGE_START_MASK:
+                self._on_sysrange_start(value, notify)
+        elif register == SYSTEM_INTERRUPT_CLEAR:
+            if value & 0x07:
+                self._clear_interrupt(notify)
+        elif register == I2C_SLAVE_DEVICE_ADDRESS:
+            self.address = value & 0x7F
+        elif register == SOFT_RESET_GO2_SOFT_RESET_N:
+            if value == 0:
+                self._cancel_timer()
+                self._in_reset = True
+                self._mode = None
+            elif self._in_reset:
+                self.reset()
+
+    # --- 測距ステートマシン ---
+
+    def timing_budget_us(self) -> int:
+        """
+        現在のレジスタ設定から計算した、1回の測定時間 (us)。
+        """
+        with self._lock:
+            enables = self._reg(SYSTEM_SEQUENCE_CONFIG)
+            pre_vcsel = _decode_vcsel_period(
+                self._reg(PRE_RANGE_CONFIG_VCSEL_PERIOD)
+            )
+            final_vcsel = _decode_vcsel_period(
+                self._reg(FINAL_RANGE_CONFIG_VCSEL_PERIOD)
+            )
+            msrc_us = _mclks_to_us(
+                self._reg(MSRC_CONFIG_TIMEOUT_MACROP) + 1, pre_vcsel
+            )
+            pre_range_mclks = _decode_timeout(
+                self._reg16(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
+            )
+            final_range_mclks = _decode_timeout(
+                self._reg16(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI)
+            )
+
+        budget_us = SET_START_OVERHEAD_US + END_OVERHEAD_US
+        if enables & SEQUENCE_STEP_TCC:
+            budget_us += msrc_us + TCC_OVERHEAD_US
+        if enables & SEQUENCE_STEP_DSS:
+            budget_us += 2 * (msrc_us + DSS_OVERHEAD_US)
+        elif enables & SEQUENCE_STEP_MSRC:
+            budget_us += msrc_us + MSRC_OVERHEAD_US
+        if enables & SEQUENCE_STEP_PRE_RANGE:
+            budget_us += (
+                _mclks_to_us(pre_range_mclks, pre_vcsel)
+                + PRE_RANGE_OVERHEAD_US
+            )
+            final_range_mclks -= pre_range_mclks
+        if enables & SEQUENCE_STEP_FINAL_RANGE:
+            budget_us += (
+                _mclks_to_us(max(final_range_mclks, 0), final_vcsel)
+                + FINAL_RANGE_OVERHEAD_US
+            )
+        return budget_us
+
+    def _inter_measurement_period_s(self) -> float:
+        """
+        タイムドモードの測定間隔 (秒)。
+        """
+        period = int.from_bytes(
+            bytes(
+                self._reg(SYS_INTERMEASUREMENT_PERIOD + i) for i in range(4)
+            ),
+            "big",
+        )
+        osc_calibrate_val = self._reg16(OSC_CALIBRATE_VAL)
+        if osc_calibrate_val != 0:
+            period //= osc_calibrate_val
+        return period / 1000
+
+    def _cycle_s(self) -> float:
+        """
+        1回の測定にかかるセンサー上の時間 (秒)。
+        """
+        cycle_s = self.timing_budget_us() / 1_000_000
+        if self._mode == SYSRANGE_MODE_TIMED:
+            cycle_s = max(cycle_s, self._inter_measurement_period_s())
+        return cycle_s
+
+    def _on_sysrange_start(self, value: int, notify: list[int]) -> None:
+        mode = value & (SYSRANGE_MODE_BACKTOBACK | SYSRANGE_MODE_TIMED)
+        if mode == 0 and self._mode in (
+            SYSRANGE_MODE_BACKTOBACK,
+            SYSRANGE_MODE_TIMED,
+        ):
+            # 連続測距中のシングルショット指定は停止
+            self._cancel_timer()
+            self._mode = None
+            return
+
+        self._mode = mode
+        self._ready_at = time.monotonic() + self._cycle_s() * self.time_scale
+        self._update_locked(notify)
+        self._arm_timer()
+
+    def update(self) -> None:
+        """
+        時間の経過に合わせて測定を完了させます。
+        """
+        notify: list[int] = []
+        with self._lock:
+            self._update_locked(notify)
+        self._notify(notify)
+
+    def _update_locked(self, notify: list[int]) -> None:
+        if self._mode is None or time.monotonic() < self._ready_at:
+            return
+        if self.time_scale <= 0 and self._interrupt:
+            # 待ち時間なしの場合、割り込みがクリアされるまで次の結果を出さない
+            return
+
+        cycle_s = self._cycle_s()
+        self._complete_measurement(cycle_s, notify)
+        if self._mode == 0:
+            self._mode = None
+            return
+
+        # 連続測距: 次の測定の完了時刻 (取りこぼした周期は飛ばす)
+        period_s = cycle_s * self.time_scale
+        if period_s <= 0:
+            self._ready_at = time.monotonic()
+            return
+        missed = int((time.monotonic() - self._ready_at) // period_s)
+        self.sim_time_s += missed * cycle_s
+        self._ready_at += (missed + 1) * period_s
+
+    def _complete_measurement(
+        self, cycle_s: float, notify: list[int]
+    ) -> None:
+        # 距離は測定開始時刻の値を使う
+        range_mm, status, signal_mcps = self._sample()
+        self.sim_time_s += cycle_s
+        self.sample_count += 1
+
+        block = bytearray(RESULT_BLOCK_SIZE)
+        block[0] = status << RANGE_STATUS_SHIFT
+        block[2:4] = (SIM_SPAD_COUNT * 256).to_bytes(2, "big")
+        block[6:8] = min(round(signal_mcps * 128), 0xFFFF).to_bytes(2, "big")
+        block[8:10] = min(round(self.ambient_mcps * 128), 0xFFFF).to_bytes(
+            2, "big"
+        )
+        block[10:12] = range_mm.to_bytes(2, "big")
+        self._page_data(0)[
+            RESULT_RANGE_STATUS : RESULT_RANGE_STATUS + RESULT_BLOCK_SIZE
+        ] = block
+
+        if self._threshold_triggered(range_mm):
+            self._set_interrupt(notify)
+
+    def _threshold_triggered(self, range_mm: int) -> bool:
+        """
+        割り込みモードのしきい値の条件を満たすかどうか
+        (新しいサンプルの場合は常に True)。
+        """
+        config = self._reg(SYSTEM_INTERRUPT_CONFIG_GPIO) & 0x07
+        low_mm = THRESHOLD_UNIT_MM * (
+            self._reg16(SYSTEM_THRESH_LOW) & THRESHOLD_MASK
+        )
+        high_mm = THRESHOLD_UNIT_MM * (
+            self._reg16(SYSTEM_THRESH_HIGH) & THRESHOLD_MASK
+        )
+        if config == INTERRUPT_LEVEL_LOW:
+            return range_mm < low_mm
+        if config == INTERRUPT_LEVEL_HIGH:
+            return range_mm > high_mm
+        if config == INTERRUPT_OUT_OF_WINDOW:
+            return range_mm < low_mm or range_mm > high_mm
+        return True
+
+    def _sample(self) -> tuple[int, int, float]:
+        """
+        現在の距離プロファイルから、距離・レンジステータス・信号レートを
+        作ります。
+        """
+        if callable(self.distance):
+            distance_mm = float(self.distance(self.sim_time_s))
+        else:
+            distance_mm = float(self.distance)
+        distance_mm = max(distance_mm, 1.0)
+
+        signal_mcps = self.reflectance * SIGNAL_RATE_K / distance_mm**2
+        limit_mcps = (
+            self._reg16(FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT) / 128
+        )
+        if signal_mcps < limit_mcps or distance_mm >= OUT_OF_RANGE_MM:
+            return OUT_OF_RANGE_MM, RANGE_STATUS_NO_TARGET, signal_mcps
+
+        noise_mm = 0.0
+        if self.noise_mm > 0:
+            budget_us = max(self.timing_budget_us(), 1)
+            sigma = self.noise_mm * math.sqrt(
+                NOISE_REFERENCE_BUDGET_US / budget_us
+            )
+            noise_mm = self._random.gauss(0.0, sigma)
+        range_mm = min(max(round(distance_mm + noise_mm), 0), OUT_OF_RANGE_MM)
+        return range_mm, RANGE_STATUS_VALID, signal_mcps
+
+    # --- 割り込み (GPIO1) ---
+
+    def _set_interrupt(self, notify: list[int]) -> None:
+        config = self._reg(SYSTEM_INTERRUPT_CONFIG_GPIO) & 0x07
+        # 0 (無効) でもステータスは「新しいサンプル」として扱う
+        self._set_reg(RESULT_INTERRUPT_STATUS, config or 0x04)
+        if not self._interrupt:
+            self._interrupt = True
+            notify.append(self._gpio_level())
+
+    def _clear_interrupt(self, notify: list[int]) -> None:
+        self._set_reg(RESULT_INTERRUPT_STATUS, 0x00)
+        if self._interrupt:
+            self._interrupt = False
+            notify.append(self._gpio_level())
+        # 待ち時間なしの連続測距では、クリアするとすぐ次の結果が出る
+        self._update_locked(notify)
+
+    def _gpio_level(self) -> int:
+        active_high = bool(self._reg(GPIO_HV_MUX_ACTIVE_HIGH) & VALUE_10)
+        return int(self._interrupt == active_high)
+
+    def gpio_level(self) -> int:
+        """
+        GPIO1 のレベル。
+        """
+        self.update()
+        with self._lock:
+            return self._gpio_level()
+
+    def _notify(self, levels: list[int]) -> None:
+        if self.gpio_listener is None:
+            return
+        for level in levels:
+            self.gpio_listener(level)
+
+    def _arm_timer(self) -> None:
+        """
+        GPIO1 のコールバックのため、測定完了時刻にタイマーを仕掛けます。
+        """
+        self._cancel_timer()
+        if self.gpio_listener is None or self._mode is None:
+            return
+        delay = self._ready_at - time.monotonic()
+        if delay <= 0 and self.time_scale <= 0:
+            # 待ち時間なしの場合は、アクセス時に完了させる
+            return
+        self._timer = threading.Timer(max(delay, 0.0), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        self.update()
+        with self._lock:
+            if self._mode is not None:
+                self._arm_timer()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    # --- XSHUT ---
+
+    def set_xshut(self, level: int) -> None:
+        """
+        XSHUT のレベルを設定します。L でシャットダウン (リセット)。
+        """
+        with self._lock:
+            if level:
+                self.powered = True
+            else:
+                self.powered = False
+                self.reset()
+
+    def close(self) -> None:
+        with self._lock:
+            self._cancel_timer()
+            self._mode = None
+
+
+class _SimCallback:
+    """
+    `pigpio.pi.callback()` の戻り値の代わり。
+    """
+
+    def __init__(self, owner: "SimulatedPi", gpio: int, edge: int, func):
+        self._owner = owner
+        self.gpio = gpio
+        self.edge = edge
+        self.func = func
+
+    def cancel(self) -> None:
+        self._owner._remove_callback(self)
+
+
+class SimulatedPi:
+    """
+    `pigpio.pi` の代わりに使える、I2C バスと GPIO のシミュレーター。
+
+    I2C アクセスはアドレスが一致する `SimulatedVL53L0X` に振り分け、
+    呼び出し1回 (`i2c_zip` は1回で複数の転送) を1トランザクションとして
+    `stats` に数えます。
+    """
+
+    def __init__(
+        self,
+        sensors: Sequence[SimulatedVL53L0X] | None = None,
+        transaction_time_s: float = 0.0,
+    ):
+        """
+        Args:
+            sensors (Sequence[SimulatedVL53L0X] | None): バス上のセンサー。
+                None の場合はデフォルト設定のセンサー1台。
+            transaction_time_s (float): 1トランザクションごとに待つ時間
+                (秒)。pigpiod との通信時間を模擬します。
+        """
+        if sensors is None:
+            sensors = [SimulatedVL53L0X()]
+        self.sensors = list(sensors)
+        self.transaction_time_s = transaction_time_s
+        self.connected = True
+
+        self.stats: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+        self._handles: dict[int, tuple[int, int]] = {}
+        self._next_handle = 0
+        self._levels: dict[int, int] = {}
+        self._callbacks: list[_SimCallback] = []
+
+        for sensor in self.sensors:
+            if sensor.gpio_pin is not None:
+                pin = sensor.gpio_pin
+                sensor.gpio_listener = lambda level, pin=pin: (
+                    self._fire_callbacks(pin, level)
+                )
+
+    # --- 統計 ---
+
+    def _count(self, op: str) -> None:
+        with self._stats_lock:
+            self.stats["transactions"] += 1
+            self.stats[op] += 1
+        if self.transaction_time_s > 0:
+            time.sleep(self.transaction_time_s)
+
+    @property
+    def transactions(self) -> int:
+        """
+        これまでの I2C トランザクション数。
+        """
+        return self.stats["transactions"]
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats.clear()
+
+    # --- I2C ---
+
+    def i2c_open(self, i2c_bus: int, i2c_address: int, i2c_flags: int = 0):
+        handle = self._next_handle
+        self._next_handle += 1
+        self._handles[handle] = (i2c_bus, i2c_address)
+        return handle
+
+    def i2c_close(self, handle: int) -> int:
+        self._handles.pop(handle, None)
+        return 0
+
+    def _device(self, handle: int) -> SimulatedVL53L0X:
+        if handle not in self._handles:
+            raise pigpio.error("unknown handle")
+        _, address = self._handles[handle]
+        for sensor in self.sensors:
+            if sensor.powered and sensor.address == address:
+                return sensor
+        # 応答するデバイスがない (NACK)
+        raise pigpio.error("I2C operation failed")
+
+    def i2c_read_byte_data(self, handle: int, reg: int) -> int:
+        self._count("i2c_read_byte_data")
+        return self._device(handle).read(reg, 1)[0]
+
+    def i2c_write_byte_data(
+        self, handle: int, reg: int, byte_val: int
+    ) -> int:
+        self._count("i2c_write_byte_data")
+        self._device(handle).write(reg, [byte_val])
+        return 0
+
+    def i2c_read_word_data(self, handle: int, reg: int) -> int:
+        self._count("i2c_read_word_data")
+        data = self._device(handle).read(reg, 2)
+        # SMBus のワードはリトルエンディアン
+        return data[0] | (data[1] << 8)
+
+    def i2c_write_word_data(
+        self, handle: int, reg: int, word_val: int
+    ) -> int:
+        self._count("i2c_write_word_data")
+        self._device(handle).write(reg, [word_val & 0xFF, word_val >> 8])
+        return 0
+
+    def i2c_read_i2c_block_data(
+        self, handle: int, reg: int, count: int
+    ) -> tuple[int, bytearray]:
+        self._count("i2c_read_i2c_block_data")
+        return count, self._device(handle).read(reg, count)
+
+    def i2c_write_i2c_block_data(
+        self, handle: int, reg: int, data: Sequence[int]
+    ) -> int:
+        self._count("i2c_write_i2c_block_data")
+        self._device(handle).write(reg, list(data))
+        return 0
+
+    def i2c_zip(
+        self, handle: int, data: Sequence[int]
+    ) -> tuple[int, bytearray]:
+        """
+        pigpio の i2c_zip のうち、Write (7), Read (6), Addr (4), End (0) を
+        扱います。
+        """
+        self._count("i2c_zip")
+        if handle not in self._handles:
+            raise pigpio.error("unknown handle")
+        _, address = self._handles[handle]
+        result = bytearray()
+        pointer = 0
+        i = 0
+        while i < len(data) and data[i] != ZIP_END:
+            cmd = data[i]
+            if cmd == ZIP_WRITE:
+                length = data[i + 1]
+                payload = list(data[i + 2 : i + 2 + length])
+                device = self._device_at(address)
+                pointer = payload[0]
+                if len(payload) > 1:
+                    device.write(pointer, payload[1:])
+                i += 2 + length
+            elif cmd == ZIP_READ:
+                length = data[i + 1]
+                result += self._device_at(address).read(pointer, length)
+                i += 2
+            elif cmd == ZIP_ADDR:
+                address = data[i + 1]
+                i += 2
+            else:
+                raise pigpio.error(f"unsupported i2c_zip command: {cmd}")
+        return len(result), result
+
+    def _device_at(self, address: int) -> SimulatedVL53L0X:
+        for sensor in self.sensors:
+            if sensor.powered and sensor.address == address:
+                return sensor
+        raise pigpio.error("I2C operation failed")
+
+    # --- GPIO ---
+
+    def set_mode(self, gpio: int, mode: int) -> int:
+        return 0
+
+    def set_pull_up_down(self, gpio: int, pud: int) -> int:
+        return 0
+
+    def write(self, gpio: int, level: int) -> int:
+        self._levels[gpio] = level
+        for sensor in self.sensors:
+            if sensor.xshut_pin == gpio:
+                sensor.set_xshut(level)
+        return 0
+
+    def read(self, gpio: int) -> int:
+        for sensor in self.sensors:
+            if sensor.gpio_pin == gpio:
+                return sensor.gpio_level()
+        return self._levels.get(gpio, 0)
+
+    def callback(
+        self,
+        user_gpio: int,
+        edge: int = pigpio.RISING_EDGE,
+        func: Callable[[int, int, int], None] | None = None,
+    ) -> _SimCallback:
+        cb = _SimCallback(self, user_gpio, edge, func)
+        self._callbacks.append(cb)
+        # コールバックが登録されたら、測定完了時刻にタイマーを仕掛ける
+        for sensor in self.sensors:
+            if sensor.gpio_pin == user_gpio:
+                with sensor._lock:
+                    sensor._arm_timer()
+        return cb
+
+    def _remove_callback(self, cb: _SimCallback) -> None:
+        if cb in self._callbacks:
+            self._callbacks.remove(cb)
+
+    def _fire_callbacks(self, gpio: int, level: int) -> None:
+        edge = pigpio.RISING_EDGE if level else pigpio.FALLING_EDGE
+        tick = int(time.monotonic() * 1_000_000) & 0xFFFFFFFF
+        for cb in list(self._callbacks):
+            if cb.gpio != gpio or cb.func is None:
+                continue
+            if cb.edge in (edge, pigpio.EITHER_EDGE):
+                cb.func(gpio, level, tick)
+
+    def stop(self) -> None:
+        for sensor in self.sensors:
+            sensor.close()
+        self.connected = False
@@ -0,0 +1,206 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""I2C アクセスと測定の回数・所要時間を集計するモジュール。"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+# レイテンシヒストグラムのバケットの上限 (us)。最後のバケットは上限なし。
+LATENCY_BUCKETS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000)
+_LATENCY_BUCKETS_NS = tuple(b * 1000 for b in LATENCY_BUCKETS_US)
+
+# 測定レイテンシ (測定開始から結果の読み出しまで) のバケットの上限 (秒)
+MEASUREMENT_BUCKETS_S = (0.005, 0.01, 0.02, 0.035, 0.05, 0.1, 0.2, 0.5, 1.0)
+_MEASUREMENT_BUCKETS_NS = tuple(
+    round(b * 1_000_000_000) for b in MEASUREMENT_BUCKETS_S
+)
+
+# record_timeout() の種類
+TIMEOUT_MEASUREMENT = "measurement"
+TIMEOUT_REF_CALIBRATION = "ref_calibration"
+
+
+class _OpStats:
+    """
+    操作 (read_byte など) ごとの集計。
+    """
+
+    __slots__ = ("bytes", "count", "errors", "histogram", "time_ns")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.time_ns = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
+
+
+class BusStats:
+    """
+    I2C トランザクションと測定の統計。
+
+    `VL53L0X` の `read_byte()` などから `record()` が、
+    測定結果の読み出しから `record_measurement()` が呼ばれます。
+    複数のスレッドから呼ばれてもよいように、ロックを取って更新します。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        統計を消去します。
+        """
+        with self._lock:
+            self._ops: dict[str, _OpStats] = {}
+            self._registers: dict[int, Counter[str]] = {}
+            self._time_ns = 0
+            self._measurements = 0
+            self._measurement_time_ns = 0
+            self._measurement_histogram = [0] * (
+                len(MEASUREMENT_BUCKETS_S) + 1
+            )
+            self._last_range_mm: int | None = None
+            self._last_measurement_time = 0.0
+            self._timeouts: Counter[str] = Counter()
+
+    def _op(self, op: str) -> _OpStats:
+        stats = self._ops.get(op)
+        if stats is None:
+            stats = self._ops[op] = _OpStats()
+        return stats
+
+    def _count_register(self, op: str, register: int | None) -> None:
+        if register is None:
+            return
+        counter = self._registers.get(register)
+        if counter is None:
+            counter = self._registers[register] = Counter()
+        counter[op] += 1
+
+    def record(
+        self, op: str, register: int | None, nbytes: int, elapsed_ns: int
+    ) -> None:
+        """
+        成功した I2C トランザクションを1回記録します。
+
+        Args:
+            op (str): 操作名
+            register (int | None): レジスタ。`i2c_zip` など複数の
+                レジスタにまたがる場合は None。
+            nbytes (int): 転送したデータのバイト数
+            elapsed_ns (int): 所要時間 (ns)
+        """
+        with self._lock:
+            stats = self._op(op)
+            stats.count += 1
+            stats.bytes += nbytes
+            stats.time_ns += elapsed_ns
+            bucket = bisect_left(_LATENCY_BUCKETS_NS, elapsed_ns)
+            stats.histogram[bucket] += 1
+            self._time_ns += elapsed_ns
+            self._count_register(op, register)
+
+    def record_error(self, op: str, register: int | None) -> None:
+        """
+        失敗した I2C トランザクションを1回記録します。
+        """
+        with self._lock:
+            self._op(op).errors += 1
+            self._count_register(op, register)
+
+    def record_measurement(self, range_mm: int, latency_ns: int) -> None:
+        """
+        測定結果の読み出しを1回記録します。
+
+        Args:
+            range_mm (int): オフセット適用後の距離 (mm)
+            latency_ns (int): 測定開始 (連続測距では前回の結果) から
+                結果の読み出しまでの時間 (ns)
+        """
+        with self._lock:
+            self._measurements += 1
+            self._measurement_time_ns += latency_ns
+            bucket = bisect_left(_MEASUREMENT_BUCKETS_NS, latency_ns)
+            self._measurement_histogram[bucket] += 1
+            self._last_range_mm = range_mm
+            self._last_measurement_time = time.time()
+
+    def record_timeout(self, kind: str) -> None:
+        """
+        データ準備完了待ちのタイムアウトを1回記録します。
+
+        Args:
+            kind (str): `TIMEOUT_MEASUREMENT` または
+                `TIMEOUT_REF_CALIBRATION`
+        """
+        with self._lock:
+            self._timeouts[kind] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        現在の統計を、JSON に変換できる辞書で返します。
+
+        Returns:
+            dict[str, Any]:
+                `transactions` (成功したトランザクション数)、
+                `errors` (失敗したトランザクション数)、
+                `bus_time_s` (I2C アクセスにかかった時間の累計)、
+                `ops` (操作ごとの `count`, `errors`, `bytes`, `time_s`,
+                `histogram`)、
+                `registers` (レジスタ (16進文字列) ごとの操作回数)、
+                `measurements` (測定の `count`, `time_s`, `histogram`,
+                `last_range_mm`, `last_time`)、
+                `timeouts` (種類ごとのタイムアウト回数)。
+                `histogram` は `LATENCY_BUCKETS_US` (測定は
+                `MEASUREMENT_BUCKETS_S`) の各上限 (最後は "+Inf") ごとの
+                回数 (累積ではない)。
+        """
+        labels = [f"{b}us" for b in LATENCY_BUCKETS_US] + ["+Inf"]
+        with self._lock:
+            ops = {
+                op: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "bytes": stats.bytes,
+                    "time_s": stats.time_ns / 1e9,
+                    "histogram": dict(
+                        zip(labels, stats.histogram, strict=True)
+                    ),
+                }
+                for op, stats in sorted(self._ops.items())
+            }
+            registers = {
+                f"0x{register:02X}": dict(counter)
+                for register, counter in sorted(self._registers.items())
+            }
+            bus_time_s = self._time_ns / 1e9
+            measurements = {
+                "count": self._measurements,
+                "time_s": self._measurement_time_ns / 1e9,
+                "histogram": dict(
+                    zip(
+                        [f"{b}s" for b in MEASUREMENT_BUCKETS_S] + ["+Inf"],
+                        self._measurement_histogram,
+                        strict=True,
+                    )
+                ),
+                "last_range_mm": self._last_range_mm,
+                "last_time": self._last_measurement_time,
+            }
+            timeouts = dict(self._timeouts)
+
+        return {
+            "transactions": sum(s["count"] for s in ops.values()),
+            "errors": sum(s["errors"] for s in ops.values()),
+            "bus_time_s": bus_time_s,
+            "ops": ops,
+            "registers": registers,
+            "measurements": measurements,
+            "timeouts": timeouts,
+        }
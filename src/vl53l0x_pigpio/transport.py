@@ -0,0 +1,281 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+`VL53L0X` のレジスタアクセスを行う I2C トランスポート。
+
+- `PigpioTransport`: pigpiod 経由 (デフォルト)
+- `LinuxI2CTransport`: `/dev/i2c-N` に `I2C_RDWR` ioctl で直接アクセス
+  (pigpiod とのソケット通信がないので、1トランザクションの時間が短い)
+- `MemoryTransport`: メモリ上のデバイス (シミュレーター) にアクセス
+  (ハードウェアなしのテスト・ベンチマーク用)
+
+```python
+from vl53l0x_pigpio import VL53L0X
+from vl53l0x_pigpio.transport import LinuxI2CTransport
+
+with VL53L0X(None, transport=LinuxI2CTransport(1, 0x29)) as sensor:
+    print(sensor.get_range())
+```
+
+ワードの値は、VL53L0X と同じビッグエンディアンで扱います。
+"""
+
+import ctypes
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Any, Protocol
+
+import pigpio
+
+# i2c_zip のコマンド
+ZIP_END = 0
+ZIP_WRITE = 7
+
+# linux/i2c-dev.h, linux/i2c.h
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+I2C_RDWR_MAX_MSGS = 42
+
+
+class I2CTransport(ABC):
+    """
+    I2C トランスポートの基底クラス。
+
+    1つのデバイス (アドレス) へのレジスタアクセスを提供します。
+    失敗した場合は `pigpio.error` または `OSError` を送出します。
+    """
+
+    @abstractmethod
+    def read_byte(self, register: int) -> int: ...
+
+    @abstractmethod
+    def write_byte(self, register: int, value: int) -> None: ...
+
+    def read_word(self, register: int) -> int:
+        data = self.read_block(register, 2)
+        return (data[0] << 8) | data[1]
+
+    def write_word(self, register: int, value: int) -> None:
+        self.write_block(register, [(value >> 8) & 0xFF, value & 0xFF])
+
+    @abstractmethod
+    def read_block(self, register: int, count: int) -> list[int]: ...
+
+    @abstractmethod
+    def write_block(self, register: int, data: Sequence[int]) -> None: ...
+
+    def write_batch(self, segments: Sequence[Sequence[int]]) -> None:
+        """
+        複数の書き込み (`[register, *data]` のリスト) を、
+        できるだけ1回のトランザクションで送信します。
+        """
+        for segment in segments:
+            self.write_block(segment[0], segment[1:])
+
+    def close(self) -> None:
+        pass
+
+
+class PigpioTransport(I2CTransport):
+    """
+    pigpiod 経由のトランスポート。
+    """
+
+    def __init__(self, pi: pigpio.pi, i2c_bus: int, i2c_address: int):
+        """
+        Args:
+            pi (pigpio.pi): pigpio のインスタンス
+            i2c_bus (int): I2C バス番号
+            i2c_address (int): I2C アドレス
+        """
+        self.pi = pi
+        self.handle = pi.i2c_open(i2c_bus, i2c_address)
+
+    def read_byte(self, register: int) -> int:
+        return int(self.pi.i2c_read_byte_data(self.handle, register))
+
+    def write_byte(self, register: int, value: int) -> None:
+        self.pi.i2c_write_byte_data(self.handle, register, value)
+
+    def read_word(self, register: int) -> int:
+        val = self.pi.i2c_read_word_data(self.handle, register)
+        # pigpioはリトルエンディアンで読み取りますが、VL53L0Xはビッグエンディアンです。
+        return int(((val & 0xFF) << 8) | (val >> 8))
+
+    def write_word(self, register: int, value: int) -> None:
+        # pigpioはリトルエンディアンで書き込みますが、VL53L0Xはビッグエンディアンです。
+        value = ((value & 0xFF) << 8) | (value >> 8)
+        self.pi.i2c_write_word_data(self.handle, register, value)
+
+    def read_block(self, register: int, count: int) -> list[int]:
+        result, data = self.pi.i2c_read_i2c_block_data(
+            self.handle, register, count
+        )
+        # pigpio の例外が無効な場合、失敗はデータなし (負のエラーコード)
+        if not isinstance(data, bytearray):
+            raise OSError(
+                f"i2c_read_i2c_block_data failed: register={register:#04x}, "
+                f"result={result}"
+            )
+        return list(data)
+
+    def write_block(self, register: int, data: Sequence[int]) -> None:
+        self.pi.i2c_write_i2c_block_data(self.handle, register, data)
+
+    def write_batch(self, segments: Sequence[Sequence[int]]) -> None:
+        """
+        `i2c_zip` 1回で送信します。
+        """
+        cmds: list[int] = []
+        for segment in segments:
+            cmds += [ZIP_WRITE, len(segment), *segment]
+        cmds.append(ZIP_END)
+        self.pi.i2c_zip(self.handle, cmds)
+
+    def close(self) -> None:
+        self.pi.i2c_close(self.handle)
+
+
+class _I2CMsg(ctypes.Structure):
+    """
+    struct i2c_msg
+    """
+
+    _fields_ = [
+        ("addr", ctypes.c_uint16),
+        ("flags", ctypes.c_uint16),
+        ("len", ctypes.c_uint16),
+        ("buf", ctypes.POINTER(ctypes.c_uint8)),
+    ]
+
+
+class _I2CRdwrData(ctypes.Structure):
+    """
+    struct i2c_rdwr_ioctl_data
+    """
+
+    _fields_ = [
+        ("msgs", ctypes.POINTER(_I2CMsg)),
+        ("nmsgs", ctypes.c_uint32),
+    ]
+
+
+class LinuxI2CTransport(I2CTransport):
+    """
+    `/dev/i2c-N` に `I2C_RDWR` ioctl で直接アクセスするトランスポート。
+
+    読み出しは、レジスタアドレスの書き込みと読み出しを
+    リピーテッドスタートでつないだ1回の ioctl で行います。
+    pigpiod は不要ですが、`/dev/i2c-N` へのアクセス権が必要です。
+    """
+
+    def __init__(self, i2c_bus: int, i2c_address: int):
+        """
+        Args:
+            i2c_bus (int): I2C バス番号 (`/dev/i2c-{i2c_bus}`)
+            i2c_address (int): I2C アドレス
+        """
+        import fcntl
+
+        self._ioctl = fcntl.ioctl
+        self.i2c_address = i2c_address
+        self.path = f"/dev/i2c-{i2c_bus}"
+        self.fd = os.open(self.path, os.O_RDWR)
+
+        # 読み出し用のメッセージとレジスタアドレスのバッファは使い回す
+        self._reg_buf = (ctypes.c_uint8 * 1)()
+        self._read_msgs = (_I2CMsg * 2)()
+        self._read_msgs[0] = _I2CMsg(i2c_address, 0, 1, self._reg_buf)
+        self._read_data = _I2CRdwrData(self._read_msgs, 2)
+
+    def _transfer(self, msgs: Any, nmsgs: int) -> None:
+        self._ioctl(self.fd, I2C_RDWR, _I2CRdwrData(msgs, nmsgs))
+
+    def read_block(self, register: int, count: int) -> list[int]:
+        buf = (ctypes.c_uint8 * count)()
+        self._reg_buf[0] = register
+        self._read_msgs[1] = _I2CMsg(self.i2c_address, I2C_M_RD, count, buf)
+        self._ioctl(self.fd, I2C_RDWR, self._read_data)
+        return list(buf)
+
+    def read_byte(self, register: int) -> int:
+        return self.read_block(register, 1)[0]
+
+    def write_block(self, register: int, data: Sequence[int]) -> None:
+        self.write_batch([[register, *data]])
+
+    def write_byte(self, register: int, value: int) -> None:
+        self.write_batch([[register, value]])
+
+    def write_batch(self, segments: Sequence[Sequence[int]]) -> None:
+        """
+        各書き込みを1つのメッセージにして、1回の ioctl で送信します。
+        """
+        for start in range(0, len(segments), I2C_RDWR_MAX_MSGS):
+            chunk = segments[start : start + I2C_RDWR_MAX_MSGS]
+            msgs = (_I2CMsg * len(chunk))()
+            for i, segment in enumerate(chunk):
+                buf = (ctypes.c_uint8 * len(segment))(*segment)
+                msgs[i] = _I2CMsg(self.i2c_address, 0, len(segment), buf)
+            self._transfer(msgs, len(chunk))
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class RegisterDevice(Protocol):
+    """
+    `MemoryTransport` が扱うデバイス (`SimulatedVL53L0X` など)。
+    """
+
+    def read(self, register: int, count: int) -> bytearray: ...
+
+    def write(self, register: int, data: Sequence[int]) -> None: ...
+
+
+class MemoryTransport(I2CTransport):
+    """
+    メモリ上のデバイスに直接アクセスするトランスポート。
+
+    pigpio もハードウェアも使わないので、テストやベンチマークで
+    ドライバー自身のオーバーヘッドだけを測れます。
+    `transactions` は、実際のバスで発生するトランザクション数です。
+    """
+
+    def __init__(self, device: RegisterDevice | None = None):
+        """
+        Args:
+            device (RegisterDevice | None): デバイス。None の場合は
+                待ち時間なしの `SimulatedVL53L0X` を作ります。
+        """
+        if device is None:
+            from .sim import SimulatedVL53L0X
+
+            device = SimulatedVL53L0X(time_scale=0)
+        self.device = device
+        self.transactions = 0
+
+    def read_byte(self, register: int) -> int:
+        self.transactions += 1
+        return self.device.read(register, 1)[0]
+
+    def write_byte(self, register: int, value: int) -> None:
+        self.transactions += 1
+        self.device.write(register, [value])
+
+    def read_block(self, register: int, count: int) -> list[int]:
+        self.transactions += 1
+        return list(self.device.read(register, count))
+
+    def write_block(self, register: int, data: Sequence[int]) -> None:
+        self.transactions += 1
+        self.device.write(register, data)
+
+    def write_batch(self, segments: Sequence[Sequence[int]]) -> None:
+        self.transactions += 1
+        for segment in segments:
+            self.device.write(segment[0], segment[1:])
@@ -1,4 +1,6 @@
+import threading
 import unittest
+from collections.abc import Sequence
 from unittest.mock import Mock, patch
 
 import numpy as np
@@ -9,16 +11,45 @@ from vl53l0x_pigpio.constants import (
     GLOBAL_CFG_SPAD_ENABLES_REF_0,
     MSRC_CONFIG_CONTROL,
     PRE_RANGE_CONFIG_VCSEL_PERIOD,
+    REG_91,
     REG_92,
+    REG_FF,
     RESULT_INTERRUPT_STATUS,
+    RESULT_RANGE_STATUS,
+    SYS_INTERMEASUREMENT_PERIOD,
+    SYSRANGE_MODE_BACKTOBACK,
+    SYSRANGE_MODE_SINGLESHOT,
+    SYSRANGE_MODE_TIMED,
     SYSRANGE_START,
     SYSTEM_SEQUENCE_CONFIG,
     VALUE_00,
     VALUE_01,
     VALUE_10,
     VALUE_83,
+    VHV_CFG_PAD_SCL_SDA_EXTSUP_HV,
 )
-from vl53l0x_pigpio.driver import VL53L0X
+from vl53l0x_pigpio.driver import RANGE_DTYPE, VL53L0X
+from vl53l0x_pigpio.transport import ZIP_WRITE, MemoryTransport
+
+
+def bus_writes(mock_pi: Mock) -> list[tuple[int, int]]:
+    """
+    バイト書き込みと i2c_zip の書き込みを、呼び出し順に
+    1バイトずつの `(register, value)` に展開します。
+    """
+    writes: list[tuple[int, int]] = []
+    for name, args, _ in mock_pi.method_calls:
+        if name == "i2c_write_byte_data":
+            writes.append((args[1], args[2]))
+        elif name == "i2c_zip":
+            cmds = args[1]
+            i = 0
+            while cmds[i] == ZIP_WRITE:
+                length = cmds[i + 1]
+                register, *data = cmds[i + 2 : i + 2 + length]
+                writes += [(register + j, v) for j, v in enumerate(data)]
+                i += 2 + length
+    return writes
 
 
 class TestVL53L0XDriver(unittest.TestCase):
@@ -124,36 +155,251 @@ class TestVL53L0XDriver(unittest.TestCase):
 
     def test_get_ranges(self) -> None:
         num_samples = 5
-        # Mock a sequence of range values
-        mock_ranges_pigpio_endian = [
-            0xD204,
-            0xD304,
-            0xD404,
-            0xD504,
-            0xD604,
-        ]  # 1234, 1235, 1236, 1237, 1238
-        range_iterator = iter(mock_ranges_pigpio_endian)
-
-        def read_word_side_effect(handle: int, register: int) -> int:
-            if register == 30:  # RESULT_RANGE_STATUS + 10
-                return next(range_iterator)
-            return 0
-
-        # Configure the mock to return different values on successive calls
-        self.mock_pi.i2c_read_word_data.side_effect = read_word_side_effect
+        # Mock a sequence of result blocks
+        # 1234, 1235, 1236, 1237, 1238 mm, status 11, signal 2.5 MCPS
+        range_iterator = iter(range(1234, 1239))
+
+        def read_block_side_effect(
+            handle: int, register: int, count: int
+        ) -> tuple[int, bytearray]:
+            block = bytearray(count)
+            if register == RESULT_RANGE_STATUS and count == 12:
+                value = next(range_iterator)
+                block[0] = 0x58
+                block[6:8] = (320).to_bytes(2, "big")
+                block[10:12] = value.to_bytes(2, "big")
+            return count, block
 
         with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_read_i2c_block_data.side_effect = (
+                read_block_side_effect
+            )
+            tof.set_offset(1236)
             ranges = tof.get_ranges(num_samples)
             self.assertIsInstance(ranges, np.ndarray)
+            self.assertEqual(ranges.dtype, RANGE_DTYPE)
             self.assertEqual(ranges.shape, (num_samples,))
-            self.assertTrue(
-                np.array_equal(
-                    ranges, np.array([1234, 1235, 1236, 1237, 1238])
-                )
+            # オフセット適用後の負の値も折り返さない
+            self.assertEqual(ranges["range_mm"].tolist(), [-2, -1, 0, 1, 2])
+            self.assertTrue(np.all(ranges["range_status"] == 11))
+            self.assertTrue(np.all(ranges["signal_rate_mcps"] == 2.5))
+            self.assertTrue(np.all(np.diff(ranges["timestamp_ns"]) >= 0))
+
+    def test_get_ranges_out(self) -> None:
+        out = np.zeros(8, dtype=RANGE_DTYPE)
+        with VL53L0X(self.mock_pi) as tof:
+            ranges = tof.get_ranges(3, out=out)
+            self.assertEqual(len(ranges), 3)
+            # 呼び出し側のバッファに書き込まれる
+            self.assertTrue(np.shares_memory(ranges, out))
+
+            with self.assertRaises(ValueError):
+                tof.get_ranges(9, out=out)
+            with self.assertRaises(ValueError):
+                tof.get_ranges(3, out=np.zeros(3, dtype=np.int32))
+
+    def test_iter_ranges_continuous(self) -> None:
+        self.mock_pi.i2c_read_word_data.return_value = 0xD204
+
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.reset_mock()
+            ranges = list(tof.iter_ranges(3))
+            self.assertEqual(ranges, [1234, 1234, 1234])
+            self.assertFalse(tof.continuous)
+
+            writes = bus_writes(self.mock_pi)
+            # 開始は back-to-back モード、停止でシングルショットに戻す
+            self.assertIn((SYSRANGE_START, SYSRANGE_MODE_BACKTOBACK), writes)
+            self.assertEqual(
+                writes.index((SYSRANGE_START, SYSRANGE_MODE_BACKTOBACK)),
+                7,
             )
+            self.assertIn((SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT), writes)
+            # stop_variable は開始時と停止時だけ書き込み、各測定では行わない
+            self.assertEqual([w[0] for w in writes].count(REG_91), 2)
+
+    def test_start_continuous_timed(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            # OSC_CALIBRATE_VAL = 3 (pigpio はリトルエンディアンで読む)
+            self.mock_pi.i2c_read_word_data.return_value = 0x0300
+            tof.start_continuous(period_ms=100)
+            self.assertTrue(tof.continuous)
+
+            # 100 ms * 3 = 300 = 0x0000012C をビッグエンディアンで書き込む
+            self.mock_pi.i2c_write_i2c_block_data.assert_called_with(
+                1, SYS_INTERMEASUREMENT_PERIOD, [0x00, 0x00, 0x01, 0x2C]
+            )
+            self.mock_pi.i2c_write_byte_data.assert_called_with(
+                1, SYSRANGE_START, SYSRANGE_MODE_TIMED
+            )
+
+            tof.stop_continuous()
+            self.assertFalse(tof.continuous)
+
+    def test_get_range_with_gpio_pin(self) -> None:
+        self.mock_pi.i2c_read_word_data.return_value = 0xD204
+        # 初期化中のキャリブレーションは GPIO1 = L で即完了
+        self.mock_pi.read.return_value = 0
+
+        with VL53L0X(self.mock_pi, gpio_pin=17) as tof:
+            self.mock_pi.callback.assert_called_once()
+            self.mock_pi.read.return_value = 1  # GPIO1 はまだ H
+            callback_func = self.mock_pi.callback.call_args.args[2]
+
+            # 測定完了で GPIO1 が立ち下がる
+            timer = threading.Timer(0.01, callback_func, (17, 0, 0))
+            timer.start()
+
+            self.mock_pi.i2c_read_byte_data.reset_mock()
+            distance = tof.get_range()
+            timer.join()
+
+            self.assertEqual(distance, 1234)
+            # 割り込みステータスはポーリングしない
+            polled = [
+                c
+                for c in self.mock_pi.i2c_read_byte_data.call_args_list
+                if c.args[1] == RESULT_INTERRUPT_STATUS
+            ]
+            self.assertEqual(polled, [])
+
+        self.mock_pi.callback.return_value.cancel.assert_called_once()
+
+    def test_initialize_is_batched(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            stats = tof.get_batch_stats()
+            self.assertGreater(stats["saved"], 0)
+            self.assertEqual(
+                stats["saved"], stats["ops"] - stats["transactions"]
+            )
+            self.mock_pi.i2c_zip.assert_called()
+
+    def test_extsup_hv_failure_ignored(self) -> None:
+        # VHV_CFG_PAD_SCL_SDA_EXTSUP_HV の書き込みに失敗しても
+        # 初期化は続き、失敗はバッチの後の送信まで持ち越されない
+        class FailingTransport(MemoryTransport):
+            def write_batch(self, segments: Sequence[Sequence[int]]) -> None:
+                if any(
+                    segment[0] == VHV_CFG_PAD_SCL_SDA_EXTSUP_HV
+                    for segment in segments
+                ):
+                    raise OSError("write failed")
+                super().write_batch(segments)
+
+        transport = FailingTransport()
+        with VL53L0X(None, transport=transport) as tof:
+            self.assertEqual(
+                transport.device.read(VHV_CFG_PAD_SCL_SDA_EXTSUP_HV, 1)[0]
+                & 0x01,
+                0,
+            )
+            # 初期化の残りの書き込みは送信されている
             self.assertEqual(
-                self.mock_pi.i2c_read_word_data.call_count, num_samples + 4
-            )  # +4 for initialization
+                transport.device.read(SYSTEM_SEQUENCE_CONFIG, 1)[0],
+                tof.sequence_config,
+            )
+
+    def test_batch_merges_contiguous_writes(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_zip.reset_mock()
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            with tof.batch():
+                tof.write_byte(0x10, 0xAA)
+                tof.write_byte(0x11, 0xBB)
+                tof.write_word(0x12, 0x1234)
+                tof.write_byte(0xFF, 0x01)
+                tof.write_byte(0x00, 0x02)
+                self.mock_pi.i2c_zip.assert_not_called()
+
+            self.mock_pi.i2c_write_byte_data.assert_not_called()
+            self.mock_pi.i2c_zip.assert_called_once_with(
+                1,
+                [
+                    *[7, 5, 0x10, 0xAA, 0xBB, 0x12, 0x34],
+                    *[7, 2, 0xFF, 0x01],
+                    *[7, 2, 0x00, 0x02],
+                    0,
+                ],
+            )
+
+    def test_batch_discards_on_error(self) -> None:
+        for cache in (False, True):
+            with self.subTest(cache_registers=cache):
+                transport = MemoryTransport()
+                with VL53L0X(
+                    None, transport=transport, cache_registers=cache
+                ) as tof:
+                    config = tof.read_byte(SYSTEM_SEQUENCE_CONFIG)
+                    transactions = transport.transactions
+                    with self.assertRaises(RuntimeError), tof.batch():
+                        tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0x00)
+                        raise RuntimeError("abort")
+
+                    # 途中まで組み立てた書き込みは送らない
+                    self.assertEqual(transport.transactions, transactions)
+                    self.assertEqual(
+                        tof.read_byte(SYSTEM_SEQUENCE_CONFIG), config
+                    )
+
+    def test_register_cache(self) -> None:
+        with VL53L0X(self.mock_pi, cache_registers=True) as tof:
+            self.mock_pi.i2c_read_byte_data.reset_mock()
+            self.mock_pi.i2c_read_word_data.reset_mock()
+
+            budget = tof.get_measurement_timing_budget()
+            tof.set_measurement_timing_budget(budget)
+
+            # 初期化で読み書きした設定レジスタは読み直さない
+            self.mock_pi.i2c_read_byte_data.assert_not_called()
+            self.mock_pi.i2c_read_word_data.assert_not_called()
+
+            # ページ1での書き込みはキャッシュに反映しない
+            tof.write_byte(REG_FF, 0x01)
+            tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0x55)
+            tof.write_byte(REG_FF, 0x00)
+            self.assertEqual(tof.read_byte(SYSTEM_SEQUENCE_CONFIG), 0xE8)
+            self.mock_pi.i2c_read_byte_data.assert_not_called()
+
+            # 無効化すると、再びデバイスから読む
+            tof.invalidate_register_cache()
+            tof.read_byte(SYSTEM_SEQUENCE_CONFIG)
+            self.mock_pi.i2c_read_byte_data.assert_called_once_with(
+                1, SYSTEM_SEQUENCE_CONFIG
+            )
+
+    def test_get_measurement(self) -> None:
+        block = bytearray(
+            [
+                0x58,  # レンジステータス 11 (正常)
+                0x00,
+                0x05,  # 有効SPAD数 5.5 (8.8)
+                0x80,
+                0x00,
+                0x00,
+                0x01,  # 信号レート 3.0 MCPS (9.7)
+                0x80,
+                0x00,
+                0x40,  # 環境光レート 0.5 MCPS (9.7)
+                0x04,  # 距離 1234 mm
+                0xD2,
+            ]
+        )
+        with VL53L0X(self.mock_pi) as tof:
+            tof.set_offset(34)
+            self.mock_pi.i2c_read_i2c_block_data.side_effect = None
+            self.mock_pi.i2c_read_i2c_block_data.return_value = (12, block)
+
+            m = tof.get_measurement()
+
+            self.mock_pi.i2c_read_i2c_block_data.assert_called_with(
+                1, RESULT_RANGE_STATUS, 12
+            )
+            self.assertEqual(m.range_mm, 1200)
+            self.assertEqual(m.range_status, 11)
+            self.assertTrue(m.valid)
+            self.assertEqual(m.signal_rate_mcps, 3.0)
+            self.assertEqual(m.ambient_rate_mcps, 0.5)
+            self.assertEqual(m.effective_spad_count, 5.5)
 
     def test_read_byte(self) -> None:
         self.mock_pi.i2c_read_byte_data.return_value = 0xCD
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import mock_open, patch
@@ -39,18 +41,28 @@ class TestConfigManager(unittest.TestCase):
         config = load_config(filepath)
         self.assertEqual(config, {})
 
-    @patch("json.dump")
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("pathlib.Path.mkdir")
-    def test_save_config(self, mock_mkdir, mock_file, mock_json_dump):
-        filepath = Path("/tmp/test_config.json")
-        config_data = {"offset_mm": 10}
-        save_config(filepath, config_data)
-        mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-        mock_file.assert_called_once_with(filepath, "w", encoding="utf-8")
-        mock_json_dump.assert_called_once_with(
-            config_data, mock_file(), indent=4
-        )
+    def test_save_config(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = Path(tmpdir) / "sub" / "test_config.json"
+            config_data = {"offset_mm": 10}
+            save_config(filepath, config_data)
+            self.assertEqual(load_config(filepath), config_data)
+            # 一時ファイルは残らない
+            self.assertEqual(os.listdir(filepath.parent), [filepath.name])
+
+    def test_save_config_interrupted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = Path(tmpdir) / "test_config.json"
+            save_config(filepath, {"offset_mm": 10})
+
+            # 書き込み中の失敗では、元のファイルはそのまま
+            with (
+                patch("json.dump", side_effect=OSError("disk full")),
+                self.assertRaises(OSError),
+            ):
+                save_config(filepath, {"offset_mm": 20})
+            self.assertEqual(load_config(filepath), {"offset_mm": 10})
+            self.assertEqual(os.listdir(tmpdir), [filepath.name])
 
 
 if __name__ == "__main__":
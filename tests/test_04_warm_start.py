@@ -0,0 +1,176 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from vl53l0x_pigpio.config_manager import load_config, save_config
+from vl53l0x_pigpio.driver import (
+    REG_94,
+    SYSRANGE_START,
+    SYSTEM_SEQUENCE_CONFIG,
+    VL53L0X,
+)
+
+
+class TestVL53L0XWarmStart(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_i2c_block_data.side_effect = (
+            self.mock_read_block_data
+        )
+        self.patcher = patch("pigpio.pi", return_value=self.mock_pi)
+        self.patcher.start()
+
+        self.reg_map = {
+            0x91: 0x3C,  # stop_variable
+            0x83: 0x01,  # To exit the loop in _get_spad_info
+            0x92: 0x85,  # spad_count = 5, is_aperture = True
+            0x13: 0x01,  # To exit the loop in get_range
+            0xC0: 0xEE,  # IDENTIFICATION_MODEL_ID
+            0xC2: 0x10,  # IDENTIFICATION_REVISION_ID
+            0xCB: 0x2A,  # VHV settings
+            0xEE: 0x05,  # phase cal
+        }
+        # NVM のパーツUID (上位・下位の順に 0x90 から読み出す)
+        self.part_uid = [0x01234567, 0x89ABCDEF]
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_file = Path(self.tmpdir.name) / "vl53l0x.json"
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_read_block_data(
+        self, handle: int, register: int, count: int
+    ) -> tuple[int, bytearray]:
+        if register == 0x90:
+            # 上位・下位を交互に返す
+            word = self.part_uid.pop(0)
+            self.part_uid.append(word)
+            return count, bytearray(word.to_bytes(4, "big"))
+        return count, bytearray([0xFF] * count)
+
+    def written(self) -> list[tuple[int, int]]:
+        return [
+            c.args[1:]
+            for c in self.mock_pi.i2c_write_byte_data.call_args_list
+        ] + [
+            (cmds[i + 2], cmds[i + 3])
+            for c in self.mock_pi.i2c_zip.call_args_list
+            for cmds in [c.args[1]]
+            for i in range(len(cmds))
+            if cmds[i] == 7 and i + 3 < len(cmds)
+        ]
+
+    def test_cold_start_saves_state(self) -> None:
+        save_config(self.config_file, {"offset_mm": 12})
+
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ) as tof:
+            self.assertEqual(tof.offset_mm, 12)
+
+        config = load_config(self.config_file)
+        self.assertEqual(config["offset_mm"], 12)
+        state = config["warm_start"]["1:0x29"]
+        self.assertEqual(state["stop_variable"], 0x3C)
+        self.assertEqual(state["spad_count"], 5)
+        self.assertTrue(state["spad_is_aperture"])
+        self.assertEqual(len(state["ref_spad_map"]), 6)
+        self.assertEqual(state["vhv_settings"], 0x2A)
+        self.assertEqual(state["phase_cal"], 0x05)
+
+    def test_warm_start_skips_discovery_and_calibration(self) -> None:
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+        self.mock_pi.reset_mock()
+
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+
+        written = self.written()
+        # SPAD情報の取得 (REG_94 <- 0x6B) とリファレンスキャリブレーションを
+        # 省略 (パーツUIDの読み出しだけ行う)
+        self.assertNotIn((REG_94, 0x6B), written)
+        self.assertIn((REG_94, 0x7B), written)
+        self.assertNotIn((SYSRANGE_START, 0x41), written)
+        self.assertNotIn((SYSTEM_SEQUENCE_CONFIG, 0x01), written)
+        self.assertNotIn((SYSTEM_SEQUENCE_CONFIG, 0x02), written)
+        # 保存した VHV 設定を書き戻す
+        self.assertIn((0xCB, 0x2A), written)
+
+    def test_phase_cal_masked(self) -> None:
+        # ST API と同じく、ビット4を除いて保存する
+        self.reg_map[0xEE] = 0x95
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+        config = load_config(self.config_file)
+        self.assertEqual(config["warm_start"]["1:0x29"]["phase_cal"], 0x85)
+
+        # 書き戻すときは、ビット7はレジスタの値を残す
+        self.reg_map[0xEE] = 0x05
+        self.mock_pi.reset_mock()
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+        self.assertIn((0xEE, 0x05), self.written())
+
+    def test_mismatch_falls_back_to_cold_start(self) -> None:
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+        self.mock_pi.reset_mock()
+        self.reg_map[0x91] = 0x3D  # 別のデバイス
+
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+
+        self.assertIn((REG_94, 0x6B), self.written())
+        config = load_config(self.config_file)
+        self.assertEqual(
+            config["warm_start"]["1:0x29"]["stop_variable"], 0x3D
+        )
+
+    def test_swapped_sensor_falls_back_to_cold_start(self) -> None:
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+        config = load_config(self.config_file)
+        self.assertEqual(
+            config["warm_start"]["1:0x29"]["part_uid"], 0x0123456789ABCDEF
+        )
+
+        # 同じバス・アドレスに、stop_variable だけが同じ別の個体
+        self.part_uid = [0x01234567, 0x89ABCDEE]
+        self.mock_pi.reset_mock()
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, warm_start=True
+        ):
+            pass
+
+        self.assertIn((REG_94, 0x6B), self.written())
+        config = load_config(self.config_file)
+        self.assertEqual(
+            config["warm_start"]["1:0x29"]["part_uid"], 0x0123456789ABCDEE
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import Mock, call, patch
+
+from vl53l0x_pigpio.driver import I2C_SLAVE_DEVICE_ADDRESS, VL53L0X
+from vl53l0x_pigpio.multi import RangingScheduler, VL53L0XArray
+
+
+class TestVL53L0XArray(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.handles = iter(range(100))
+        self.mock_pi.i2c_open.side_effect = lambda bus, addr: next(
+            self.handles
+        )
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (
+            6,
+            bytearray([0] * 6),
+        )
+        self.patcher = patch("pigpio.pi", return_value=self.mock_pi)
+        self.patcher.start()
+
+        self.reg_map = {
+            0x83: 0x01,  # To exit the loop in _get_spad_info
+            0x13: 0x01,  # To exit the loop in get_range
+        }
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def test_xshut_sequencing_and_address_assignment(self) -> None:
+        with VL53L0XArray(self.mock_pi, [5, 6, 13]) as sensors:
+            self.assertEqual(len(sensors), 3)
+            self.assertEqual(
+                [s.i2c_address for s in sensors], [0x30, 0x31, 0x32]
+            )
+
+        # 最初に全センサーをシャットダウンしてから1台ずつ起動する
+        writes = self.mock_pi.write.call_args_list
+        self.assertEqual(
+            writes,
+            [
+                call(5, 0),
+                call(6, 0),
+                call(13, 0),
+                call(5, 1),
+                call(6, 1),
+                call(13, 1),
+            ],
+        )
+
+        # 起動したセンサーはデフォルトアドレスで開き、新しいアドレスを書く
+        opens = self.mock_pi.i2c_open.call_args_list
+        self.assertEqual(opens[:3], [call(1, 0x29)] * 3)
+        self.assertEqual(
+            sorted(c.args[1] for c in opens[3:]), [0x30, 0x31, 0x32]
+        )
+        address_writes = [
+            c.args[1:]
+            for c in self.mock_pi.i2c_write_byte_data.call_args_list
+            if c.args[1] == I2C_SLAVE_DEVICE_ADDRESS
+        ]
+        self.assertEqual(
+            address_writes,
+            [
+                (I2C_SLAVE_DEVICE_ADDRESS, 0x30),
+                (I2C_SLAVE_DEVICE_ADDRESS, 0x31),
+                (I2C_SLAVE_DEVICE_ADDRESS, 0x32),
+            ],
+        )
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            VL53L0XArray(self.mock_pi, [5, 6], addresses=[0x30])
+        with self.assertRaises(ValueError):
+            VL53L0XArray(self.mock_pi, [5, 6], addresses=[0x30, 0x30])
+
+
+class TestRangingScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.handles = iter(range(100))
+        self.mock_pi.i2c_open.side_effect = lambda bus, addr: next(
+            self.handles
+        )
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.mock_read_word_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (
+            6,
+            bytearray([0] * 6),
+        )
+        # handle -> 割り込みステータスを返す残り回数 (0 になると準備完了)
+        self.not_ready: dict[int, int] = {}
+        self.ready_order: list[int] = []
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        if register == 0x83:
+            return 0x01
+        if register == 0x13:
+            remaining = self.not_ready.get(handle, 0)
+            if remaining > 0:
+                self.not_ready[handle] = remaining - 1
+                return 0x00
+            return 0x01
+        return 0x00
+
+    def mock_read_word_data(self, handle: int, register: int) -> int:
+        if register == 0x1E:
+            self.ready_order.append(handle)
+            value = 100 * (handle + 1)
+            return ((value & 0xFF) << 8) | (value >> 8)
+        return 0
+
+    def test_cycle_reads_in_completion_order(self) -> None:
+        sensors = [
+            VL53L0X(self.mock_pi, i2c_address=0x30 + i) for i in range(3)
+        ]
+        scheduler = RangingScheduler(sensors, poll_interval=0)
+
+        # センサー0が最も遅く、センサー2が最も早く完了する
+        self.not_ready = {0: 3, 1: 1, 2: 0}
+        row = scheduler.cycle()
+
+        self.assertEqual(row.shape, (3,))
+        self.assertEqual(row.tolist(), [100, 200, 300])
+        self.assertEqual(self.ready_order, [2, 1, 0])
+
+    def test_iter_cycles(self) -> None:
+        sensors = [
+            VL53L0X(self.mock_pi, i2c_address=0x30 + i) for i in range(2)
+        ]
+        scheduler = RangingScheduler(sensors, poll_interval=0)
+        rows = list(scheduler.iter_cycles(4))
+        self.assertEqual(len(rows), 4)
+        for row in rows:
+            self.assertEqual(row.tolist(), [100, 200])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+from unittest.mock import Mock, patch
+
+from vl53l0x_pigpio.aio import AsyncVL53L0X
+
+
+class TestAsyncVL53L0X(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (
+            6,
+            bytearray([0] * 6),
+        )
+        # 200 mm (pigpio はリトルエンディアンで読む)
+        self.mock_pi.i2c_read_word_data.return_value = 0xC800
+        self.patcher = patch("pigpio.pi", return_value=self.mock_pi)
+        self.patcher.start()
+
+        self.interrupt_status = 0x01
+        self.reg_map = {0x83: 0x01}
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        if register == 0x13:
+            return self.interrupt_status
+        return self.reg_map.get(register, 0)
+
+    def test_get_range_yields_to_event_loop(self) -> None:
+        ticks: list[int] = []
+
+        async def ticker() -> None:
+            for i in range(3):
+                ticks.append(i)
+                await asyncio.sleep(0)
+
+        async def main() -> int:
+            sensor = await AsyncVL53L0X.create(
+                self.mock_pi, poll_interval=0.001
+            )
+            async with sensor:
+                # 測定完了までしばらく待たせる
+                self.interrupt_status = 0x00
+                loop = asyncio.get_running_loop()
+                loop.call_later(0.02, setattr, self, "interrupt_status", 1)
+
+                results = await asyncio.gather(sensor.get_range(), ticker())
+                return results[0]
+
+        distance = asyncio.run(main())
+        self.assertEqual(distance, 200)
+        self.assertEqual(ticks, [0, 1, 2])
+
+    def test_stream(self) -> None:
+        async def main() -> list[int]:
+            sensor = await AsyncVL53L0X.create(self.mock_pi)
+            async with sensor:
+                return [r async for r in sensor.stream(3)]
+
+        self.assertEqual(asyncio.run(main()), [200, 200, 200])
+
+    def test_timeout(self) -> None:
+        async def main() -> None:
+            sensor = await AsyncVL53L0X.create(self.mock_pi)
+            async with sensor:
+                self.interrupt_status = 0x00
+                with patch.object(
+                    sensor.sensor, "_measurement_timeout_s", return_value=0.01
+                ):
+                    await sensor.get_range()
+
+        with self.assertRaises(Exception) as cm:
+            asyncio.run(main())
+        self.assertIn("Timeout", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
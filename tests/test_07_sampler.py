@@ -0,0 +1,122 @@
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from vl53l0x_pigpio.driver import RANGE_STATUS_VALID, VL53L0X
+from vl53l0x_pigpio.sampler import (
+    SAMPLE_DTYPE,
+    STATUS_ERROR,
+    BackgroundSampler,
+)
+
+
+class TestBackgroundSampler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_i2c_block_data.side_effect = (
+            self.mock_read_block_data
+        )
+        self.patcher = patch("pigpio.pi", return_value=self.mock_pi)
+        self.patcher.start()
+        self.next_range = 0
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        if register in (0x83, 0x13):
+            return 0x01
+        return 0x00
+
+    def mock_read_block_data(
+        self, handle: int, register: int, count: int
+    ) -> tuple[int, bytearray]:
+        if register == 0x14:
+            # 1回ごとに 1mm ずつ増える距離、レンジステータス = 11 (正常)
+            time.sleep(0.0005)
+            self.next_range += 1
+            block = bytearray(count)
+            block[0] = RANGE_STATUS_VALID << 3
+            block[10] = self.next_range >> 8
+            block[11] = self.next_range & 0xFF
+            return count, block
+        return count, bytearray(count)
+
+    def test_latest_snapshot_and_wait_new(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            sampler = BackgroundSampler(tof, capacity=16)
+            self.assertIsNone(sampler.latest())
+            self.assertEqual(len(sampler.snapshot()), 0)
+
+            with sampler:
+                sample = sampler.wait_new(timeout=1.0)
+                self.assertIsNotNone(sample)
+                while sampler.count < 40:
+                    sampler.wait_new(timeout=1.0)
+                latest = sampler.latest()
+                snapshot = sampler.snapshot(10)
+
+            self.assertFalse(tof.continuous)
+
+        assert latest is not None
+        self.assertEqual(latest["status"], RANGE_STATUS_VALID)
+        self.assertEqual(snapshot.dtype, SAMPLE_DTYPE)
+        self.assertEqual(len(snapshot), 10)
+        # 古い順に並び、距離もタイムスタンプも単調増加
+        self.assertTrue(np.all(np.diff(snapshot["range_mm"]) == 1))
+        self.assertTrue(np.all(np.diff(snapshot["timestamp_ns"]) > 0))
+        # バッファ容量を超えた分は上書きされる
+        self.assertEqual(len(sampler.snapshot()), 16)
+
+    def test_error_is_recorded(self) -> None:
+        with (
+            VL53L0X(self.mock_pi) as tof,
+            patch.object(
+                tof, "get_measurement", side_effect=Exception("Timeout")
+            ),
+            BackgroundSampler(tof, capacity=4) as sampler,
+        ):
+            sample = sampler.wait_new(timeout=1.0)
+
+        assert sample is not None
+        self.assertEqual(sample["status"], STATUS_ERROR)
+
+    def test_start_error(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            sampler = BackgroundSampler(tof)
+            with patch.object(
+                tof, "start_continuous", side_effect=OSError("I2C error")
+            ):
+                sampler.start()
+                self.assertIsNone(sampler.wait_new(timeout=0.1))
+                self.assertIsInstance(sampler.error, OSError)
+                with self.assertRaises(OSError):
+                    sampler.stop()
+            # 送出した例外は残さない
+            self.assertIsNone(sampler.error)
+            sampler.stop()
+
+    def test_error_backoff(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            sampler = BackgroundSampler(tof, capacity=1024)
+            log = Mock()
+            sampler._BackgroundSampler__log = log  # type: ignore[attr-defined]
+            with patch.object(
+                tof, "get_measurement", side_effect=Exception("Timeout")
+            ):
+                sampler.start()
+                time.sleep(0.3)
+                sampler.stop()
+
+        # 間隔を延ばしながら再試行するので、失敗は少なく、警告は1回だけ
+        self.assertGreater(sampler.count, 1)
+        self.assertLess(sampler.count, 20)
+        self.assertEqual(log.warning.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+from vl53l0x_pigpio.config_manager import save_config
+from vl53l0x_pigpio.driver import (
+    ALGO_PHASECAL_LIM,
+    FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT,
+    FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+    FINAL_RANGE_CONFIG_VALID_PHASE_HIGH,
+    FINAL_RANGE_CONFIG_VCSEL_PERIOD,
+    GLOBAL_CONFIG_VCSEL_WIDTH,
+    MSRC_CONFIG_TIMEOUT_MACROP,
+    PRE_RANGE_CONFIG_VALID_PHASE_HIGH,
+    PRE_RANGE_CONFIG_VALID_PHASE_LOW,
+    PRE_RANGE_CONFIG_VCSEL_PERIOD,
+    REG_FF,
+    SYSTEM_SEQUENCE_CONFIG,
+    VCSEL_PERIOD_FINAL_RANGE,
+    VCSEL_PERIOD_PRE_RANGE,
+    VL53L0X,
+)
+
+# 書き込んでも値が変わらない (センサーが更新する) レジスタ
+VOLATILE_REGISTERS = {
+    0x13: 0x01,  # To exit the loop in get_range
+    0x83: 0x01,  # To exit the loop in _get_spad_info
+}
+
+
+class TestVL53L0XProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        # ページごとのレジスタファイル {(page, register): value}
+        self.regs: dict[tuple[int, int], int] = {
+            (0, PRE_RANGE_CONFIG_VCSEL_PERIOD): 0x06,  # 14 PCLK
+            (0, FINAL_RANGE_CONFIG_VCSEL_PERIOD): 0x04,  # 10 PCLK
+        }
+        self.page = 0
+
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.read_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.read_word_data
+        self.mock_pi.i2c_write_byte_data.side_effect = self.write_byte_data
+        self.mock_pi.i2c_write_word_data.side_effect = self.write_word_data
+        self.mock_pi.i2c_zip.side_effect = self.zip
+        self.mock_pi.i2c_read_i2c_block_data.side_effect = (
+            lambda handle, register, count: (count, bytearray(count))
+        )
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_file = Path(self.tmpdir.name) / "vl53l0x.json"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def reg(self, register: int, page: int = 0) -> int:
+        return self.regs.get((page, register), 0)
+
+    def store(self, register: int, value: int) -> None:
+        if register == REG_FF:
+            self.page = value
+        self.regs[(self.page, register)] = value
+
+    def read_byte_data(self, handle: int, register: int) -> int:
+        if register in VOLATILE_REGISTERS:
+            return VOLATILE_REGISTERS[register]
+        return self.reg(register, self.page)
+
+    def read_word_data(self, handle: int, register: int) -> int:
+        # pigpio はリトルエンディアンで返す
+        hi = self.reg(register, self.page)
+        lo = self.reg(register + 1, self.page)
+        return (lo << 8) | hi
+
+    def write_byte_data(self, handle: int, register: int, value: int) -> None:
+        self.store(register, value)
+
+    def write_word_data(self, handle: int, register: int, value: int) -> None:
+        self.store(register, value & 0xFF)
+        self.store(register + 1, value >> 8)
+
+    def zip(self, handle: int, cmds: list[int]) -> None:
+        i = 0
+        while cmds[i] != 0:
+            length = cmds[i + 1]
+            register, *data = cmds[i + 2 : i + 2 + length]
+            for offset, value in enumerate(data):
+                self.store(register + offset, value)
+            i += 2 + length
+
+    def test_vcsel_pulse_period(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE), 14
+            )
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_FINAL_RANGE), 10
+            )
+            budget_us = tof.measurement_timing_budget_us
+
+            tof.set_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE, 18)
+            self.assertEqual(self.reg(PRE_RANGE_CONFIG_VCSEL_PERIOD), 8)
+            self.assertEqual(
+                self.reg(PRE_RANGE_CONFIG_VALID_PHASE_HIGH), 0x50
+            )
+            self.assertEqual(self.reg(PRE_RANGE_CONFIG_VALID_PHASE_LOW), 0x08)
+
+            tof.set_vcsel_pulse_period(VCSEL_PERIOD_FINAL_RANGE, 14)
+            self.assertEqual(self.reg(FINAL_RANGE_CONFIG_VCSEL_PERIOD), 6)
+            self.assertEqual(
+                self.reg(FINAL_RANGE_CONFIG_VALID_PHASE_HIGH), 0x48
+            )
+            self.assertEqual(self.reg(GLOBAL_CONFIG_VCSEL_WIDTH), 0x03)
+            # PHASECAL_LIM はページ1
+            self.assertEqual(self.reg(ALGO_PHASECAL_LIM, page=1), 0x20)
+            self.assertEqual(self.page, 0)
+
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE), 18
+            )
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_FINAL_RANGE), 14
+            )
+            # タイミングバジェットは変わらない
+            self.assertEqual(tof.measurement_timing_budget_us, budget_us)
+
+            with self.assertRaises(ValueError):
+                tof.set_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE, 10)
+            with self.assertRaises(ValueError):
+                tof.set_vcsel_pulse_period("mid_range", 10)
+
+    def test_signal_rate_limit(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.assertEqual(tof.get_signal_rate_limit(), 0.25)
+            tof.set_signal_rate_limit(0.1)
+            self.assertEqual(
+                self.reg(FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT + 1), 12
+            )
+            with self.assertRaises(ValueError):
+                tof.set_signal_rate_limit(-1)
+
+    def test_apply_profile(self) -> None:
+        with VL53L0X(self.mock_pi, profile="high_speed") as tof:
+            self.assertEqual(tof.profile, "high_speed")
+            self.assertEqual(tof.measurement_timing_budget_us, 20000)
+
+            tof.apply_profile("long_range")
+            self.assertEqual(tof.get_signal_rate_limit(), 12 / 128)
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE), 18
+            )
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_FINAL_RANGE), 14
+            )
+            self.assertEqual(tof.measurement_timing_budget_us, 33000)
+
+            with self.assertRaises(ValueError):
+                tof.apply_profile("turbo")
+
+            # final-range が無効だとタイミングバジェットを設定できない
+            tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0x28)
+            with self.assertRaises(ValueError):
+                tof.apply_profile("default")
+            self.assertEqual(tof.profile, "long_range")
+            self.assertEqual(
+                tof.get_vcsel_pulse_period(VCSEL_PERIOD_PRE_RANGE), 18
+            )
+
+    def test_profile_from_config(self) -> None:
+        save_config(self.config_file, {"profile": "high_accuracy"})
+        with VL53L0X(self.mock_pi, config_file_path=self.config_file) as tof:
+            self.assertEqual(tof.profile, "high_accuracy")
+            self.assertEqual(tof.measurement_timing_budget_us, 200000)
+
+        # 引数のほうが優先される
+        with VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, profile="default"
+        ) as tof:
+            self.assertEqual(tof.profile, "default")
+            self.assertEqual(tof.measurement_timing_budget_us, 33000)
+
+    def final_range_timeout(self) -> int:
+        return (
+            self.reg(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI) << 8
+        ) | self.reg(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI + 1)
+
+    def test_sequence_steps(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), 0xE8)
+            self.assertEqual(
+                tof.get_sequence_step_enables(),
+                {
+                    "tcc": False,
+                    "dss": True,
+                    "msrc": False,
+                    "pre_range": True,
+                    "final_range": True,
+                },
+            )
+            budget_us = tof.measurement_timing_budget_us
+            final_timeout = self.final_range_timeout()
+
+            # TCC/MSRC を有効にすると、その分 final-range が短くなる
+            tof.set_sequence_step_enables(tcc=True, msrc=True)
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), 0xFC)
+            self.assertLess(self.final_range_timeout(), final_timeout)
+
+            # DSS/pre-range を無効にすると、その分 final-range が長くなる
+            tof.set_sequence_step_enables(
+                tcc=False, dss=False, msrc=False, pre_range=False
+            )
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), 0xA0)
+            self.assertGreater(self.final_range_timeout(), final_timeout)
+            self.assertFalse(tof.get_sequence_step_enables()["dss"])
+
+            # タイミングバジェットは変わらない
+            self.assertEqual(tof.measurement_timing_budget_us, budget_us)
+
+            # 再初期化しても設定は保持される
+            tof.initialize()
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), 0xA0)
+
+    def test_sequence_step_enables_invalid(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            config = self.reg(SYSTEM_SEQUENCE_CONFIG)
+            with self.assertRaises(ValueError):
+                tof.set_sequence_step_enables(final_range=False)
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), config)
+
+            # 有効にしたステップがタイミングバジェットに収まらない
+            tof.set_sequence_step_enables(
+                tcc=False, dss=False, msrc=False, pre_range=False
+            )
+            # final-range だけなら収まる (オーバーヘッドは 2830us)
+            tof.set_measurement_timing_budget(5000)
+            with self.assertRaises(ValueError):
+                tof.set_sequence_step_enables(
+                    tcc=True, dss=True, msrc=True, pre_range=True
+                )
+            self.assertEqual(self.reg(SYSTEM_SEQUENCE_CONFIG), 0xA0)
+            self.assertEqual(tof.sequence_config, 0xA0)
+            self.assertEqual(tof.measurement_timing_budget_us, 5000)
+
+    def test_timing_budget_overheads(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            tof.set_sequence_step_enables(
+                tcc=False, dss=False, msrc=False, pre_range=False
+            )
+            tof.set_measurement_timing_budget(20000)
+            final_only_us = tof.get_measurement_timing_budget()
+
+            # MSRC のタイムアウト (MSRC_CONFIG_TIMEOUT_MACROP + 1 MCLK) と
+            # 各ステップのオーバーヘッドが加算される
+            self.store(MSRC_CONFIG_TIMEOUT_MACROP, 0x1F)
+            msrc_us = tof._timeout_mclks_to_microseconds(32, 14)
+            tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0xB0)  # TCC + final
+            self.assertEqual(
+                tof.get_measurement_timing_budget(),
+                final_only_us + msrc_us + 590,
+            )
+            tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0x88)  # DSS + final
+            self.assertEqual(
+                tof.get_measurement_timing_budget(),
+                final_only_us + 2 * (msrc_us + 690),
+            )
+            tof.write_byte(SYSTEM_SEQUENCE_CONFIG, 0x84)  # MSRC + final
+            self.assertEqual(
+                tof.get_measurement_timing_budget(),
+                final_only_us + msrc_us + 660,
+            )
+
+    def test_unknown_profile(self) -> None:
+        with self.assertRaises(ValueError):
+            VL53L0X(self.mock_pi, profile="turbo")
+        self.mock_pi.i2c_zip.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
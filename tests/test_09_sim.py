@@ -0,0 +1,174 @@
+import itertools
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import pigpio
+
+from vl53l0x_pigpio.config_manager import load_config
+from vl53l0x_pigpio.driver import (
+    RANGE_STATUS_VALID,
+    VCSEL_PERIOD_FINAL_RANGE,
+    VL53L0X,
+    WARM_START_CONFIG_KEY,
+)
+from vl53l0x_pigpio.multi import VL53L0XArray
+from vl53l0x_pigpio.sim import (
+    OUT_OF_RANGE_MM,
+    RANGE_STATUS_NO_TARGET,
+    SimulatedPi,
+    SimulatedVL53L0X,
+    ramp,
+    steps,
+)
+
+
+class TestSimulator(unittest.TestCase):
+    def make_pi(self, **kwargs) -> SimulatedPi:
+        kwargs.setdefault("time_scale", 0)
+        return SimulatedPi([SimulatedVL53L0X(**kwargs)])
+
+    def test_get_range(self) -> None:
+        pi = self.make_pi(distance=432)
+        with VL53L0X(pi) as tof:
+            self.assertEqual(tof.get_range(), 432)
+            measurement = tof.get_measurement()
+            self.assertEqual(measurement.range_status, RANGE_STATUS_VALID)
+            self.assertGreater(measurement.signal_rate_mcps, 0)
+
+    def test_timing_budget(self) -> None:
+        pi = self.make_pi()
+        sim = pi.sensors[0]
+        with VL53L0X(pi) as tof:
+            # 書き込まれた設定から計算したバジェットがドライバーと一致する
+            tof.set_measurement_timing_budget(50000)
+            self.assertAlmostEqual(sim.timing_budget_us(), 50000, -2)
+
+            tof.set_vcsel_pulse_period(VCSEL_PERIOD_FINAL_RANGE, 14)
+            self.assertAlmostEqual(sim.timing_budget_us(), 50000, -2)
+
+            # 測定1回でセンサー上の時間がバジェット分進む
+            start_s = sim.sim_time_s
+            tof.get_range()
+            self.assertAlmostEqual(sim.sim_time_s - start_s, 0.05, 2)
+
+    def test_data_ready_timing(self) -> None:
+        pi = self.make_pi(time_scale=1.0)
+        with VL53L0X(pi) as tof:
+            tof.set_measurement_timing_budget(20000)
+            tof.start_ranging()
+            # バジェットが経過するまではデータ準備完了にならない
+            self.assertFalse(tof.is_data_ready())
+            self.assertGreater(tof.get_range(), 0)
+
+    def test_continuous(self) -> None:
+        pi = self.make_pi(distance=ramp(100, 1100, 1.0))
+        with VL53L0X(pi) as tof:
+            tof.start_continuous(100)
+            ranges = list(tof.iter_ranges(3))
+            tof.stop_continuous()
+            # 測定間隔 100ms ごとに距離が進む
+            diffs = [b - a for a, b in itertools.pairwise(ranges)]
+            self.assertEqual(diffs, [100, 100])
+
+            tof.start_continuous(0)
+            self.assertEqual(len(list(tof.iter_ranges(3))), 3)
+            tof.stop_continuous()
+
+    def test_gpio_callback(self) -> None:
+        pi = SimulatedPi(
+            [SimulatedVL53L0X(distance=300, gpio_pin=17, time_scale=0.1)]
+        )
+        edges: list[int] = []
+        event = threading.Event()
+
+        def on_edge(gpio: int, level: int, tick: int) -> None:
+            edges.append(gpio)
+            event.set()
+
+        with VL53L0X(pi, gpio_pin=17) as tof:
+            cb = pi.callback(17, pigpio.FALLING_EDGE, on_edge)
+            tof.start_ranging()
+            self.assertTrue(event.wait(1.0))
+            self.assertEqual(pi.read(17), 0)
+            self.assertEqual(tof.read_range(), 300)
+            # 割り込みクリアで GPIO1 は High に戻る
+            self.assertEqual(pi.read(17), 1)
+            cb.cancel()
+        self.assertEqual(edges, [17])
+
+    def test_noise(self) -> None:
+        pi = self.make_pi(distance=500, noise_mm=10, seed=1)
+        with VL53L0X(pi) as tof:
+            ranges = tof.get_ranges(50)["range_mm"]
+            self.assertGreater(ranges.std(), 0)
+            self.assertLess(abs(ranges.mean() - 500), 10)
+
+    def test_out_of_range(self) -> None:
+        pi = self.make_pi(distance=5000)
+        with VL53L0X(pi) as tof:
+            measurement = tof.get_measurement()
+            self.assertEqual(measurement.range_mm, OUT_OF_RANGE_MM)
+            self.assertEqual(measurement.range_status, RANGE_STATUS_NO_TARGET)
+
+    def test_steps_profile(self) -> None:
+        pi = self.make_pi(distance=steps([100, 200, 300], 0.1))
+        with VL53L0X(pi) as tof:
+            tof.start_continuous(100)
+            self.assertEqual(list(tof.iter_ranges(3)), [100, 200, 300])
+            tof.stop_continuous()
+
+    def test_array_xshut(self) -> None:
+        sims = [
+            SimulatedVL53L0X(distance=100 * (i + 1), xshut_pin=5 + i)
+            for i in range(3)
+        ]
+        for sim in sims:
+            sim.time_scale = 0
+        pi = SimulatedPi(sims)
+        with VL53L0XArray(pi, xshut_pins=[5, 6, 7]) as array:
+            self.assertEqual(
+                [sensor.get_range() for sensor in array], [100, 200, 300]
+            )
+        self.assertEqual([sim.address for sim in sims], [0x30, 0x31, 0x32])
+
+    def test_array_warm_start(self) -> None:
+        # 並行して初期化しても、全センサーの保存データが残る
+        sims = [
+            SimulatedVL53L0X(distance=100, xshut_pin=5 + i, time_scale=0)
+            for i in range(8)
+        ]
+        pi = SimulatedPi(sims)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_file = Path(tmpdir) / "vl53l0x.json"
+            xshut_pins = [5 + i for i in range(8)]
+            with VL53L0XArray(
+                pi, xshut_pins, config_file_path=config_file, warm_start=True
+            ):
+                pass
+            saved = load_config(config_file)[WARM_START_CONFIG_KEY]
+            self.assertEqual(
+                sorted(saved), [f"1:{0x30 + i:#04x}" for i in range(8)]
+            )
+
+    def test_no_device(self) -> None:
+        pi = SimulatedPi([])
+        with self.assertRaises(pigpio.error):
+            VL53L0X(pi)
+
+    def test_transaction_stats(self) -> None:
+        pi = self.make_pi()
+        with VL53L0X(pi) as tof:
+            pi.reset_stats()
+            tof.get_range()
+            self.assertEqual(pi.transactions, pi.stats["transactions"])
+            self.assertGreater(pi.transactions, 0)
+            self.assertEqual(
+                pi.transactions,
+                sum(v for k, v in pi.stats.items() if k != "transactions"),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
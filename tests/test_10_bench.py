@@ -0,0 +1,81 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from vl53l0x_pigpio.__main__ import cli
+from vl53l0x_pigpio.bench import (
+    bench_get_range,
+    bench_get_ranges,
+    bench_initialize,
+    bench_timeout_helpers,
+    bench_transports,
+    compare,
+)
+
+
+class TestBench(unittest.TestCase):
+    def test_get_range(self) -> None:
+        result = bench_get_range(10)
+        self.assertGreater(result["transactions_per_call"], 0)
+        self.assertEqual(
+            sum(result["ops_per_call"].values()),
+            result["transactions_per_call"],
+        )
+
+    def test_initialize(self) -> None:
+        result = bench_initialize(1)
+        self.assertGreater(result["transactions"], 0)
+        self.assertIn("i2c_zip", result["ops"])
+
+    def test_get_ranges(self) -> None:
+        result = bench_get_ranges([1, 5], repeat=1)
+        self.assertEqual(list(result["samples_per_s"]), ["1", "5"])
+
+    def test_timeout_helpers(self) -> None:
+        result = bench_timeout_helpers(10)
+        self.assertIn("encode_timeout", result)
+        self.assertIn("decode_timeout", result)
+
+    def test_transports(self) -> None:
+        result = bench_transports(5)
+        self.assertEqual(list(result), ["pigpio", "memory"])
+        self.assertTrue(all(us > 0 for us in result.values()))
+
+    def test_compare(self) -> None:
+        baseline = {
+            "get_range": {"transactions_per_call": 4},
+            "initialize": {"transactions": 46},
+        }
+        results = {
+            "get_range": {"transactions_per_call": 5},
+            "initialize": {"transactions": 40},
+        }
+        self.assertEqual(
+            compare(results, baseline),
+            ["get_range.transactions_per_call: 4 -> 5"],
+        )
+        self.assertEqual(compare(baseline, baseline), [])
+
+    def test_cli(self) -> None:
+        runner = CliRunner()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "base.json"
+            args = ["bench", "-c", "5", "-b", "2"]
+            result = runner.invoke(cli, [*args, "-o", str(path)])
+            self.assertEqual(result.exit_code, 0, result.output)
+            baseline = json.loads(path.read_text())
+            self.assertIn("polling", baseline)
+
+            # トランザクション数を減らした基準値と比べると失敗する
+            baseline["get_range"]["transactions_per_call"] -= 1
+            path.write_text(json.dumps(baseline))
+            result = runner.invoke(cli, [*args, "--baseline", str(path)])
+            self.assertNotEqual(result.exit_code, 0)
+            self.assertIn("get_range.transactions_per_call", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import pigpio
+
+from vl53l0x_pigpio.driver import RESULT_INTERRUPT_STATUS, VL53L0X
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X
+from vl53l0x_pigpio.stats import LATENCY_BUCKETS_US, BusStats
+
+
+class TestBusStats(unittest.TestCase):
+    def test_record(self) -> None:
+        stats = BusStats()
+        stats.record("read_byte", 0x13, 1, 30_000)
+        stats.record("read_byte", 0x13, 1, 150_000)
+        stats.record("zip", None, 10, 20_000_000)
+        stats.record_error("write_byte", 0x00)
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["transactions"], 3)
+        self.assertEqual(snapshot["errors"], 1)
+        self.assertAlmostEqual(snapshot["bus_time_s"], 0.02018)
+
+        read_byte = snapshot["ops"]["read_byte"]
+        self.assertEqual(read_byte["count"], 2)
+        self.assertEqual(read_byte["bytes"], 2)
+        self.assertEqual(read_byte["histogram"]["50us"], 1)
+        self.assertEqual(read_byte["histogram"]["200us"], 1)
+        self.assertEqual(
+            len(read_byte["histogram"]), len(LATENCY_BUCKETS_US) + 1
+        )
+        self.assertEqual(snapshot["ops"]["zip"]["histogram"]["+Inf"], 1)
+
+        self.assertEqual(
+            snapshot["registers"],
+            {"0x00": {"write_byte": 1}, "0x13": {"read_byte": 2}},
+        )
+
+        stats.reset()
+        self.assertEqual(stats.snapshot()["transactions"], 0)
+
+
+class TestSensorStats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pi = SimulatedPi([SimulatedVL53L0X(time_scale=0)])
+
+    def test_disabled(self) -> None:
+        with VL53L0X(self.pi) as tof:
+            tof.get_range()
+            self.assertEqual(tof.stats(), {})
+
+    def test_get_range(self) -> None:
+        with VL53L0X(self.pi, collect_stats=True) as tof:
+            # 初期化のアクセスも含む (i2c_zip で送った書き込みを含む)
+            self.assertEqual(
+                tof.stats()["transactions"], self.pi.transactions
+            )
+            self.assertIn("zip", tof.stats()["ops"])
+
+            tof.reset_stats()
+            self.pi.reset_stats()
+            tof.get_range()
+            stats = tof.stats()
+            self.assertEqual(stats["transactions"], self.pi.transactions)
+            self.assertGreater(stats["bus_time_s"], 0)
+            self.assertIn(
+                "read_byte",
+                stats["registers"][f"0x{RESULT_INTERRUPT_STATUS:02X}"],
+            )
+
+            tof.enable_stats(False)
+            tof.get_range()
+            self.assertEqual(tof.stats(), {})
+
+    def test_error(self) -> None:
+        with VL53L0X(self.pi, collect_stats=True) as tof:
+            self.pi.sensors[0].powered = False
+            with self.assertRaises(pigpio.error):
+                tof.read_byte(0xC0)
+            self.pi.sensors[0].powered = True
+            self.assertEqual(tof.stats()["ops"]["read_byte"]["errors"], 1)
+            self.assertEqual(tof.stats()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+from vl53l0x_pigpio.driver import VL53L0X
+from vl53l0x_pigpio.exporter import METRICS_PATH, MetricsExporter
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X
+
+
+class TestMetricsExporter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pi = SimulatedPi([SimulatedVL53L0X(distance=321, time_scale=0)])
+        self.sensor = VL53L0X(self.pi)
+        self.exporter = MetricsExporter([self.sensor])
+
+    def tearDown(self) -> None:
+        self.exporter.shutdown()
+        self.sensor.close()
+
+    def test_render(self) -> None:
+        text = self.exporter.render()
+        # まだ測定していない
+        self.assertIn('vl53l0x_measurements_total{sensor="0x29"} 0', text)
+        self.assertNotIn("vl53l0x_last_range_mm{", text)
+
+        for _ in range(3):
+            self.sensor.get_range()
+        text = self.exporter.render()
+        self.assertIn('vl53l0x_measurements_total{sensor="0x29"} 3', text)
+        self.assertIn('vl53l0x_last_range_mm{sensor="0x29"} 321', text)
+        self.assertIn(
+            'vl53l0x_measurement_latency_seconds_bucket{sensor="0x29",'
+            'le="+Inf"} 3',
+            text,
+        )
+        self.assertIn(
+            'vl53l0x_measurement_latency_seconds_count{sensor="0x29"} 3',
+            text,
+        )
+        self.assertIn("# TYPE vl53l0x_i2c_errors_total counter", text)
+        # 出力してもエクスポーターの状態は変わらない
+        self.assertEqual(self.exporter.render(), text)
+
+    def test_timeout(self) -> None:
+        # 測定が完了しないセンサー
+        self.pi.sensors[0].time_scale = 1000
+        with (
+            patch.object(
+                self.sensor, "_measurement_timeout_s", return_value=0.01
+            ),
+            self.assertRaises(Exception) as cm,
+        ):
+            self.sensor.get_range()
+        self.assertIn("Timeout", str(cm.exception))
+        text = self.exporter.render()
+        self.assertIn(
+            'vl53l0x_timeouts_total{sensor="0x29",kind="measurement"} 1',
+            text,
+        )
+
+    def test_write_textfile(self) -> None:
+        self.sensor.get_range()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "vl53l0x.prom"
+            self.exporter.write_textfile(path)
+            self.assertIn("vl53l0x_last_range_mm", path.read_text())
+            self.assertEqual(
+                [p.name for p in Path(tmpdir).iterdir()], [path.name]
+            )
+
+    def test_serve(self) -> None:
+        self.exporter.serve(0, "127.0.0.1")
+        url = f"http://127.0.0.1:{self.exporter.port}"
+        with urllib.request.urlopen(url + METRICS_PATH) as res:
+            self.assertEqual(res.status, 200)
+            self.assertIn(b"vl53l0x_measurements_total", res.read())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/")
+
+
+if __name__ == "__main__":
+    unittest.main()
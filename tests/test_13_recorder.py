@@ -0,0 +1,145 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from click.testing import CliRunner
+
+from vl53l0x_pigpio.__main__ import cli
+from vl53l0x_pigpio.driver import RANGE_DTYPE
+from vl53l0x_pigpio.recorder import (
+    INDEX_FILE_NAME,
+    SessionWriter,
+    load_index,
+    open_segments,
+    segment_metadata,
+)
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X
+
+
+def make_records(start: int, n: int) -> np.ndarray:
+    records = np.zeros(n, dtype=RANGE_DTYPE)
+    records["range_mm"] = np.arange(start, start + n)
+    records["timestamp_ns"] = np.arange(start, start + n) * 1000
+    records["range_status"] = 11
+    return records
+
+
+class TestSessionWriter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "session"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_write_and_memmap(self) -> None:
+        with SessionWriter(self.path, metadata={"note": "test"}) as writer:
+            writer.write(make_records(0, 10))
+            writer.write(make_records(10, 5))
+        self.assertEqual(writer.records, 15)
+
+        segments = open_segments(self.path)
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0]["range_mm"].tolist(), list(range(15)))
+
+        # セグメントは np.memmap でそのまま読める
+        raw = np.memmap(
+            self.path / "seg-000000.rec", dtype=RANGE_DTYPE, mode="r"
+        )
+        self.assertEqual(len(raw), 15)
+
+        index = load_index(self.path)
+        self.assertEqual(index["metadata"], {"note": "test"})
+        self.assertEqual(index["segments"][0]["first_ns"], 0)
+        self.assertEqual(index["segments"][0]["last_ns"], 14000)
+
+    def test_rotate_by_size(self) -> None:
+        size = RANGE_DTYPE.itemsize * 4
+        with SessionWriter(self.path, max_segment_bytes=size) as writer:
+            writer.write(make_records(0, 10))
+            writer.write(make_records(10, 3))
+        counts = [len(s) for s in open_segments(self.path)]
+        self.assertEqual(counts, [4, 4, 2, 3])
+        data = np.concatenate(open_segments(self.path))
+        self.assertEqual(data["range_mm"].tolist(), list(range(13)))
+
+    def test_rotate_by_time(self) -> None:
+        with SessionWriter(self.path, max_segment_s=0) as writer:
+            writer.write(make_records(0, 2))
+            writer.write(make_records(2, 2))
+        self.assertEqual(len(open_segments(self.path)), 2)
+
+    def test_append_and_recover(self) -> None:
+        writer = SessionWriter(self.path)
+        writer.write(make_records(0, 3))
+        # close() 前 (異常終了) でも、ファイルサイズから件数を数え直す
+        writer._file.flush()  # type: ignore[union-attr]
+        self.assertEqual(load_index(self.path)["segments"][0]["count"], 3)
+        writer.close()
+
+        with SessionWriter(self.path) as writer:
+            writer.write(make_records(3, 2))
+        index = json.loads((self.path / INDEX_FILE_NAME).read_text())
+        self.assertEqual([s["count"] for s in index["segments"]], [3, 2])
+
+    def test_append_metadata(self) -> None:
+        with SessionWriter(self.path, metadata={"offset_mm": 0}) as writer:
+            writer.write(make_records(0, 3))
+        # 校正し直してから追記
+        with SessionWriter(self.path, metadata={"offset_mm": 20}) as writer:
+            writer.write(make_records(3, 2))
+
+        index = load_index(self.path)
+        self.assertEqual(index["metadata"], {"offset_mm": 0})
+        self.assertEqual(
+            [segment_metadata(index, s) for s in index["segments"]],
+            [{"offset_mm": 0}, {"offset_mm": 20}],
+        )
+
+        # セグメントごとの情報がない場合は、インデックスの情報
+        del index["segments"][1]["metadata"]
+        self.assertEqual(
+            segment_metadata(index, index["segments"][1]), {"offset_mm": 0}
+        )
+
+    def test_invalid_dtype(self) -> None:
+        with (
+            SessionWriter(self.path) as writer,
+            self.assertRaises(ValueError),
+        ):
+            writer.write(np.zeros(3, dtype=np.int32))
+
+
+class TestRecordCommand(unittest.TestCase):
+    def test_record(self) -> None:
+        pi = SimulatedPi([SimulatedVL53L0X(distance=250, time_scale=0)])
+        with (
+            tempfile.TemporaryDirectory() as tmpdir,
+            patch("vl53l0x_pigpio.__main__.pigpio.pi", return_value=pi),
+        ):
+            path = Path(tmpdir) / "session"
+            result = CliRunner().invoke(
+                cli,
+                [
+                    "-C",
+                    str(Path(tmpdir) / "config.json"),
+                    "record",
+                    str(path),
+                    "-c",
+                    "100",
+                    "-b",
+                    "30",
+                ],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            data = np.concatenate(open_segments(path))
+            self.assertEqual(len(data), 100)
+            self.assertTrue(np.all(data["range_mm"] == 250))
+            self.assertTrue(np.all(np.diff(data["timestamp_ns"]) >= 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from vl53l0x_pigpio.driver import RANGE_DTYPE
+from vl53l0x_pigpio.recorder import INDEX_FILE_NAME, SessionWriter
+from vl53l0x_pigpio.replay import ReplayVL53L0X, SessionReader
+from vl53l0x_pigpio.sampler import BackgroundSampler
+
+INTERVAL_NS = 10_000_000  # 10ms
+HOUR_NS = 3600 * 1_000_000_000
+
+
+def make_records(start: int, n: int) -> np.ndarray:
+    records = np.zeros(n, dtype=RANGE_DTYPE)
+    records["range_mm"] = np.arange(start, start + n) + 100
+    records["timestamp_ns"] = np.arange(start, start + n) * INTERVAL_NS
+    records["range_status"] = 11
+    records["signal_rate_mcps"] = 1.5
+    return records
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "session"
+        # 3件ごとにセグメントを分ける (記録時のオフセットは 10mm)
+        with SessionWriter(
+            self.path,
+            max_segment_bytes=RANGE_DTYPE.itemsize * 3,
+            metadata={"offset_mm": 10, "i2c_address": 0x30},
+        ) as writer:
+            writer.write(make_records(0, 10))
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_reader(self) -> None:
+        reader = SessionReader(self.path)
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(len(reader.segments), 4)
+        # セグメントをまたいで読める
+        data = reader.read(2, 5)
+        self.assertEqual(data["range_mm"].tolist(), [102, 103, 104, 105, 106])
+        self.assertEqual(len(reader.read(8, 5)), 2)
+
+        self.assertEqual(reader.search(0), 0)
+        self.assertEqual(reader.search(4 * INTERVAL_NS), 4)
+        self.assertEqual(reader.search(4 * INTERVAL_NS + 1), 5)
+        self.assertEqual(reader.search(100 * INTERVAL_NS), 10)
+
+    def test_search_after_restart(self) -> None:
+        # 再起動後に追記: timestamp_ns (monotonic) が 0 からやり直しになる
+        with SessionWriter(
+            self.path, max_segment_bytes=RANGE_DTYPE.itemsize * 3
+        ) as writer:
+            restarted = make_records(0, 5)
+            restarted["range_mm"] += 1000
+            writer.write(restarted)
+        # 再起動後のセグメントは 1時間後に記録したことにする
+        index_path = self.path / INDEX_FILE_NAME
+        index = json.loads(index_path.read_text())
+        for segment in index["segments"][4:]:
+            segment["time_ns"] += HOUR_NS
+        index_path.write_text(json.dumps(index))
+
+        reader = SessionReader(self.path)
+        self.assertEqual(len(reader), 15)
+        # 記録順で最初に見つかった位置
+        self.assertEqual(reader.search(3 * INTERVAL_NS), 3)
+        self.assertEqual(reader.search(9 * INTERVAL_NS), 9)
+        self.assertEqual(reader.search(9 * INTERVAL_NS + 1), 15)
+
+        # 時刻で探すと、再起動後のレコードも区別できる
+        shifts = [s["time_ns"] - s["monotonic_ns"] for s in index["segments"]]
+        self.assertEqual(reader.search_time(shifts[0]), 0)
+        self.assertEqual(reader.search_time(shifts[4] - HOUR_NS // 2), 10)
+        self.assertEqual(reader.search_time(2 * INTERVAL_NS + shifts[4]), 12)
+        self.assertEqual(
+            reader.search_time(4 * INTERVAL_NS + shifts[5] + 1), 15
+        )
+
+        with ReplayVL53L0X(self.path) as sensor:
+            sensor.seek_time(3 * INTERVAL_NS + shifts[5])
+            self.assertEqual(sensor.get_range(), 1103)
+
+    def test_interface(self) -> None:
+        with ReplayVL53L0X(self.path) as sensor:
+            self.assertEqual(sensor.i2c_address, 0x30)
+            self.assertEqual(sensor.get_range(), 100)
+            measurement = sensor.get_measurement()
+            self.assertEqual(measurement.range_mm, 101)
+            self.assertTrue(measurement.valid)
+            self.assertAlmostEqual(measurement.signal_rate_mcps, 1.5)
+
+            out = np.empty(4, dtype=RANGE_DTYPE)
+            ranges = sensor.get_ranges(4, out=out)
+            self.assertEqual(
+                ranges["range_mm"].tolist(), [102, 103, 104, 105]
+            )
+            self.assertEqual(list(sensor.iter_ranges()), [106, 107, 108, 109])
+            with self.assertRaises(EOFError):
+                sensor.get_range()
+
+            # 記録時のオフセットを外して適用し直す
+            sensor.rewind()
+            sensor.set_offset(0)
+            self.assertEqual(sensor.get_range(), 110)
+
+            sensor.seek(7 * INTERVAL_NS)
+            self.assertEqual(sensor.get_range(), 117)
+
+    def test_calibrate(self) -> None:
+        with ReplayVL53L0X(self.path) as sensor:
+            # 生の距離 110..119 の平均 114 → オフセット 14
+            self.assertEqual(sensor.calibrate(100, 10), 14)
+            self.assertEqual(sensor.offset_mm, 10)
+
+    def test_offset_per_segment(self) -> None:
+        # 生の距離は全て 100mm。オフセット 0 と 20 で記録したセグメント
+        path = Path(self.tmpdir.name) / "recalibrated"
+        for offset_mm in (0, 20):
+            with SessionWriter(
+                path, metadata={"offset_mm": offset_mm}
+            ) as writer:
+                records = make_records(0, 3)
+                records["range_mm"] = 100 - offset_mm
+                writer.write(records)
+
+        with ReplayVL53L0X(path) as sensor:
+            # set_offset() を呼ぶまでは記録した値のまま
+            self.assertEqual(
+                sensor.get_ranges(6)["range_mm"].tolist(),
+                [100, 100, 100, 80, 80, 80],
+            )
+            sensor.rewind()
+            sensor.set_offset(0)
+            self.assertEqual(
+                sensor.get_ranges(6)["range_mm"].tolist(), [100] * 6
+            )
+            sensor.rewind()
+            sensor.set_offset(10)
+            self.assertEqual(
+                sensor.get_ranges(6)["range_mm"].tolist(), [90] * 6
+            )
+
+    def test_loop(self) -> None:
+        with ReplayVL53L0X(self.path, loop=True) as sensor:
+            ranges = list(sensor.iter_ranges(12))
+        self.assertEqual(ranges[10:], [100, 101])
+
+    def test_speed(self) -> None:
+        # 10ms 間隔の10件を 2倍速で再生すると、約45ms
+        with ReplayVL53L0X(self.path, speed=2.0) as sensor:
+            start = time.monotonic()
+            list(sensor.iter_ranges())
+            elapsed = time.monotonic() - start
+        self.assertGreater(elapsed, 0.04)
+        self.assertLess(elapsed, 0.5)
+
+    def test_sampler(self) -> None:
+        with ReplayVL53L0X(self.path) as sensor:
+            sampler = BackgroundSampler(sensor, capacity=16)
+            sampler.start()
+            sampler._thread.join(1.0)  # type: ignore[union-attr]
+            sampler.stop()
+        self.assertEqual(sampler.count, 10)
+        self.assertEqual(
+            sampler.snapshot()["range_mm"].tolist(), list(range(100, 110))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
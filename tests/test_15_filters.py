@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from vl53l0x_pigpio.driver import RANGE_DTYPE, Measurement
+from vl53l0x_pigpio.filters import (
+    EMAFilter,
+    FilterPipeline,
+    KalmanFilter,
+    MedianFilter,
+    StatusGate,
+)
+
+
+def ema_reference(values: np.ndarray, alpha: float) -> list[float]:
+    out = []
+    y = values[0]
+    for x in values:
+        y = alpha * x + (1 - alpha) * y
+        out.append(y)
+    return out
+
+
+class TestFilters(unittest.TestCase):
+    def test_median(self) -> None:
+        f = MedianFilter(3)
+        out = f.process(np.array([10, 10, 100, 10, 20, 30]))
+        np.testing.assert_array_equal(out, [10, 10, 10, 10, 20, 20])
+
+    def test_median_across_batches(self) -> None:
+        values = np.random.default_rng(0).integers(0, 1000, 200)
+        whole = MedianFilter(5).process(values)
+        f = MedianFilter(5)
+        split = np.concatenate(
+            [f.process(values[i : i + 7]) for i in range(0, 200, 7)]
+        )
+        np.testing.assert_array_equal(whole, split)
+
+    def test_ema(self) -> None:
+        values = np.random.default_rng(1).uniform(0, 1000, 500)
+        # 分割して計算する長さより長いバッチ
+        f = EMAFilter(0.3)
+        self.assertLess(len(f._powers), 500)
+        out = np.concatenate(
+            [f.process(values[:100]), f.process(values[100:])]
+        )
+        np.testing.assert_allclose(out, ema_reference(values, 0.3))
+
+    def test_ema_alpha_one(self) -> None:
+        # alpha = 1 は入力そのまま (NaN や警告を出さない)
+        f = EMAFilter(1.0)
+        with np.errstate(all="raise"):
+            out = f.process(np.array([10.0, 20.0, 30.0]))
+            out2 = f.process(np.array([40.0]))
+        np.testing.assert_array_equal(out, [10.0, 20.0, 30.0])
+        np.testing.assert_array_equal(out2, [40.0])
+        self.assertEqual(f._y, 40.0)
+
+    def test_ema_invalid_alpha(self) -> None:
+        with self.assertRaises(ValueError):
+            EMAFilter(0)
+
+    def test_kalman(self) -> None:
+        # 等速で近づく対象 + ノイズ
+        rng = np.random.default_rng(2)
+        truth = 1000 - np.arange(300) * 2.0
+        timestamp_ns = np.arange(300, dtype=np.int64) * 20_000_000
+        f = KalmanFilter(measurement_noise=100.0)
+        out = f.process(truth + rng.normal(0, 10, 300), None, timestamp_ns)
+        error = np.abs(out[100:] - truth[100:])
+        self.assertLess(error.mean(), 10 / 2)
+        # 速度 (mm/s) も推定される
+        self.assertAlmostEqual(f.velocity, -100, delta=20)
+
+    def test_status_gate(self) -> None:
+        f = StatusGate()
+        status = np.array([4, 11, 4, 11, 4])
+        out = f.process(np.array([1, 2, 3, 4, 5]), status)
+        np.testing.assert_array_equal(out, [np.nan, 2, 2, 4, 4])
+        # 前のバッチの最後の有効な値を引き継ぐ
+        out = f.process(np.array([6, 7]), np.array([4, 11]))
+        np.testing.assert_array_equal(out, [4, 7])
+
+    def test_pipeline_structured(self) -> None:
+        data = np.zeros(6, dtype=RANGE_DTYPE)
+        data["range_mm"] = [8000, 100, 100, 8000, 100, 100]
+        data["range_status"] = [4, 11, 11, 4, 11, 11]
+        pipeline = FilterPipeline(StatusGate(), MedianFilter(3))
+        out = pipeline.process(data)
+        # ゲートより前は NaN、以降は外れ値を除いた値
+        self.assertTrue(np.isnan(out[0]))
+        np.testing.assert_array_equal(out[1:], [100] * 5)
+
+        pipeline.reset()
+        self.assertTrue(np.isnan(pipeline.process(data[:1])[0]))
+
+    def test_filter_iter(self) -> None:
+        samples = [
+            Measurement(100, 11, 1.0, 0.1, 3.0),
+            Measurement(8000, 4, 0.0, 0.1, 3.0),
+            Measurement(110, 11, 1.0, 0.1, 3.0),
+        ]
+        pipeline = FilterPipeline(StatusGate(), EMAFilter(0.5))
+        self.assertEqual(list(pipeline.filter_iter(samples)), [100, 100, 105])
+        pipeline = FilterPipeline(MedianFilter(3))
+        self.assertEqual(list(pipeline.filter_iter([1, 9, 2])), [1, 1, 2])
@@ -0,0 +1,93 @@
+import unittest
+
+from vl53l0x_pigpio.driver import (
+    INTERRUPT_LEVEL_HIGH,
+    INTERRUPT_LEVEL_LOW,
+    INTERRUPT_NEW_SAMPLE_READY,
+    INTERRUPT_OUT_OF_WINDOW,
+    SYSTEM_INTERRUPT_CONFIG_GPIO,
+    SYSTEM_THRESH_HIGH,
+    SYSTEM_THRESH_LOW,
+    VL53L0X,
+)
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X, steps
+
+# 100ms ごとに距離が変わる (測定は 33ms ごと、繰り返し)
+DISTANCES = [500, 500, 150, 500, 900, 500, 500]
+
+
+class TestThresholdInterrupt(unittest.TestCase):
+    def make_pi(self, **kwargs) -> SimulatedPi:
+        kwargs.setdefault("time_scale", 0)
+        kwargs.setdefault("distance", steps(DISTANCES, 0.1))
+        return SimulatedPi([SimulatedVL53L0X(**kwargs)])
+
+    def test_registers(self) -> None:
+        pi = self.make_pi()
+        with VL53L0X(pi) as tof:
+            tof.set_offset(10)
+            tof.set_interrupt_thresholds(200, 800)
+            # オフセットを戻した距離の 2mm 単位
+            self.assertEqual(tof.read_word(SYSTEM_THRESH_LOW), 105)
+            self.assertEqual(tof.read_word(SYSTEM_THRESH_HIGH), 405)
+            self.assertEqual(
+                tof.read_byte(SYSTEM_INTERRUPT_CONFIG_GPIO),
+                INTERRUPT_OUT_OF_WINDOW,
+            )
+
+            tof.clear_interrupt_thresholds()
+            self.assertEqual(tof.interrupt_mode, INTERRUPT_NEW_SAMPLE_READY)
+            self.assertEqual(
+                tof.read_byte(SYSTEM_INTERRUPT_CONFIG_GPIO),
+                INTERRUPT_NEW_SAMPLE_READY,
+            )
+
+    def test_invalid(self) -> None:
+        pi = self.make_pi()
+        with VL53L0X(pi) as tof:
+            with self.assertRaises(ValueError):
+                tof.set_interrupt_thresholds(800, 200)
+            with self.assertRaises(ValueError):
+                tof.set_interrupt_thresholds(200, 800, mode=0x07)
+            with self.assertRaises(RuntimeError):
+                tof.wait_event(0)
+
+    def test_out_of_window(self) -> None:
+        pi = self.make_pi()
+        with VL53L0X(pi) as tof:
+            tof.set_interrupt_thresholds(200, 800)
+            events = list(tof.iter_events(6))
+        self.assertEqual([e.range_mm for e in events], [150] * 3 + [900] * 3)
+        # 範囲内の測定ではホストに通知しない
+        self.assertGreater(pi.sensors[0].sample_count, 12)
+
+    def test_levels(self) -> None:
+        for mode, expected in (
+            (INTERRUPT_LEVEL_LOW, 150),
+            (INTERRUPT_LEVEL_HIGH, 900),
+        ):
+            with self.subTest(mode=mode):
+                pi = self.make_pi()
+                with VL53L0X(pi) as tof:
+                    tof.set_interrupt_thresholds(200, 800, mode=mode)
+                    ranges = [e.range_mm for e in tof.iter_events(2)]
+                self.assertEqual(ranges, [expected] * 2)
+
+    def test_gpio(self) -> None:
+        pi = self.make_pi(gpio_pin=17, time_scale=0.1)
+        with VL53L0X(pi, gpio_pin=17) as tof:
+            tof.set_interrupt_thresholds(200, 800)
+            tof.start_continuous()
+            event = tof.wait_event(2.0)
+            assert event is not None
+            self.assertEqual(event.range_mm, 150)
+            tof.stop_continuous()
+
+    def test_timeout(self) -> None:
+        pi = self.make_pi(distance=500)
+        with VL53L0X(pi) as tof:
+            tof.set_interrupt_thresholds(200, 800)
+            tof.start_continuous()
+            self.assertIsNone(tof.wait_event(0.05))
+            self.assertEqual(list(tof.iter_events(timeout_s=0.05)), [])
+            tof.stop_continuous()
@@ -0,0 +1,134 @@
+import ctypes
+import unittest
+from unittest.mock import Mock, patch
+
+import pigpio
+
+from vl53l0x_pigpio.driver import VL53L0X
+from vl53l0x_pigpio.sim import SimulatedPi, SimulatedVL53L0X
+from vl53l0x_pigpio.transport import (
+    I2C_M_RD,
+    I2C_RDWR,
+    I2CTransport,
+    LinuxI2CTransport,
+    MemoryTransport,
+    PigpioTransport,
+    _I2CRdwrData,
+)
+
+
+class FakeI2CDev:
+    """
+    `I2C_RDWR` ioctl を、シミュレーターへのアクセスに変換します。
+    """
+
+    def __init__(self, device: SimulatedVL53L0X):
+        self.device = device
+        self.ioctls: list[list[tuple[int, int]]] = []
+
+    def ioctl(self, fd: int, request: int, arg: _I2CRdwrData) -> int:
+        assert request == I2C_RDWR
+        msgs = [arg.msgs[i] for i in range(arg.nmsgs)]
+        self.ioctls.append([(m.flags, m.len) for m in msgs])
+        register = None
+        for msg in msgs:
+            assert msg.addr == 0x29
+            if msg.flags & I2C_M_RD:
+                assert register is not None
+                read_data = self.device.read(register, msg.len)
+                ctypes.memmove(msg.buf, bytes(read_data), msg.len)
+            else:
+                write_data = bytes(msg.buf[i] for i in range(msg.len))
+                register = write_data[0]
+                if len(write_data) > 1:
+                    self.device.write(register, write_data[1:])
+        return 0
+
+
+class TestTransport(unittest.TestCase):
+    def test_memory(self) -> None:
+        transport = MemoryTransport(SimulatedVL53L0X(distance=250))
+        with VL53L0X(None, transport=transport, collect_stats=True) as tof:
+            self.assertEqual(tof.get_range(), 250)
+            self.assertEqual(
+                tof.stats()["transactions"], transport.transactions
+            )
+
+    def test_memory_default(self) -> None:
+        with VL53L0X(None, transport=MemoryTransport()) as tof:
+            self.assertGreater(tof.get_range(), 0)
+
+    def test_pi_required(self) -> None:
+        with self.assertRaises(ValueError):
+            VL53L0X(None)
+        with self.assertRaises(ValueError):
+            VL53L0X(None, transport=MemoryTransport(), gpio_pin=17)
+
+    def test_pigpio_word(self) -> None:
+        pi = Mock(spec=pigpio.pi)
+        pi.i2c_open.return_value = 3
+        pi.i2c_read_word_data.return_value = 0x3412
+        transport = PigpioTransport(pi, 1, 0x29)
+        # pigpio はリトルエンディアン
+        self.assertEqual(transport.read_word(0x10), 0x1234)
+        transport.write_word(0x10, 0x1234)
+        pi.i2c_write_word_data.assert_called_once_with(3, 0x10, 0x3412)
+
+        transport.write_batch([[0x01, 0xAA], [0x02, 0xBB, 0xCC]])
+        pi.i2c_zip.assert_called_once_with(
+            3, [7, 2, 0x01, 0xAA, 7, 3, 0x02, 0xBB, 0xCC, 0]
+        )
+        transport.close()
+        pi.i2c_close.assert_called_once_with(3)
+
+    def test_pigpio_read_block_error(self) -> None:
+        pi = Mock(spec=pigpio.pi)
+        pi.i2c_open.return_value = 3
+        # pigpio の例外が無効な場合の失敗 (PI_I2C_READ_FAILED)
+        pi.i2c_read_i2c_block_data.return_value = (-83, "")
+        transport = PigpioTransport(pi, 1, 0x29)
+        with self.assertRaises(OSError):
+            transport.read_block(0x14, 12)
+
+        pi.i2c_read_i2c_block_data.return_value = (2, bytearray([1, 2]))
+        self.assertEqual(transport.read_block(0x14, 2), [1, 2])
+
+    def test_handle(self) -> None:
+        pi = SimulatedPi([SimulatedVL53L0X(time_scale=0)])
+        with VL53L0X(pi) as tof:
+            assert isinstance(tof.transport, PigpioTransport)
+            self.assertEqual(tof.handle, tof.transport.handle)
+            with self.assertRaises(AttributeError):
+                tof.handle = 0  # type: ignore[misc]
+        with VL53L0X(None, transport=MemoryTransport()) as tof:
+            self.assertIsNone(tof.handle)
+
+    def test_abstract(self) -> None:
+        with self.assertRaises(TypeError):
+            I2CTransport()  # type: ignore[abstract]
+
+    def test_linux_i2c(self) -> None:
+        fake = FakeI2CDev(SimulatedVL53L0X(distance=321, time_scale=0))
+        with (
+            patch("os.open", return_value=10) as os_open,
+            patch("os.close") as os_close,
+            patch("fcntl.ioctl", fake.ioctl),
+        ):
+            transport = LinuxI2CTransport(1, 0x29)
+            os_open.assert_called_once()
+            self.assertEqual(os_open.call_args.args[0], "/dev/i2c-1")
+
+            with VL53L0X(None, transport=transport) as tof:
+                fake.ioctls.clear()
+                self.assertEqual(tof.read_word(0x14 + 10), 321)
+                # レジスタの書き込みと読み出しを1回の ioctl で行う
+                self.assertEqual(fake.ioctls, [[(0, 1), (I2C_M_RD, 2)]])
+
+                fake.ioctls.clear()
+                with tof.batch():
+                    tof.write_byte(0x01, 0xE8)
+                    tof.write_byte(0x80, 0x01)
+                self.assertEqual(fake.ioctls, [[(0, 2), (0, 2)]])
+
+                self.assertEqual(tof.get_range(), 321)
+            os_close.assert_called_once_with(10)
@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+import unittest
+
+from click.testing import CliRunner
+
+import vl53l0x_pigpio
+from vl53l0x_pigpio.__main__ import cli
+
+# 起動時に読み込まないモジュール
+HEAVY_MODULES = ("numpy", "click", "asyncio", "importlib.metadata")
+
+
+def loaded_modules(statement: str) -> list[str]:
+    """
+    新しいインタープリターで `statement` を実行し、読み込まれた
+    `HEAVY_MODULES` を返します。
+    """
+    code = (
+        f"import sys\n{statement}\n"
+        f"import json\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} "
+        f"if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_package(self) -> None:
+        self.assertEqual(loaded_modules("import vl53l0x_pigpio"), [])
+
+    def test_driver(self) -> None:
+        self.assertEqual(
+            loaded_modules("from vl53l0x_pigpio import VL53L0X"), []
+        )
+
+    def test_cli(self) -> None:
+        self.assertEqual(
+            loaded_modules("import vl53l0x_pigpio.__main__"), ["click"]
+        )
+
+    def test_array_api(self) -> None:
+        self.assertIn(
+            "numpy",
+            loaded_modules("from vl53l0x_pigpio.driver import RANGE_DTYPE"),
+        )
+
+    def test_attributes(self) -> None:
+        self.assertIsInstance(vl53l0x_pigpio.__version__, str)
+        self.assertTrue(
+            set(vl53l0x_pigpio.__all__) <= set(dir(vl53l0x_pigpio))
+        )
+        with self.assertRaises(AttributeError):
+            _ = vl53l0x_pigpio.NoSuchName  # type: ignore[attr-defined]
+
+    def test_cli_version(self) -> None:
+        result = CliRunner().invoke(cli, ["--version"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn(vl53l0x_pigpio.__version__, result.output)
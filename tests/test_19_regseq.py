@@ -0,0 +1,177 @@
+import unittest
+from unittest.mock import patch
+
+from vl53l0x_pigpio.driver import VL53L0X
+from vl53l0x_pigpio.regseq import (
+    DEFAULT_TUNING_SETTINGS,
+    PAGE_SELECT,
+    SEQUENCES,
+    STOP_VARIABLE_RESTORE,
+    compile_sequence,
+    diff_trace,
+    dry_run,
+)
+from vl53l0x_pigpio.sim import SimulatedVL53L0X
+from vl53l0x_pigpio.transport import MemoryTransport
+
+PARAMS = {"stop_variable": 0x3C}
+
+
+def expand(steps, params=PARAMS) -> list[tuple[int, int]]:
+    """
+    テーブルを、コンパイルしない1バイトずつの書き込みに展開します。
+    """
+    return [
+        (register, params[value] if isinstance(value, str) else value)
+        for register, value in steps
+    ]
+
+
+class TestCompile(unittest.TestCase):
+    def test_merge_contiguous(self) -> None:
+        compiled = compile_sequence(
+            [(0x50, 0x06), (0x51, 0x00), (0x52, 0x96)]
+        )
+        self.assertEqual(compiled.segments, ((0x50, 0x06, 0x00, 0x96),))
+        self.assertEqual(compiled.steps, 3)
+
+    def test_drop_redundant_page(self) -> None:
+        compiled = compile_sequence(
+            [(0xFF, 0x01), (0x4E, 0x2C), (0xFF, 0x01), (0x4F, 0x00)]
+        )
+        # 同じページへの切り替えを除くと、4E と 4F はまとめられる
+        self.assertEqual(
+            compiled.segments, ((0xFF, 0x01), (0x4E, 0x2C, 0x00))
+        )
+        self.assertEqual(compiled.dropped, 1)
+        self.assertEqual(compiled.page, 1)
+
+    def test_start_page(self) -> None:
+        steps = [(0xFF, 0x00), (0x09, 0x00)]
+        self.assertEqual(len(compile_sequence(steps).segments), 2)
+        compiled = compile_sequence(steps, page=0)
+        self.assertEqual(compiled.segments, ((0x09, 0x00),))
+
+    def test_no_merge_across_page(self) -> None:
+        compiled = compile_sequence(
+            [(0x30, 0x01), (0xFF, 0x01), (0x31, 0x02)]
+        )
+        self.assertEqual(len(compiled.segments), 3)
+
+    def test_max_len(self) -> None:
+        steps = [(0x40 + i, i) for i in range(5)]
+        compiled = compile_sequence(steps, max_len=2)
+        self.assertEqual(
+            [len(segment) - 1 for segment in compiled.segments], [2, 2, 1]
+        )
+        with self.assertRaises(ValueError):
+            compile_sequence(steps, max_len=0)
+
+    def test_params(self) -> None:
+        compiled = compile_sequence(STOP_VARIABLE_RESTORE, PARAMS)
+        self.assertIn((0x91, 0x3C), compiled.writes())
+        with self.assertRaises(ValueError):
+            compile_sequence(STOP_VARIABLE_RESTORE)
+        with self.assertRaises(ValueError):
+            compile_sequence(STOP_VARIABLE_RESTORE, {"stop_variable": 256})
+
+    def test_dry_run(self) -> None:
+        lines = dry_run([(0xFF, 0x01), (0x4E, 0x2C), (0x4F, 0x00)], page=0)
+        self.assertEqual(
+            lines, ["[page 0] 0xFF <- 01", "[page 1] 0x4E <- 2C 00"]
+        )
+
+    def test_tables_no_redundant_page(self) -> None:
+        # 組み込みのテーブルには、同じページへの切り替えがない
+        for name, steps in SEQUENCES.items():
+            for page in (None, 0):
+                with self.subTest(name=name, page=page):
+                    compiled = compile_sequence(steps, PARAMS, page=page)
+                    self.assertEqual(compiled.dropped, 0)
+
+    def test_tuning_fewer_writes(self) -> None:
+        compiled = compile_sequence(DEFAULT_TUNING_SETTINGS)
+        self.assertLess(len(compiled.segments), compiled.steps)
+
+
+class TestDiffTrace(unittest.TestCase):
+    def test_same_state(self) -> None:
+        for name, steps in SEQUENCES.items():
+            with self.subTest(name=name):
+                reference = expand(steps)
+                self.assertEqual(diff_trace(steps, reference, PARAMS), [])
+
+    def test_difference(self) -> None:
+        reference = expand(DEFAULT_TUNING_SETTINGS)
+        # ページ1の 0x4E を変えた参照トレース
+        index = reference.index((0x4E, 0x2C))
+        reference[index] = (0x4E, 0x2D)
+        self.assertEqual(
+            diff_trace(DEFAULT_TUNING_SETTINGS, reference, page=0),
+            [(1, 0x4E, 0x2C, 0x2D)],
+        )
+
+    def test_on_device(self) -> None:
+        # 1バイトずつ書いた場合と、コンパイルして書いた場合で
+        # デバイスのレジスタが一致する
+        for name, steps in SEQUENCES.items():
+            with self.subTest(name=name):
+                expected = SimulatedVL53L0X(time_scale=0)
+                for register, value in expand(steps):
+                    expected.write(register, [value])
+
+                actual = SimulatedVL53L0X(time_scale=0)
+                for segment in compile_sequence(steps, PARAMS).segments:
+                    actual.write(segment[0], segment[1:])
+
+                self.assertEqual(actual._pages, expected._pages)
+
+
+class TestDriver(unittest.TestCase):
+    def test_stop_continuous(self) -> None:
+        transport = MemoryTransport()
+        with VL53L0X(None, transport=transport) as tof:
+            tof.start_continuous()
+            transactions = transport.transactions
+            tof.stop_continuous()
+            self.assertEqual(transport.transactions - transactions, 1)
+            self.assertEqual(transport.device.read(PAGE_SELECT, 1)[0], 0)
+
+    def test_write_sequence_stats(self) -> None:
+        with VL53L0X(None, transport=MemoryTransport()) as tof:
+            tof.batch_stats = {"ops": 0, "transactions": 0}
+            tof.write_sequence(DEFAULT_TUNING_SETTINGS)
+            stats = tof.get_batch_stats()
+            self.assertEqual(stats["ops"], len(DEFAULT_TUNING_SETTINGS))
+            self.assertLess(stats["transactions"], 5)
+
+    def test_write_sequence_page(self) -> None:
+        steps = [(PAGE_SELECT, 0x00), (0x09, 0x00)]
+        for cache in (False, True):
+            with self.subTest(cache_registers=cache):
+                transport = MemoryTransport()
+                with VL53L0X(
+                    None, transport=transport, cache_registers=cache
+                ) as tof:
+                    with patch.object(
+                        transport, "write_batch", wraps=transport.write_batch
+                    ) as write_batch:
+                        tof.write_sequence(steps)
+                    segments = write_batch.call_args.args[0]
+                # キャッシュが有効なら今のページ (0) がわかるので、
+                # 切り替えを省く
+                expected = [[0x09, 0x00]]
+                if not cache:
+                    expected.insert(0, [PAGE_SELECT, 0x00])
+                self.assertEqual(segments, expected)
+
+    def test_get_range_with_cache(self) -> None:
+        transport = MemoryTransport(SimulatedVL53L0X(distance=300))
+        with VL53L0X(None, transport=transport, cache_registers=True) as tof:
+            self.assertEqual(tof.get_range(), 300)
+            self.assertEqual(tof._page, 0)
+            self.assertEqual(tof.get_range(), 300)
+
+
+if __name__ == "__main__":
+    unittest.main()